@@ -13,8 +13,12 @@ description:
   - Builds an inventory from specified state file.
   - To read state file command "Terraform show" is used, thus requiring initialized working directory.
   - Does not support caching.
+  - Supports C(compose), C(groups) and C(keyed_groups), evaluated against the variables of each C(ansible_host).
+    The sanitized names and conditions of C(groups) are built once per inventory run and reused for all hosts.
 version_added: 1.1.0
 seealso: []
+extends_documentation_fragment:
+  - constructed
 options:
   plugin:
     description:
@@ -50,6 +54,27 @@ options:
       - The path of a terraform binary to use.
     type: path
     version_added: 1.1.0
+  timeouts:
+    description:
+      - How long, in seconds, each kind of Terraform command may run before it is stopped.
+        By default, commands are not limited.
+      - A command which does not finish in time is interrupted together with the provider plugins it started,
+        and killed if it does not stop within 30 seconds. The inventory then fails with an error telling it timed out.
+    type: dict
+    suboptions:
+      show:
+        description: Timeout of the C(terraform show) of each project.
+        type: int
+    version_added: 3.0.0
+  trace_file:
+    description:
+      - Path to a local file to append trace spans of the inventory run to.
+      - Spans are written as JSON lines in the OpenTelemetry protocol (OTLP/JSON) format,
+        see the I(trace_file) option of M(cloud.terraform.terraform).
+      - A relative path is relative to the directory of the inventory file.
+      - Tracing is disabled when not set.
+    type: path
+    version_added: 3.0.0
 """
 
 EXAMPLES = r"""
@@ -97,6 +122,17 @@ EXAMPLES = r"""
   plugin: cloud.terraform.terraform_provider
   state_file: some/state/file/path
 
+- name: Group hosts by their variables while the inventory is built
+  plugin: cloud.terraform.terraform_provider
+  project_path: some/project/path
+  compose:
+    ansible_user: host_user | default('ec2-user')
+  groups:
+    databases: "'db' in inventory_hostname"
+  keyed_groups:
+    - key: host_region
+      prefix: region
+
 - name: Create an inventory from state file in provided project directory
   plugin: cloud.terraform.terraform_provider
   project_path: some/project/path
@@ -106,25 +142,35 @@ EXAMPLES = r"""
 
 import os
 import subprocess
-from typing import Any, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 import yaml
 from ansible.errors import AnsibleParserError
 from ansible.module_utils.common import process
-from ansible.plugins.inventory import BaseInventoryPlugin
+from ansible.module_utils.parsing.convert_bool import boolean
+from ansible.plugins.inventory import BaseInventoryPlugin, Constructable
+from ansible.utils.vars import combine_vars
 from ansible_collections.cloud.terraform.plugins.module_utils.errors import TerraformError, TerraformWarning
 from ansible_collections.cloud.terraform.plugins.module_utils.models import (
     TerraformAnsibleProvider,
     TerraformModuleResource,
     TerraformShow,
 )
+from ansible_collections.cloud.terraform.plugins.module_utils.process import run_process
 from ansible_collections.cloud.terraform.plugins.module_utils.terraform_commands import TerraformCommands
-from ansible_collections.cloud.terraform.plugins.module_utils.utils import validate_bin_path
+from ansible_collections.cloud.terraform.plugins.module_utils.tracing import Tracer
+from ansible_collections.cloud.terraform.plugins.module_utils.utils import resolve_config_path, validate_bin_path
 
 
 # no module available here, mock functionality to be consistent throughout the rest of the codebase
-def module_run_command(cmd: List[str], cwd: str, check_rc: bool) -> Tuple[int, str, str]:
-    completed_process = subprocess.run(cmd, capture_output=True, check=check_rc, cwd=cwd)
+def module_run_command(cmd: List[str], cwd: str, check_rc: bool, timeout: Optional[int] = None) -> Tuple[int, str, str]:
+    if timeout is not None:
+        rc, stdout, stderr = run_process(cmd, cwd=cwd, timeout=timeout)
+        completed_process = subprocess.CompletedProcess(cmd, rc, stdout, stderr)
+        if check_rc:
+            completed_process.check_returncode()
+    else:
+        completed_process = subprocess.run(cmd, capture_output=True, check=check_rc, cwd=cwd)
     return (
         completed_process.returncode,
         completed_process.stdout.decode("utf-8"),
@@ -132,9 +178,26 @@ def module_run_command(cmd: List[str], cwd: str, check_rc: bool) -> Tuple[int, s
     )
 
 
-class InventoryModule(BaseInventoryPlugin):  # type: ignore  # mypy ignore
+# options of the constructed documentation fragment and their defaults
+CONSTRUCTED_OPTIONS = dict(
+    strict=False,
+    compose={},
+    groups={},
+    keyed_groups=[],
+    use_extra_vars=False,
+    leading_separator=True,
+)
+
+
+class InventoryModule(BaseInventoryPlugin, Constructable):  # type: ignore  # mypy ignore
     NAME = "terraform_provider"
 
+    def __init__(self) -> None:
+        super(InventoryModule, self).__init__()
+        self._composed_groups: Dict[str, Tuple[str, str]] = {}
+        for option, default in CONSTRUCTED_OPTIONS.items():
+            self.set_option(option, default)
+
     # instead of self._read_config_data(path), which reads paths as absolute thus creating problems
     # in case if project_path is provided and state_file is provided as relative path
     def read_config_data(self, path):  # type: ignore  # mypy ignore
@@ -161,6 +224,61 @@ class InventoryModule(BaseInventoryPlugin):  # type: ignore  # mypy ignore
     #             valid = True
     #     return valid
 
+    def set_constructed_options(self, cfg: Dict[str, Any]) -> None:
+        for option, default in CONSTRUCTED_OPTIONS.items():
+            self.set_option(option, cfg.get(option, default))
+
+    def _get_composed_group(self, group_name: str, conditional: str) -> Tuple[str, str]:
+        composed_group = self._composed_groups.get(group_name)
+        if composed_group is None:
+            composed_group = (
+                self._sanitize_group_name(group_name),
+                "{%% if %s %%} True {%% else %%} False {%% endif %%}" % conditional,
+            )
+            self._composed_groups[group_name] = composed_group
+        return composed_group
+
+    def _add_host_to_composed_groups(
+        self,
+        groups: Dict[str, str],
+        variables: Dict[str, Any],
+        host: str,
+        strict: bool = False,
+        fetch_hostvars: bool = True,
+    ) -> None:
+        # same as Constructable._add_host_to_composed_groups, but the sanitized group names and conditions
+        # are built once for all hosts, and lookups are disabled like in compose and keyed_groups
+        if not groups or not isinstance(groups, dict):
+            return
+        if fetch_hostvars:
+            variables = combine_vars(variables, self.inventory.get_host(host).get_vars())
+        self.templar.available_variables = variables
+        for group_name, conditional in groups.items():
+            group_name, template = self._get_composed_group(group_name, conditional)
+            try:
+                result = boolean(self.templar.template(template, disable_lookups=True))
+            except Exception as e:
+                if strict:
+                    raise AnsibleParserError("Could not add host {0} to group {1}: {2}".format(host, group_name, e))
+                continue
+            if result:
+                self.inventory.add_group(group_name)
+                self.inventory.add_child(group_name, host)
+
+    def _construct_host(self, host: str) -> None:
+        strict = self.get_option("strict")
+        self._set_composite_vars(
+            self.get_option("compose"), self.inventory.get_host(host).get_vars(), host, strict=strict
+        )
+        # the variables are read once more to include the composed ones, and then shared by all groups
+        variables = self.inventory.get_host(host).get_vars()
+        self._add_host_to_composed_groups(
+            self.get_option("groups"), variables, host, strict=strict, fetch_hostvars=False
+        )
+        self._add_host_to_keyed_groups(
+            self.get_option("keyed_groups"), variables, host, strict=strict, fetch_hostvars=False
+        )
+
     def _add_group(self, inventory: Any, resource: TerraformModuleResource) -> None:
         attributes = TerraformAnsibleProvider.from_json(resource)
         inventory.add_group(attributes.name)
@@ -172,7 +290,7 @@ class InventoryModule(BaseInventoryPlugin):  # type: ignore  # mypy ignore
             for key, value in attributes.variables.items():
                 inventory.set_variable(attributes.name, key, value)
 
-    def _add_host(self, inventory: Any, resource: TerraformModuleResource) -> None:
+    def _add_host(self, inventory: Any, resource: TerraformModuleResource) -> str:
         attributes = TerraformAnsibleProvider.from_json(resource)
         # Give warning if group already exists (in case of multiple terraform projects)
         if inventory.get_host(attributes.name):
@@ -187,10 +305,12 @@ class InventoryModule(BaseInventoryPlugin):  # type: ignore  # mypy ignore
         if attributes.variables:
             for key, value in attributes.variables.items():
                 inventory.set_variable(attributes.name, key, value)
+        return attributes.name
 
     def create_inventory(
         self, inventory: Any, state_content: List[Optional[TerraformShow]], search_child_modules: bool
     ) -> None:
+        hosts = []
         for state in state_content:
             if state is None:
                 continue
@@ -203,7 +323,12 @@ class InventoryModule(BaseInventoryPlugin):  # type: ignore  # mypy ignore
                 if resource.type == "ansible_group":
                     self._add_group(inventory, resource)
                 elif resource.type == "ansible_host":
-                    self._add_host(inventory, resource)
+                    hosts.append(self._add_host(inventory, resource))
+
+        # constructed groups and variables are evaluated after all groups exist and all host variables are set
+        if self.get_option("compose") or self.get_option("groups") or self.get_option("keyed_groups"):
+            for host in hosts:
+                self._construct_host(host)
 
     def parse(self, inventory, loader, path, cache=False):  # type: ignore  # mypy ignore
         super(InventoryModule, self).parse(inventory, loader, path)
@@ -213,22 +338,37 @@ class InventoryModule(BaseInventoryPlugin):  # type: ignore  # mypy ignore
         project_path = cfg.get("project_path", os.getcwd())
         state_file = cfg.get("state_file", "")
         search_child_modules = cfg.get("search_child_modules", True)
+        self.set_constructed_options(cfg)
         terraform_binary = cfg.get("binary_path", None)
         if terraform_binary is not None:
             validate_bin_path(terraform_binary)
         else:
             terraform_binary = process.get_bin_path("terraform", required=True)
 
+        tracer = Tracer(resolve_config_path(cfg.get("trace_file"), path))
+        timeouts = cfg.get("timeouts") or {}
+
         # TODO: remove when ansible provider is available
         state_content = []
         if isinstance(project_path, str):
             project_path = [project_path]
-        for path in project_path:
-            terraform = TerraformCommands(module_run_command, path, terraform_binary, False)
-            try:
-                state_content.append(terraform.show(state_file))
-            except TerraformWarning as e:
-                raise TerraformError(e.message)
+        with tracer.span("inventory", plugin=self.NAME, projects=len(project_path)):
+            for path in project_path:
+                terraform = TerraformCommands(
+                    module_run_command,
+                    path,
+                    terraform_binary,
+                    False,
+                    tracer,
+                    timeouts={command: timeout for command, timeout in timeouts.items() if timeout},
+                )
+                try:
+                    state_content.append(terraform.show(state_file))
+                except TerraformWarning as e:
+                    raise TerraformError(e.message)
 
-        if state_content:  # to avoid mypy error: Item "None" of "Optional[TerraformShow]" has no attribute "values"
-            self.create_inventory(inventory, state_content, search_child_modules)
+            if state_content:  # to avoid mypy error: Item "None" of "Optional[TerraformShow]" has no attribute "values"
+                with tracer.span("create_inventory") as span:
+                    self.create_inventory(inventory, state_content, search_child_modules)
+                    span.set_attribute("hosts", len(inventory.hosts))
+                    span.set_attribute("groups", len(inventory.groups))
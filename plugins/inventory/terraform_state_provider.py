@@ -5,15 +5,33 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 # python imports
+import fnmatch
+import functools
+import os
 import subprocess
 import shutil
 import tempfile
 import re
 import json
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 # Ansible imports
 from ansible.module_utils.common import process
 from ansible.plugins.inventory import BaseInventoryPlugin, Constructable, Cacheable
+from ansible_collections.cloud.terraform.plugins.module_utils.cache import (
+    file_lock,
+    get_cache_dir,
+    get_cache_key,
+)
+from ansible_collections.cloud.terraform.plugins.module_utils.plugin_cache import (
+    get_plugin_cache_environment,
+    managed_plugin_cache,
+)
+from ansible_collections.cloud.terraform.plugins.module_utils.errors import TerraformTimeoutError
+from ansible_collections.cloud.terraform.plugins.module_utils.process import run_process
+from ansible_collections.cloud.terraform.plugins.module_utils.timing import get_command_name
+from ansible_collections.cloud.terraform.plugins.module_utils.tracing import Tracer
+from ansible_collections.cloud.terraform.plugins.module_utils.utils import resolve_config_path
 
 DOCUMENTATION = r'''
 name: terraform_state_provider
@@ -24,10 +42,12 @@ description:
   - Builds an inventory from a terraform cli workspace
   - supports execution-environments by support git-based workspaces
   - supports configuration of remote state access external to teh repository
-  - no caching support
+  - supports incremental refresh through the inventory cache
   - Supports only CLI-driven workflos
   - For use in execution environments, use a git paht
 version_added: 1.3
+extends_documentation_fragment:
+  - inventory_cache
 options:
   plugin:
     description:
@@ -42,6 +62,14 @@ options:
       - a key of 'path' or 'git' must be provided
       - if 'remote_state' is configured, a supported 'type' such as 's3' must exist
       - other parameters of the list are expected to be keys for the remote state
+      - projects with 'remote_state' are read from a working directory of their own, kept in the
+        user's cache directory (C($XDG_CACHE_HOME) or C(~/.cache)) and shared by every project with the
+        same 'remote_state'; it is initialized once and reused by later runs, the project itself is
+        neither modified nor cloned
+      - for a 'path' project, that working directory gets a copy of the C(*.tf) files and the
+        C(.terraform.lock.hcl) of the project, so init installs the provider versions the project pins,
+        and a changed lock file gets a new working directory; a 'git' project is not cloned, so only
+        its backend configuration is used
     required: true
     type: raw
   type_list:
@@ -67,6 +95,114 @@ options:
     required: false
     type: raw
     default: []
+  plugin_cache_dir:
+    description:
+      - Path to a directory shared between runs to cache downloaded provider plugins in
+      - set as C(TF_PLUGIN_CACHE_DIR) for init and show, concurrent inits are serialized with a lock file
+      - when set, C(CHECKPOINT_DISABLE) is set as well to skip Terraform's upgrade checks
+      - a relative path is relative to the directory of the inventory file
+      - the cache can be shared with other projects and with the C(cloud.terraform.terraform) module
+    required: false
+    type: path
+  plugin_cache_max_size:
+    description:
+      - Maximum size of the plugin cache in megabytes
+      - older provider versions are removed after init until the cache fits
+      - the newest version of each provider and the versions any project sharing the cache initialized
+        within the last day are always kept, so the cache can stay above this size
+    required: false
+    type: int
+  search_child_modules:
+    description:
+      - Whether to include resources from Terraform child modules
+      - all modules of a project are read from the output of a single C(terraform show)
+    required: false
+    type: bool
+    default: false
+    version_added: 3.0.0
+  state_source:
+    description:
+      - How the state of every project is read
+      - C(show) uses C(terraform show -json), which loads the provider schemas to render the values
+      - C(pull) uses C(terraform state pull) and reads the raw state directly, without loading any provider schema
+      - C(pull) requires the version 4 state format, written by Terraform 0.12 and later
+    required: false
+    type: str
+    choices: [ show, pull ]
+    default: show
+    version_added: 3.0.0
+  timeouts:
+    description:
+      - How long, in seconds, each kind of command may run before it is stopped, by default they are not limited
+      - a command which does not finish in time is interrupted together with the provider plugins it started,
+        killed if it does not stop within 30 seconds, and fails the inventory with an error telling it timed out
+    required: false
+    type: dict
+    suboptions:
+      init:
+        description: timeout of C(terraform init)
+        type: int
+      show:
+        description: timeout of C(terraform show) or C(terraform state pull), see I(state_source)
+        type: int
+      clone:
+        description: timeout of the C(git clone) of the projects which are git repositories
+        type: int
+    version_added: 3.0.0
+  hostvars_mode:
+    description:
+      - How the attributes of a resource are turned into host variables
+      - C(flat) sets one variable per nested attribute, with the names of the nested keys joined by underscores
+      - C(nested) sets a single C(terraform_values) variable holding the attributes as a dictionary
+    required: false
+    type: str
+    choices: [ flat, nested ]
+    default: flat
+    version_added: 3.0.0
+  hostvars_max_depth:
+    description:
+      - Maximum number of nesting levels flattened into separate variables when I(hostvars_mode=flat)
+      - values below that depth are set as dictionaries or lists under the name of their parent
+      - everything is flattened when not set
+    required: false
+    type: int
+    version_added: 3.0.0
+  hostvars_include:
+    description:
+      - Shell-style globs of top level attribute names to turn into host variables
+      - all attributes are included when empty
+    required: false
+    type: list
+    elements: str
+    default: []
+    version_added: 3.0.0
+  hostvars_exclude:
+    description:
+      - Shell-style globs of top level attribute names to leave out of the host variables
+      - applied after I(hostvars_include)
+    required: false
+    type: list
+    elements: str
+    default: []
+    version_added: 3.0.0
+  trace_file:
+    description:
+      - Path to a local file to append trace spans of the inventory run to
+      - git clone, init, show and the inventory building of every project are recorded as spans
+      - spans are written as OpenTelemetry protocol (OTLP/JSON) lines, tracing is disabled when not set
+      - a relative path is relative to the directory of the inventory file
+      - the cache can be shared with other projects and with the C(cloud.terraform.terraform) module
+    required: false
+    type: path
+notes:
+  - When the inventory cache is enabled with I(cache=true), the serial and lineage of the state of every project
+    are stored in it together with the hosts built from it and a hash of every resource.
+  - On the next run, the state is first fetched with C(terraform state pull); when its serial and lineage did not
+    change, the cached hosts are used and C(terraform show) is skipped. Otherwise only the hosts of resources whose
+    content changed are rebuilt.
+  - The state is pulled before C(terraform init) when the project path or the working directory of I(remote_state)
+    is initialized already, so an unchanged state skips init as well. A project cloned from I(git) is always cloned
+    and initialized first, so only C(terraform show) is skipped for it.
 '''
 
 EXAMPLES = r'''
@@ -96,6 +232,43 @@ access_param:
   - public_ip
   - private_ip
 
+# only keep a few attributes of every instance as host variables,
+# with nested attributes kept as dictionaries
+---
+plugin: cloud.terraform.terraform_state_provider
+project_path:
+  - path: "."
+type_list:
+  - aws_instance
+hostvars_include:
+  - "id"
+  - "ami"
+  - "private_*"
+  - "tags*"
+hostvars_max_depth: 1
+
+# include the instances created in child modules
+---
+plugin: cloud.terraform.terraform_state_provider
+project_path:
+  - path: "."
+type_list:
+  - aws_instance
+search_child_modules: true
+
+# read a remote state without loading the provider schemas
+---
+plugin: cloud.terraform.terraform_state_provider
+project_path:
+  - path: "."
+    remote_state:
+      type: s3
+      bucket: remote_state_s3_bucket
+      key: remote_state_key_name
+type_list:
+  - aws_instance
+state_source: pull
+
 # ansible-inventory example
 $ ansible-inventory -i inv_tf.yml --graph --vars
 @all:
@@ -230,74 +403,188 @@ aws_instance.dbserver      : ok=1    changed=0    unreachable=0    failed=0    s
 aws_instance.webserver     : ok=1    changed=0    unreachable=0    failed=0    skipped=0    rescued=0    ignored=0
 '''
 
+
 class TerraformInventoryError(Exception):
     pass
 
-def _clean(var_str):
-    return re.sub(r'\W|^(?=\d)','_', var_str)
 
-# flatten json data to make it easier to set as variables
-def flatten_json(y):
-    out = {}
+_CLEAN_RE = re.compile(r'\W|^(?=\d)')
 
-    def flatten(x, name=''):
 
-        # If the Nested key-value
-        # pair is of dict type
-        if isinstance(x, dict):
+# group names repeat for every host carrying the same tag, so they are sanitized once
+@functools.lru_cache(maxsize=None)
+def _clean(var_str: str) -> str:
+    return _CLEAN_RE.sub('_', var_str)
 
-            for a in x:
-                flatten(x[a], name + a + '_')
 
-        # If the Nested key-value
-        # pair is of list type
+# flatten json data to make it easier to set as variables
+# values nested deeper than max_depth are kept as they are under the truncated name
+def flatten_json(y: Any, max_depth: Optional[int] = None) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+
+    # walk the structure with an explicit stack, children are pushed in reverse
+    # so variables keep the order of the attributes in the state
+    stack: List[Tuple[Any, str, int]] = [(y, '', 0)]
+    while stack:
+        x, name, depth = stack.pop()
+        children: Optional[List[Tuple[Any, str, int]]]
+        if max_depth is not None and depth >= max_depth:
+            children = None
+        elif isinstance(x, dict):
+            children = [(val, name + key + '_', depth + 1) for key, val in x.items()]
         elif isinstance(x, list):
-
-            i = 0
-
-            for a in x:
-                flatten(a, name + str(i) + '_')
-                i += 1
+            children = [(val, name + str(i) + '_', depth + 1) for i, val in enumerate(x)]
         else:
+            children = None
+
+        if children is None:
             out[name[:-1]] = x
+        else:
+            stack.extend(reversed(children))
 
-    flatten(y)
     return out
 
+
+# keep only the top level attributes selected by the include and exclude globs
+def project_values(values: Dict[str, Any], include: List[str], exclude: List[str]) -> Dict[str, Any]:
+    if not include and not exclude:
+        return values
+
+    def selected(key: str) -> bool:
+        if include and not any(fnmatch.fnmatchcase(key, pattern) for pattern in include):
+            return False
+        return not any(fnmatch.fnmatchcase(key, pattern) for pattern in exclude)
+
+    return {key: val for key, val in values.items() if selected(key)}
+
+
 # resource filtering function logic
+# everything is prepared once, so the returned filter only does set lookups and precompiled matches
 def filter_function(type_list, tag_list, address_list):
-    def myfilter(x):
-        if type_list is not None and len(type_list) > 0:
-            if not x['type'] in type_list:
-                return False
+    type_set = frozenset(type_list or [])
 
-        if address_list is not None and len(address_list) > 0:
-            found = False
-            for taddress in address_list:
-                if re.search(taddress, x['address']):
-                    found = True
-                    break
+    # compiled one by one, joining them would break patterns carrying inline flags
+    address_res = [re.compile(taddress) for taddress in address_list or []]
 
-            if not found:
-                return found
+    tag_matchers = []
+    for tagset in tag_list or []:
+        setkey = next(iter(tagset))
+        tag_matchers.append((setkey, re.compile(tagset[setkey])))
 
-        if tag_list is not None and len(tag_list) > 0:
-            found = False
-            for tagset in tag_list:
-                setkey = next(iter(tagset))
-                setval = tagset[setkey]
-                if setkey in x['values']['tags_all']:
-                    if re.search(setval, x['values']['tags_all'][setkey]):
-                        found = True
-                        break
+    def myfilter(x):
+        if type_set and x['type'] not in type_set:
+            return False
 
-            if not found:
-                return found
+        if address_res and not any(address_re.search(x['address']) for address_re in address_res):
+            return False
+
+        if tag_matchers:
+            tags = x.get('values', {}).get('tags_all') or {}
+            for setkey, setval_re in tag_matchers:
+                if setkey in tags and setval_re.search(tags[setkey]):
+                    break
+            else:
+                return False
 
         return True
 
     return myfilter
 
+
+def _is_resource_list(value: Any) -> bool:
+    return isinstance(value, list) and all(
+        isinstance(r, dict) and 'address' in r and 'type' in r and 'mode' in r for r in value
+    )
+
+
+# parse the output of show, dropping resources rejected by the filter as soon as
+# the module containing them is decoded, so they are never kept around
+def load_show_json(text: str, resource_filter: Callable[[Dict[str, Any]], bool]) -> Any:
+    def object_hook(obj: Dict[str, Any]) -> Dict[str, Any]:
+        resources = obj.get('resources')
+        if resources and _is_resource_list(resources):
+            obj['resources'] = [r for r in resources if resource_filter(r)]
+        return obj
+
+    return json.loads(text, object_hook=object_hook)
+
+
+# lazily walk the module tree of the show output, root module resources first,
+# then every child module in order, without building an intermediate list
+def iter_module_resources(module: Dict[str, Any], search_child_modules: bool = False) -> Iterator[Dict[str, Any]]:
+    stack = [module]
+    while stack:
+        current = stack.pop()
+        yield from current.get('resources', [])
+        if search_child_modules:
+            stack.extend(reversed(current.get('child_modules', [])))
+
+
+# map the resources of a raw (version 4) state, as returned by state pull, to the
+# shape of the resources in the output of show, one per instance
+def iter_pulled_resources(state: Dict[str, Any], search_child_modules: bool = False) -> Iterator[Dict[str, Any]]:
+    for resource in state.get('resources', []):
+        module = resource.get('module')
+        if module and not search_child_modules:
+            continue
+
+        address = f"{resource['type']}.{resource['name']}"
+        if resource.get('mode') == 'data':
+            address = f"data.{address}"
+        if module:
+            address = f"{module}.{address}"
+
+        for instance in resource.get('instances', []):
+            # deposed objects are about to be destroyed and are not part of show either
+            if 'deposed' in instance:
+                continue
+            result: Dict[str, Any] = {
+                'address': address,
+                'mode': resource.get('mode', 'managed'),
+                'type': resource['type'],
+                'name': resource['name'],
+                'provider_name': resource.get('provider'),
+                'values': instance.get('attributes', {}),
+            }
+            if 'index_key' in instance:
+                result['index'] = instance['index_key']
+                result['address'] = f"{address}[{json.dumps(instance['index_key'])}]"
+            yield result
+
+
+def _ignore_non_configuration(directory: str, names: List[str]) -> List[str]:
+    # init only needs the configuration of the project and its local modules, and the lock file
+    ignored = []
+    for name in names:
+        if name in ('.terraform', '.git'):
+            ignored.append(name)
+        elif not os.path.isdir(os.path.join(directory, name)) and not name.endswith(('.tf', '.tf.json', '.hcl')):
+            ignored.append(name)
+    return ignored
+
+
+def _resource_hash(resource: Dict[str, Any]) -> str:
+    return get_cache_key(json.dumps(resource, sort_keys=True, default=str))
+
+
+BACKEND_INIT_MARKER = ".ansible-cloud-terraform-initialized"
+BACKEND_LOCK_FILE = ".ansible-cloud-terraform.lock"
+DEPENDENCY_LOCK_FILE = ".terraform.lock.hcl"
+# what show reports when the working directory lacks a provider the state needs
+MISSING_PROVIDER_RE = re.compile(
+    r'required by this configuration|missing required provider|inconsistent dependency lock file'
+    r'|provider [^\n]* not available|run "terraform init"',
+    re.IGNORECASE,
+)
+# the key of the timeouts option limiting each command
+COMMAND_TIMEOUTS = {
+    "terraform init": "init",
+    "terraform show": "show",
+    "terraform state pull": "show",
+    "git clone": "clone",
+}
+
+
 class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
     NAME = "cloud.terraform.terraform_state_provider"
 
@@ -308,6 +595,17 @@ class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
     tag_list = []
     ip_param = []
     remote_state = None
+    plugin_cache_dir = None
+    plugin_cache_max_size = None
+    environ_update = {}
+    tracer = Tracer(None)
+    hostvars_mode = "flat"
+    hostvars_max_depth = None
+    hostvars_include: List[str] = []
+    hostvars_exclude: List[str] = []
+    search_child_modules = False
+    state_source = "show"
+    use_cache = False
 
     attr_keys = [
         "arn", "ami",
@@ -329,6 +627,17 @@ class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
         self.address_list = cfg.get("address_list", [])
         self.ip_param = cfg.get("access_param", ["public_ip"])
         self.remote_state = cfg.get('remote_state', None)
+        self.plugin_cache_dir = resolve_config_path(cfg.get('plugin_cache_dir', None), path)
+        self.plugin_cache_max_size = cfg.get('plugin_cache_max_size', None)
+        self.environ_update = get_plugin_cache_environment(self.plugin_cache_dir)
+        self.tracer = Tracer(resolve_config_path(cfg.get('trace_file', None), path))
+        self.hostvars_mode = cfg.get('hostvars_mode', 'flat')
+        self.hostvars_max_depth = cfg.get('hostvars_max_depth', None)
+        self.hostvars_include = cfg.get('hostvars_include', [])
+        self.hostvars_exclude = cfg.get('hostvars_exclude', [])
+        self.search_child_modules = cfg.get('search_child_modules', False)
+        self.state_source = cfg.get('state_source', 'show')
+        self.timeouts = cfg.get('timeouts', None) or {}
 
         if isinstance(self.project_path, str):
             self.project_path = [self.project_path]
@@ -339,6 +648,19 @@ class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
         if isinstance(self.address_list, str):
             self.address_list = [self.address_list]
 
+        if self.state_source not in ("show", "pull"):
+            raise TerraformInventoryError(
+                f"state_source must be one of 'show' or 'pull', got '{self.state_source}'"
+            )
+
+        if self.hostvars_mode not in ("flat", "nested"):
+            raise TerraformInventoryError(
+                f"hostvars_mode must be one of 'flat' or 'nested', got '{self.hostvars_mode}'"
+            )
+
+        if self.hostvars_max_depth is not None and self.hostvars_max_depth < 1:
+            raise TerraformInventoryError("hostvars_max_depth must be at least 1")
+
         # project_path must exist
         if self.project_path is None:
             raise TerraformInventoryError("project_path must exist")
@@ -352,60 +674,249 @@ class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
         else:
             self.terraform_binary = process.get_bin_path("terraform", required=True)
 
-        my_filter = filter_function(self.type_list, self.address_list, self.tag_list)
-
-        for item in self.project_path:
-            tempdir = None
-            tdir = None
+        my_filter = filter_function(self.type_list, self.tag_list, self.address_list)
+
+        self.use_cache = self.get_option('cache')
+        cache_key = self.get_cache_key(path)
+        # hosts are rebuilt from scratch whenever an option used to build them changes
+        config_key = get_cache_key(json.dumps([
+            self.type_list, self.address_list, self.tag_list, self.ip_param, self.search_child_modules,
+            self.state_source, self.hostvars_mode, self.hostvars_max_depth, self.hostvars_include,
+            self.hostvars_exclude,
+        ], default=str))
+        cached_projects = {}
+        if self.use_cache and cache:
             try:
-                if "git" in item:
-                    tempdir = tempfile.mkdtemp()
-                    tdir = tempdir
-                    self._clone_gitrepo(tdir, item['git'])
-                else:
-                    tdir = item['path']
+                cached_data = self._cache[cache_key]
+            except KeyError:
+                cached_data = {}
+            if cached_data.get('config') == config_key:
+                cached_projects = cached_data.get('projects', {})
+
+        projects = {}
+        with self.tracer.span("inventory", plugin=self.NAME, projects=len(self.project_path)):
+            for item in self.project_path:
+                project_key = json.dumps(item, sort_keys=True, default=str)
+                with self.tracer.span("project", project=item.get('git', item.get('path', ''))):
+                    projects[project_key] = self._parse_project(
+                        inventory, item, my_filter, cached_projects.get(project_key)
+                    )
 
+        if self.use_cache:
+            self._cache[cache_key] = {'config': config_key, 'projects': projects}
+
+    def _parse_project(self, inventory, item, my_filter, cached_project=None):
+        tempdir = None
+        tdir = None
+        env_update: Dict[str, str] = {}
+        try:
+            if "remote_state" in item:
+                tdir, env_update = self._prepare_backend_workdir(item)
+            elif "git" in item:
+                tempdir = tempfile.mkdtemp()
+                tdir = tempdir
+                self._clone_gitrepo(tdir, item['git'])
+            else:
+                tdir = item['path']
+
+            # the serial of the state changes with every write to it, so an unchanged
+            # serial means the hosts built the last time are still up to date; a working
+            # directory that is initialized already can pull the state before init runs,
+            # while a fresh clone has to be initialized first
+            state = None
+            if self.use_cache and tempdir is None and self._is_initialized(tdir, env_update):
+                try:
+                    state = self._pull_state(tdir, item, env_update)
+                except TerraformInventoryError:
+                    # an outdated working directory may need init to read its state
+                    state = None
+                if state is not None and self._is_cached_state(state, cached_project):
+                    return self._add_cached_project(inventory, cached_project)
+
+            if "remote_state" not in item:
                 init_cmd = self._build_tf_command(tdir, item)
-                self.run_subprocess(init_cmd, tdir)
-                show_cmd = self._build_tf_command(tdir, item, cmd_type="show")
-                json_data = json.loads(self.run_subprocess(show_cmd, tdir)[1])
-                if not "values" in json_data:
-                    raise TerraformInventoryError(
-                      f"Invalid result from show.  Project may be missing remote state: {json_data}"
-                    )
-                filtered_list = list(
-                    filter(
-                        my_filter,
-                        json_data['values']['root_module']['resources']
-                    )
-                )
-                self.inventory_from_show(inventory, filtered_list)
-            finally:
-                if tempdir is not None:
-                    shutil.rmtree(tempdir, ignore_errors=True)
+                with managed_plugin_cache(self.plugin_cache_dir, self.plugin_cache_max_size, tdir):
+                    self.run_subprocess(init_cmd, tdir)
 
-    def inventory_from_show(self, inventory, filtered_show_result):
+            if not self.use_cache:
+                if self.state_source == "pull":
+                    filtered_resources = self._pull_resources(tdir, item, my_filter, env_update)
+                else:
+                    filtered_resources = self._show_resources(tdir, item, my_filter, env_update)
+                with self.tracer.span("inventory_from_show") as span:
+                    hosts = self.inventory_from_show(inventory, filtered_resources)
+                    span.set_attribute("hosts", len(hosts))
+                return None
+
+            if state is None:
+                state = self._pull_state(tdir, item, env_update)
+                if self._is_cached_state(state, cached_project):
+                    return self._add_cached_project(inventory, cached_project)
+
+            serial, lineage = state.get('serial'), state.get('lineage')
+            if self.state_source == "pull":
+                filtered_resources = filter(my_filter, iter_pulled_resources(state, self.search_child_modules))
+            else:
+                filtered_resources = self._show_resources(tdir, item, my_filter, env_update)
+            cached_hosts = {}
+            if cached_project is not None:
+                cached_hosts = {host['name']: host for host in cached_project['hosts']}
+            with self.tracer.span("inventory_from_show") as span:
+                hosts = self.inventory_from_show(inventory, filtered_resources, cached_hosts)
+                span.set_attribute("hosts", len(hosts))
+                span.set_attribute("rebuilt_hosts", sum(1 for host in hosts if cached_hosts.get(host['name']) is not host))
+            return {'serial': serial, 'lineage': lineage, 'hosts': hosts}
+        finally:
+            if tempdir is not None:
+                shutil.rmtree(tempdir, ignore_errors=True)
+
+    def _is_initialized(self, tdir: str, env_update: Dict[str, str]) -> bool:
+        data_dir = env_update.get("TF_DATA_DIR", os.environ.get("TF_DATA_DIR", ".terraform"))
+        return os.path.isdir(os.path.join(tdir, data_dir))
+
+    def _is_cached_state(self, state: Dict[str, Any], cached_project: Optional[Dict[str, Any]]) -> bool:
+        if cached_project is None or state.get('serial') is None:
+            return False
+        return (cached_project.get('serial'), cached_project.get('lineage')) == (state['serial'], state.get('lineage'))
+
+    def _add_cached_project(self, inventory: Any, cached_project: Dict[str, Any]) -> Dict[str, Any]:
+        with self.tracer.span("inventory_from_cache") as span:
+            for host in cached_project['hosts']:
+                self._add_host(inventory, host)
+            span.set_attribute("hosts", len(cached_project['hosts']))
+        return cached_project
+
+    def _prepare_backend_workdir(self, item: Dict[str, Any], reinitialize: bool = False) -> Tuple[str, Dict[str, str]]:
+        # every distinct remote_state gets a persistent working directory that is initialized only once,
+        # unless reinitialize is set because the state needs providers it was not initialized with;
+        # it is seeded with the configuration and lock file of the project, so init installs the
+        # provider versions the project pins, and a new lock file gets a new working directory
+        remote_state = json.dumps(item['remote_state'], sort_keys=True, default=str)
+        project_path = None if 'git' in item else item.get('path')
+        if project_path is not None and not os.path.isdir(project_path):
+            project_path = None
+        lock_file = ''
+        if project_path is not None and os.path.isfile(os.path.join(project_path, DEPENDENCY_LOCK_FILE)):
+            with open(os.path.join(project_path, DEPENDENCY_LOCK_FILE), encoding="utf-8") as f:
+                lock_file = f.read()
+        workdir = get_cache_dir("backends", get_cache_key(
+            str(self.terraform_binary), remote_state, os.path.realpath(project_path or ''), lock_file,
+        ))
+        env_update = {"TF_DATA_DIR": os.path.join(workdir, ".terraform")}
+        marker = os.path.join(workdir, BACKEND_INIT_MARKER)
+        if os.path.exists(marker) and not reinitialize:
+            return workdir, env_update
+
+        with file_lock(os.path.join(workdir, BACKEND_LOCK_FILE)):
+            if reinitialize and os.path.exists(marker):
+                os.remove(marker)
+            # another parse may have initialized it while we were waiting for the lock
+            if not os.path.exists(marker):
+                if project_path is not None:
+                    shutil.copytree(project_path, workdir, ignore=_ignore_non_configuration, dirs_exist_ok=True)
+                init_cmd = self._build_tf_command(workdir, item)
+                with managed_plugin_cache(self.plugin_cache_dir, self.plugin_cache_max_size, workdir):
+                    self.run_subprocess(init_cmd, workdir, env_update=env_update)
+                with open(marker, "w", encoding="utf-8"):
+                    pass
+        return workdir, env_update
+
+    def _show_resources(
+        self, tdir: str, item: Dict[str, Any], my_filter: Callable[[Dict[str, Any]], bool],
+        env_update: Optional[Dict[str, str]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        show_cmd = self._build_tf_command(tdir, item, cmd_type="show")
+        try:
+            output = self.run_subprocess(show_cmd, tdir, env_update=env_update)[1]
+        except TerraformInventoryError as e:
+            # show needs the providers of every resource in the state, so the persistent working
+            # directory of a remote state is initialized again once when a new one is required;
+            # other errors, like failing authentication, would fail the same way after init
+            if "remote_state" not in item or not MISSING_PROVIDER_RE.search(str(e)):
+                raise
+            self._prepare_backend_workdir(item, reinitialize=True)
+            output = self.run_subprocess(show_cmd, tdir, env_update=env_update)[1]
+        json_data = load_show_json(output, my_filter)
+        if not "values" in json_data:
+            raise TerraformInventoryError(
+              f"Invalid result from show.  Project may be missing remote state: {json_data}"
+            )
+        return iter_module_resources(json_data['values'].get('root_module', {}), self.search_child_modules)
+
+    def _pull_state(self, tdir: str, item: Dict[str, Any], env_update: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        pull_cmd = self._build_tf_command(tdir, item, cmd_type="pull")
+        output = self.run_subprocess(pull_cmd, tdir, env_update=env_update)[1]
+        # state pull prints nothing at all when there is no state yet
+        json_data = json.loads(output) if output.strip() else {}
+        if json_data.get("version") != 4:
+            raise TerraformInventoryError(
+                f"Invalid result from state pull, expected a version 4 state. Project may be missing remote state: {json_data}"
+            )
+        return json_data
+
+    def _pull_resources(
+        self, tdir: str, item: Dict[str, Any], my_filter: Callable[[Dict[str, Any]], bool],
+        env_update: Optional[Dict[str, str]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        json_data = self._pull_state(tdir, item, env_update)
+        return filter(my_filter, iter_pulled_resources(json_data, self.search_child_modules))
+
+    # adds a host for every resource with one of the access parameters, hosts of
+    # resources whose hash did not change are taken from cached_hosts as they are
+    def inventory_from_show(
+        self, inventory: Any, filtered_show_result: Iterable[Dict[str, Any]],
+        cached_hosts: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> List[Dict[str, Any]]:
+        hosts = []
         for resource in filtered_show_result:
             if "values" in resource:
-                address = resource['address']
-
-                for key in self.ip_param:
-                    if not key in resource["values"]:
+                host = None
+                digest = None
+                if cached_hosts is not None:
+                    digest = _resource_hash(resource)
+                    cached_host = cached_hosts.get(resource['address'])
+                    if cached_host is not None and cached_host['hash'] == digest:
+                        host = cached_host
+
+                if host is None:
+                    host = self._build_host(resource)
+                    if host is None:
                         continue
-                    inventory.add_host(address)
-                    inventory.set_variable(
-                        address, "ansible_host", resource['values'][key]
-                    )
-                    flattened_values = flatten_json(resource['values'])
-                    for key, val in flattened_values.items():
-                        if val is not None:
-                            inventory.set_variable(address, key, val)
-
-                    if "tags_all" in resource["values"]:
-                        for tag_key, tag_val in resource['values']['tags_all'].items():
-                            inventory.add_group(_clean(f"tag_{tag_key}_{tag_val}"))
-                            inventory.add_child(_clean(f"tag_{tag_key}_{tag_val}"), address)
-                    break
+                    host['hash'] = digest
+
+                self._add_host(inventory, host)
+                hosts.append(host)
+        return hosts
+
+    def _build_host(self, resource: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        for key in self.ip_param:
+            if not key in resource["values"]:
+                continue
+            variables = {"ansible_host": resource['values'][key]}
+            variables.update(self._get_hostvars(resource['values']))
+
+            groups = []
+            if "tags_all" in resource["values"]:
+                for tag_key, tag_val in resource['values']['tags_all'].items():
+                    groups.append(_clean(f"tag_{tag_key}_{tag_val}"))
+            return {'name': resource['address'], 'vars': variables, 'groups': groups}
+        return None
+
+    def _add_host(self, inventory: Any, host: Dict[str, Any]) -> None:
+        inventory.add_host(host['name'])
+        for key, val in host['vars'].items():
+            inventory.set_variable(host['name'], key, val)
+        for group in host['groups']:
+            inventory.add_group(group)
+            inventory.add_child(group, host['name'])
+
+    def _get_hostvars(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        values = project_values(values, self.hostvars_include, self.hostvars_exclude)
+        if self.hostvars_mode == "nested":
+            return {"terraform_values": values}
+
+        flattened_values = flatten_json(values, self.hostvars_max_depth)
+        return {key: val for key, val in flattened_values.items() if val is not None}
 
     def raise_for_status(self, cmd_result, cmd):
         if cmd_result[0] != 0:
@@ -422,7 +933,8 @@ terraform {{
     backend "{backend_type}" {{}}
 }}
 '''
-        with open(f"{backend_dir}/backend_{backend_type}.tf", "w", encoding="utf-8") as file:
+        # an override file replaces a backend the copied project configuration may declare
+        with open(f"{backend_dir}/backend_{backend_type}_override.tf", "w", encoding="utf-8") as file:
             file.write(backend_config)
 
     def _build_tf_command(self, cwd, item, cmd_type="init"):
@@ -432,9 +944,12 @@ terraform {{
         elif cmd_type == "show":
             cmd.extend(["show", "-json"])
             return cmd
+        elif cmd_type == "pull":
+            cmd.extend(["state", "pull"])
+            return cmd
         else:
             raise TerraformInventoryError(
-                f"Unexpected command type {cmd_type}, expected on 'init' or 'show'")
+                f"Unexpected command type {cmd_type}, expected on 'init', 'show' or 'pull'")
         if "remote_state" in item:
             self._build_backend(cwd, item['remote_state']['type'])
             for key,val in item['remote_state'].items():
@@ -443,9 +958,25 @@ terraform {{
 
         return cmd
 
-    def run_subprocess(self, cmd, cwd, check=False, raise_for_status=True):
+    def run_subprocess(self, cmd, cwd, check=False, raise_for_status=True, env_update=None):
         cmd_result = None
-        cmd_result = subprocess.run(cmd, capture_output=True, check=check, cwd=cwd)
+        env = None
+        if self.environ_update or env_update:
+            env = {**os.environ, **self.environ_update, **(env_update or {})}
+        name = "git clone" if cmd[0] == "git" else f"terraform {get_command_name(cmd)}"
+        timeout = self.timeouts.get(COMMAND_TIMEOUTS.get(name))
+        with self.tracer.span(name, cwd=cwd) as span:
+            if timeout:
+                try:
+                    rc, stdout, stderr = run_process(cmd, cwd=cwd, env=env, timeout=timeout)
+                except TerraformTimeoutError as e:
+                    raise TerraformInventoryError(f"Error running {cmd}: {e.message}")
+                cmd_result = subprocess.CompletedProcess(cmd, rc, stdout, stderr)
+                if check:
+                    cmd_result.check_returncode()
+            else:
+                cmd_result = subprocess.run(cmd, capture_output=True, check=check, cwd=cwd, env=env)
+            span.set_attribute("rc", cmd_result.returncode)
         if cmd_result.returncode != 0 and raise_for_status:
             raise TerraformInventoryError(
                 f"Error running {cmd}: {cmd_result.returncode}\n" +
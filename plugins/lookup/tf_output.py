@@ -37,6 +37,14 @@ options:
       - The terraform workspace to work with.
     type: str
     version_added: 1.2.0
+  transient_retries:
+    description:
+      - How many times to retry reading the outputs when it fails with a network error, or with API rate
+        limiting or server errors of the backend holding the state.
+      - Retries are spaced with an exponential backoff with random jitter.
+    type: int
+    default: 0
+    version_added: 3.0.0
 """
 
 # language=yaml
@@ -106,6 +114,7 @@ class LookupModule(LookupBase):  # type: ignore  # cannot subclass without avail
         state_file = self.get_option("state_file")
         bin_path = self.get_option("binary_path")
         workspace = self.get_option("workspace")
+        transient_retries = self.get_option("transient_retries")
 
         if bin_path is not None:
             terraform_binary = bin_path
@@ -122,6 +131,7 @@ class LookupModule(LookupBase):  # type: ignore  # cannot subclass without avail
                     state_file,
                     output_format="json",
                     workspace=workspace,
+                    retries=transient_retries,
                 )
             )
         else:
@@ -134,6 +144,7 @@ class LookupModule(LookupBase):  # type: ignore  # cannot subclass without avail
                     name=term,
                     output_format="json",
                     workspace=workspace,
+                    retries=transient_retries,
                 )
                 output.append(value)
         return output
@@ -0,0 +1,153 @@
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, cast
+
+from ansible_collections.cloud.terraform.plugins.module_utils.types import TJsonObject
+
+CACHE_DIR_NAME = "ansible-cloud-terraform"
+
+# the test files are validated as well since Terraform 1.6
+CONFIGURATION_SUFFIXES = (".tf", ".tf.json", ".tftest.hcl", ".tftest.json")
+# the directory of the root module test files are read from besides the root module itself
+TEST_DIRECTORY = "tests"
+
+
+def get_cache_dir(*parts: str) -> str:
+    """
+    Returns a per-user directory for data cached between module runs, creating it if needed.
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    path = os.path.join(base, CACHE_DIR_NAME, *parts)
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    return path
+
+
+def get_cache_key(*parts: str) -> str:
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+def get_project_cache_path(kind: str, project_path: str, workspace: str, state_file: Optional[str]) -> Optional[str]:
+    """
+    Returns the path of a cache entry about a project and workspace, or None when the cache directory is not usable.
+    """
+    key = json.dumps(
+        [
+            os.path.realpath(project_path),
+            workspace,
+            os.path.realpath(state_file) if state_file is not None else None,
+        ]
+    )
+    try:
+        cache_dir = get_cache_dir(kind)
+    except OSError:
+        return None
+    return os.path.join(cache_dir, get_cache_key(key) + ".json")
+
+
+def read_json_file(path: str) -> Optional[TJsonObject]:
+    # a missing or corrupted cache entry is the same as no entry
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict):
+        return None
+    return cast(TJsonObject, data)
+
+
+def write_json_file(path: str, data: TJsonObject) -> None:
+    # write to a temporary file first so concurrent readers never see a partial entry
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def get_binary_fingerprint(binary_path: str) -> Optional[TJsonObject]:
+    """
+    Identifies the exact executable behind binary_path, so cached results about it
+    are invalidated when the binary is replaced or updated in place.
+    """
+    resolved = shutil.which(binary_path)
+    if resolved is None:
+        return None
+    resolved = os.path.realpath(resolved)
+    try:
+        stat = os.stat(resolved)
+    except OSError:
+        return None
+    return {
+        "path": resolved,
+        "inode": stat.st_ino,
+        "device": stat.st_dev,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+
+
+def _get_module_dirs(project_path: str, data_dir: str) -> List[str]:
+    # the manifest written by init lists the directory of the root module and of every module it calls
+    manifest = read_json_file(os.path.join(project_path, data_dir, "modules", "modules.json"))
+    modules = manifest.get("Modules") if manifest is not None else None
+    if not isinstance(modules, list):
+        return ["."]
+    dirs = {"."}
+    for module in modules:
+        if isinstance(module, dict):
+            module_dir = module.get("Dir")
+            if isinstance(module_dir, str):
+                dirs.add(os.path.normpath(module_dir))
+    return sorted(dirs)
+
+
+def get_configuration_fingerprint(project_path: str) -> Optional[str]:
+    """
+    Hashes the contents of everything Terraform validates: the configuration and test files of the root
+    module and of the modules it calls, the test directory, the module manifest and the dependency lock file.
+    Returns None when any of them can not be read.
+    """
+    data_dir = os.environ.get("TF_DATA_DIR", ".terraform")
+    paths = [os.path.join(data_dir, "modules", "modules.json"), ".terraform.lock.hcl"]
+    try:
+        dirs = _get_module_dirs(project_path, data_dir)
+        if os.path.isdir(os.path.join(project_path, TEST_DIRECTORY)):
+            dirs.append(TEST_DIRECTORY)
+        for module_dir in dirs:
+            for name in sorted(os.listdir(os.path.join(project_path, module_dir))):
+                if name.endswith(CONFIGURATION_SUFFIXES):
+                    paths.append(os.path.join(module_dir, name))
+        digest = hashlib.sha256()
+        for path in paths:
+            digest.update(path.encode("utf-8") + b"\0")
+            full_path = os.path.join(project_path, path)
+            if not os.path.isfile(full_path):
+                digest.update(b"-\0")
+                continue
+            with open(full_path, "rb") as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+@contextmanager
+def file_lock(path: str) -> Iterator[None]:
+    """
+    Holds an exclusive lock on path, creating it if needed, to serialize work between processes.
+    """
+    with open(path, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
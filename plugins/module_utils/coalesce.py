@@ -0,0 +1,94 @@
+import json
+import os
+import time
+from contextlib import ExitStack
+from types import TracebackType
+from typing import Any, Dict, Optional, Type
+
+from ansible_collections.cloud.terraform.plugins.module_utils.cache import (
+    file_lock,
+    get_cache_dir,
+    get_cache_key,
+    read_json_file,
+    write_json_file,
+)
+from ansible_collections.cloud.terraform.plugins.module_utils.types import TJsonObject
+
+
+def get_coalesce_path(project_path: str, invocation: Dict[str, Any]) -> Optional[str]:
+    """
+    Returns the path of the result file shared by identical invocations on a project,
+    or None when the cache directory is not usable.
+    """
+    key = json.dumps([os.path.realpath(project_path), invocation], sort_keys=True, default=str)
+    try:
+        cache_dir = get_cache_dir("coalesce")
+    except OSError:
+        return None
+    return os.path.join(cache_dir, get_cache_key(key) + ".json")
+
+
+def get_coalesce_lock_path(project_path: str) -> Optional[str]:
+    """
+    Returns the path of the lock file taken by every coalesced invocation on a project,
+    or None when the cache directory is not usable.
+    """
+    try:
+        cache_dir = get_cache_dir("coalesce")
+    except OSError:
+        return None
+    return os.path.join(cache_dir, get_cache_key(os.path.realpath(project_path)) + ".lock")
+
+
+class RunCoalescer:
+    """
+    Lets one of several identical invocations run while the others wait for it, and hands its result to them.
+    Entering takes the lock of the project, so invocations on it run one at a time; a result recorded by another
+    identical invocation that finished after this one started, or less than window seconds before, is then
+    available as result. A result too old to be reused is removed.
+    A coalescer without a path or a lock path does nothing.
+    """
+
+    def __init__(self, path: Optional[str], lock_path: Optional[str], window: int = 0):
+        self.path = path
+        self.lock_path = lock_path
+        self.window = window
+        self.started = time.time()
+        self.result: Optional[TJsonObject] = None
+        self._stack = ExitStack()
+
+    def __enter__(self) -> "RunCoalescer":
+        if self.path is None or self.lock_path is None:
+            return self
+        self._stack.enter_context(file_lock(self.lock_path))
+        record = read_json_file(self.path)
+        if record is not None:
+            finished_at = record.get("finished_at")
+            if isinstance(finished_at, (int, float)) and finished_at >= self.started - self.window:
+                self.result = record
+            else:
+                try:
+                    os.remove(self.path)
+                except OSError:
+                    pass
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self._stack.close()
+
+    def record(self, result: Dict[str, Any], failed: bool = False) -> None:
+        """
+        Shares the result of this invocation with the ones waiting for it.
+        """
+        if self.path is None or self.lock_path is None:
+            return
+        try:
+            write_json_file(self.path, {"finished_at": time.time(), "failed": failed, "result": result})
+        except (OSError, TypeError, ValueError):
+            # a result that can not be shared only means the others run by themselves
+            pass
@@ -26,3 +26,10 @@ class TerraformError(TerraformCollectionException):
         module.fail_json(msg=self.message, **self.kwargs)
         # fail_json does not return, hinting to the type checker explicitly
         raise AssertionError("fail_json should have exited the process")
+
+
+class TerraformTimeoutError(TerraformError):
+    """An exception raised when a command did not finish in time and was stopped."""
+
+    def __init__(self, message: str, **kwargs: Any):
+        super().__init__(message, timed_out=True, **kwargs)
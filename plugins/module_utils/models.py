@@ -10,6 +10,22 @@ class TerraformWorkspaceContext:
     all: List[str]
 
 
+@dataclass
+class TerraformStateSerial:
+    # incremented on every write to the state
+    serial: int
+    # identifies the state, a new one is generated when the state is recreated
+    lineage: str
+
+    @classmethod
+    def from_json(cls, json: TJsonObject) -> Optional["TerraformStateSerial"]:
+        serial = json.get("serial")
+        lineage = json.get("lineage")
+        if not isinstance(serial, int) or not isinstance(lineage, str):
+            return None
+        return cls(serial=serial, lineage=lineage)
+
+
 @dataclass
 class TerraformOutput:
     sensitive: bool
@@ -0,0 +1,64 @@
+import re
+from typing import Optional
+
+from ansible_collections.cloud.terraform.plugins.module_utils.cache import get_project_cache_path
+from ansible_collections.cloud.terraform.plugins.module_utils.types import TJsonObject
+
+# Terraform's own default
+DEFAULT_PARALLELISM = 10
+# resources in the state per concurrent operation
+RESOURCES_PER_OPERATION = 20
+# concurrent operations per CPU, they mostly wait for API calls
+OPERATIONS_PER_CPU = 8
+MAX_PARALLELISM = 256
+
+# error messages of the common providers when an API rate limit is hit
+THROTTLING_RE = re.compile(
+    r"throttl|rate ?exceeded|rate limit|ratelimitexceeded|too ?many ?requests|requestlimitexceeded"
+    # a bare 429 may as well be part of an identifier, a port or a count
+    r"|(status|code|HTTP)[^\n]{0,20}\b429\b",
+    re.IGNORECASE,
+)
+
+
+def get_parallelism_record_path(project_path: str, workspace: str, state_file: Optional[str]) -> Optional[str]:
+    return get_project_cache_path("parallelism", project_path, workspace, state_file)
+
+
+def count_state_instances(state: Optional[TJsonObject]) -> int:
+    if state is None:
+        return 0
+    resources = state.get("resources")
+    if not isinstance(resources, list):
+        return 0
+    count = 0
+    for resource in resources:
+        if isinstance(resource, dict) and resource.get("mode") == "managed":
+            instances = resource.get("instances")
+            count += len(instances) if isinstance(instances, list) else 0
+    return count
+
+
+def is_throttled(text: str) -> bool:
+    return THROTTLING_RE.search(text) is not None
+
+
+def compute_auto_parallelism(resources: int, cpu_count: int, record: Optional[TJsonObject]) -> int:
+    """
+    Scales the default parallelism with the number of resources, bounded by the available CPUs.
+    When the previous run hit API rate limits, its parallelism is halved instead, and it then grows
+    back by doubling on every run without throttling.
+    """
+    target = max(DEFAULT_PARALLELISM, min(resources // RESOURCES_PER_OPERATION, cpu_count * OPERATIONS_PER_CPU))
+    target = min(target, MAX_PARALLELISM)
+
+    previous = record.get("parallelism") if record is not None else None
+    if record is None or not isinstance(previous, int) or previous < 1:
+        return target
+    if record.get("throttled"):
+        return max(1, previous // 2)
+    return min(target, previous * 2)
+
+
+def make_parallelism_record(parallelism: int, throttled: bool) -> TJsonObject:
+    return {"parallelism": parallelism, "throttled": throttled}
@@ -0,0 +1,157 @@
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from ansible.module_utils.compat.version import LooseVersion
+from ansible_collections.cloud.terraform.plugins.module_utils.cache import file_lock
+
+LOCK_FILE_NAME = ".ansible-cloud-terraform.lock"
+# the cache is shared between projects which do not know each other's pinned versions,
+# so versions any of them used within this many seconds are never evicted
+RECENTLY_USED_SECONDS = 24 * 60 * 60
+
+
+def get_plugin_cache_environment(plugin_cache_dir: Optional[str]) -> Dict[str, str]:
+    if plugin_cache_dir is None:
+        return {}
+    # a shared cache is only useful without network round trips on every invocation,
+    # so the update checkpoint is turned off together with it
+    return {
+        "TF_PLUGIN_CACHE_DIR": plugin_cache_dir,
+        "CHECKPOINT_DISABLE": "1",
+    }
+
+
+def _get_dir_size(path: str) -> int:
+    size = 0
+    for root, dirs, files in os.walk(path):
+        for f in files:
+            file_path = os.path.join(root, f)
+            if not os.path.islink(file_path):
+                size += os.path.getsize(file_path)
+    return size
+
+
+def _list_provider_versions(plugin_cache_dir: str) -> List[Tuple[str, str]]:
+    # the cache follows <hostname>/<namespace>/<type>/<version>/<os_arch>
+    versions = []
+    for hostname in os.listdir(plugin_cache_dir):
+        hostname_path = os.path.join(plugin_cache_dir, hostname)
+        if not os.path.isdir(hostname_path):
+            continue
+        for namespace in os.listdir(hostname_path):
+            namespace_path = os.path.join(hostname_path, namespace)
+            if not os.path.isdir(namespace_path):
+                continue
+            for provider_type in os.listdir(namespace_path):
+                type_path = os.path.join(namespace_path, provider_type)
+                if not os.path.isdir(type_path):
+                    continue
+                provider = "/".join([hostname, namespace, provider_type])
+                for version in os.listdir(type_path):
+                    if os.path.isdir(os.path.join(type_path, version)):
+                        versions.append((provider, version))
+    return versions
+
+
+def mark_provider_versions_used(plugin_cache_dir: str, versions: Set[Tuple[str, str]]) -> None:
+    # the access time cannot tell the last use: it depends on the mount options and
+    # measuring the cache reads every version, so the modification time is bumped instead
+    for provider, version in versions:
+        version_path = os.path.join(plugin_cache_dir, provider, version)
+        if os.path.isdir(version_path):
+            os.utime(version_path)
+
+
+def get_used_provider_versions(data_dir: str) -> Set[Tuple[str, str]]:
+    providers_dir = os.path.join(data_dir, "providers")
+    if not os.path.isdir(providers_dir):
+        return set()
+    return set(_list_provider_versions(providers_dir))
+
+
+def evict_plugin_cache(
+    plugin_cache_dir: str,
+    max_size: int,
+    keep: Optional[Set[Tuple[str, str]]] = None,
+    now: Optional[float] = None,
+) -> List[str]:
+    """
+    Removes old provider versions from the cache until it fits into max_size bytes.
+    The newest version of every provider, the versions in keep and the versions used
+    within RECENTLY_USED_SECONDS are never removed, so the cache can stay above max_size.
+    Returns the list of removed directories.
+    """
+    keep = keep or set()
+    now = time.time() if now is None else now
+    versions = _list_provider_versions(plugin_cache_dir)
+    sizes = {
+        (provider, version): _get_dir_size(os.path.join(plugin_cache_dir, provider, version))
+        for provider, version in versions
+    }
+    total_size = sum(sizes.values())
+    if total_size <= max_size:
+        return []
+
+    newest: Dict[str, str] = {}
+    for provider, version in versions:
+        if provider not in newest or LooseVersion(version) > LooseVersion(newest[provider]):
+            newest[provider] = version
+
+    last_use = {
+        (provider, version): os.path.getmtime(os.path.join(plugin_cache_dir, provider, version))
+        for provider, version in versions
+    }
+    protected = keep | {v for v in versions if now - last_use[v] <= RECENTLY_USED_SECONDS}
+    candidates = [
+        (provider, version)
+        for provider, version in versions
+        if newest[provider] != version and (provider, version) not in protected
+    ]
+    # least recently used versions are evicted first
+    candidates.sort(key=lambda c: last_use[c])
+
+    removed = []
+    for provider, version in candidates:
+        if total_size <= max_size:
+            break
+        version_path = os.path.join(plugin_cache_dir, provider, version)
+        shutil.rmtree(version_path, ignore_errors=True)
+        total_size -= sizes[(provider, version)]
+        removed.append(version_path)
+    return removed
+
+
+@contextmanager
+def plugin_cache_lock(plugin_cache_dir: str) -> Iterator[None]:
+    os.makedirs(plugin_cache_dir, exist_ok=True)
+    with file_lock(os.path.join(plugin_cache_dir, LOCK_FILE_NAME)):
+        yield
+
+
+@contextmanager
+def managed_plugin_cache(
+    plugin_cache_dir: Optional[str],
+    max_size_mb: Optional[int],
+    project_path: str,
+) -> Iterator[List[str]]:
+    """
+    Serializes access to a shared plugin cache while init runs in it and marks the
+    provider versions of project_path as used afterwards. When max_size_mb is set, the
+    cache is trimmed as well; the yielded list receives the directories that were evicted.
+    """
+    evicted: List[str] = []
+    if plugin_cache_dir is None:
+        yield evicted
+        return
+
+    with plugin_cache_lock(plugin_cache_dir):
+        yield evicted
+        data_dir = os.path.join(project_path, os.environ.get("TF_DATA_DIR", ".terraform"))
+        used = get_used_provider_versions(data_dir)
+        # other projects sharing the cache evict by last use, including their own runs in parallel
+        mark_provider_versions_used(plugin_cache_dir, used)
+        if max_size_mb is not None:
+            evicted.extend(evict_plugin_cache(plugin_cache_dir, max_size_mb * 1024 * 1024, keep=used))
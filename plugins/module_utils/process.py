@@ -0,0 +1,114 @@
+import os
+import signal
+import subprocess
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from ansible_collections.cloud.terraform.plugins.module_utils.errors import TerraformError, TerraformTimeoutError
+
+# seconds a timed out command gets to stop after being interrupted, before it is killed
+TERMINATION_GRACE_PERIOD = 30
+TERMINATION_POLL_INTERVAL = 0.1
+
+
+def _signal_process_group(pid: int, sig: int) -> None:
+    try:
+        os.killpg(pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _terminate_process_group(process: "subprocess.Popen[bytes]", grace_period: float) -> Tuple[bytes, bytes]:
+    # Terraform stops gracefully on an interrupt and still writes the state, while the
+    # provider plugins ignore it and are shut down by Terraform itself. Whatever is left of
+    # the group once Terraform is gone, or when it does not stop in time, is killed.
+    _signal_process_group(process.pid, signal.SIGINT)
+    deadline = time.monotonic() + grace_period
+    while True:
+        try:
+            return process.communicate(timeout=TERMINATION_POLL_INTERVAL)
+        except subprocess.TimeoutExpired:
+            # a child still holding the output open must not keep waiting for a command that is gone
+            if process.poll() is not None or time.monotonic() >= deadline:
+                break
+    _signal_process_group(process.pid, signal.SIGKILL)
+    return process.communicate()
+
+
+def run_process(
+    args: List[str],
+    cwd: Optional[str] = None,
+    env: Optional[Dict[str, str]] = None,
+    timeout: Optional[float] = None,
+    grace_period: float = TERMINATION_GRACE_PERIOD,
+) -> Tuple[int, bytes, bytes]:
+    """
+    Runs a command and returns its exit code and output.
+    With a timeout, the command runs in a process group of its own, so that when it does not finish
+    in time it is stopped together with every process it started, and a TerraformTimeoutError is raised.
+    """
+    process = subprocess.Popen(
+        args,
+        cwd=cwd,
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=timeout is not None,
+    )
+    try:
+        stdout, stderr = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        stdout, stderr = _terminate_process_group(process, grace_period)
+        raise TerraformTimeoutError(
+            "Command {0} timed out after {1} seconds".format(" ".join(args), timeout),
+            rc=process.returncode,
+            stdout=stdout.decode("utf-8", errors="replace"),
+            stderr=stderr.decode("utf-8", errors="replace"),
+            cmd=" ".join(args),
+            timeout=timeout,
+        )
+    except BaseException:
+        # the module is going away, do not leave the command running behind it
+        if timeout is not None:
+            _signal_process_group(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+        process.wait()
+        raise
+    return process.returncode, stdout, stderr
+
+
+class SubprocessRunCommand:
+    """
+    A run_command function that can be called from several threads at once, and that takes a timeout.
+    Every call starts its own process with an environment built for it, and a failure
+    with check_rc raises a TerraformError instead of exiting the module from a worker thread.
+    """
+
+    def __init__(self, environ_update: Optional[Dict[str, str]] = None):
+        self.environ_update = dict(environ_update or {})
+
+    def __call__(
+        self,
+        args: List[Optional[str]],
+        cwd: Optional[str] = None,
+        check_rc: bool = False,
+        timeout: Optional[float] = None,
+        **kwargs: Any,
+    ) -> Tuple[int, str, str]:
+        env = {**os.environ, **self.environ_update}
+        # the same arguments as run_command would pass: without the missing ones, with ~ and variables expanded
+        command = [os.path.expanduser(os.path.expandvars(arg)) for arg in args if arg is not None]
+        rc, stdout_bytes, stderr_bytes = run_process(command, cwd=cwd, env=env, timeout=timeout)
+        stdout = stdout_bytes.decode("utf-8", errors="replace")
+        stderr = stderr_bytes.decode("utf-8", errors="replace")
+        if check_rc and rc != 0:
+            raise TerraformError(
+                stderr.rstrip() or stdout.rstrip(),
+                rc=rc,
+                stdout=stdout,
+                stderr=stderr,
+                cmd=" ".join(command),
+            )
+        return rc, stdout, stderr
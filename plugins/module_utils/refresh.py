@@ -0,0 +1,34 @@
+from typing import Optional
+
+from ansible_collections.cloud.terraform.plugins.module_utils.cache import get_project_cache_path
+from ansible_collections.cloud.terraform.plugins.module_utils.models import TerraformStateSerial
+from ansible_collections.cloud.terraform.plugins.module_utils.types import TJsonObject
+
+
+def get_refresh_record_path(project_path: str, workspace: str, state_file: Optional[str]) -> Optional[str]:
+    """
+    Returns the path of the file recording the last full refresh of a project and workspace,
+    or None when the cache directory is not usable.
+    """
+    return get_project_cache_path("refresh", project_path, workspace, state_file)
+
+
+def is_refresh_fresh(
+    record: Optional[TJsonObject],
+    serial: Optional[TerraformStateSerial],
+    ttl: int,
+    now: float,
+) -> bool:
+    """
+    A refresh can be skipped while it is younger than ttl seconds and nothing wrote to the state since.
+    """
+    if record is None or serial is None:
+        return False
+    refreshed_at = record.get("refreshed_at")
+    if not isinstance(refreshed_at, (int, float)) or not 0 <= now - refreshed_at < ttl:
+        return False
+    return record.get("serial") == serial.serial and record.get("lineage") == serial.lineage
+
+
+def make_refresh_record(refreshed_at: float, serial: TerraformStateSerial) -> TJsonObject:
+    return {"refreshed_at": refreshed_at, "serial": serial.serial, "lineage": serial.lineage}
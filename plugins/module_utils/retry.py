@@ -0,0 +1,66 @@
+import random
+import re
+import time
+from typing import Callable, Iterator, Tuple
+
+# messages of Terraform when the state lock is held by another process
+LOCK_ERROR_RE = re.compile(
+    r"Error acquiring the state lock|Error locking state|state lock is already held", re.IGNORECASE
+)
+
+# messages of network errors, API rate limiting and server errors of the registries and backends,
+# which usually go away when the command is tried again; only concrete phrases are matched, as
+# configuration errors mention timeouts and numbers as well
+TRANSIENT_ERROR_RE = re.compile(
+    r"i/o timeout|TLS handshake timeout|Client\.Timeout exceeded|context deadline exceeded"
+    r"|connection reset by peer|connection refused|broken pipe|unexpected EOF"
+    r"|temporary failure in name resolution"
+    r"|SlowDown|Throttling|RequestLimitExceeded|Too Many Requests|Rate exceeded"
+    r"|Service Unavailable|Bad Gateway|Gateway Timeout|status code: 5\d\d|StatusCode=50[234]",
+    re.IGNORECASE,
+)
+
+# seconds
+BASE_DELAY = 2.0
+MAX_DELAY = 60.0
+
+
+def is_lock_error(text: str) -> bool:
+    return LOCK_ERROR_RE.search(text) is not None
+
+
+def is_transient_error(text: str) -> bool:
+    return TRANSIENT_ERROR_RE.search(text) is not None
+
+
+def backoff_delays(
+    retries: int,
+    base_delay: float = BASE_DELAY,
+    max_delay: float = MAX_DELAY,
+    rand: Callable[[], float] = random.random,
+) -> Iterator[float]:
+    """
+    Yields the delays to wait before each of the retries, growing exponentially up to max_delay.
+    Each delay is picked at random below its bound ("full jitter"), so that processes waiting
+    for the same lock do not all retry at the same time.
+    """
+    for attempt in range(retries):
+        yield rand() * min(max_delay, base_delay * 2**attempt)
+
+
+def run_with_retries(
+    run: Callable[[], Tuple[int, str, str]],
+    retries: int,
+    is_retryable: Callable[[str], bool],
+) -> Tuple[int, str, str]:
+    """
+    Calls run, a function running a command, again with backoff as long as it fails with a retryable stderr,
+    at most retries more times. Returns the result of the last call.
+    """
+    rc, stdout, stderr = run()
+    for delay in backoff_delays(retries):
+        if rc == 0 or not is_retryable(stderr):
+            break
+        time.sleep(delay)
+        rc, stdout, stderr = run()
+    return rc, stdout, stderr
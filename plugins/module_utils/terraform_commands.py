@@ -1,15 +1,34 @@
 import enum
 import json
-from typing import Dict, List, Optional, Tuple, cast
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, cast
 
 from ansible.module_utils.compat.version import LooseVersion
+from ansible_collections.cloud.terraform.plugins.module_utils.cache import (
+    get_binary_fingerprint,
+    get_cache_dir,
+    get_cache_key,
+    get_configuration_fingerprint,
+    read_json_file,
+    write_json_file,
+)
 from ansible_collections.cloud.terraform.plugins.module_utils.errors import TerraformError, TerraformWarning
 from ansible_collections.cloud.terraform.plugins.module_utils.models import (
     TerraformProviderSchemaCollection,
     TerraformShow,
+    TerraformStateSerial,
     TerraformWorkspaceContext,
 )
-from ansible_collections.cloud.terraform.plugins.module_utils.types import AnsibleRunCommandType
+from ansible_collections.cloud.terraform.plugins.module_utils.retry import (
+    is_lock_error,
+    is_transient_error,
+    run_with_retries,
+)
+from ansible_collections.cloud.terraform.plugins.module_utils.timing import get_command_name
+from ansible_collections.cloud.terraform.plugins.module_utils.tracing import Span, Tracer
+from ansible_collections.cloud.terraform.plugins.module_utils.types import AnsibleRunCommandType, TJsonObject
 
 
 class WorkspaceCommand(enum.Enum):
@@ -19,14 +38,85 @@ class WorkspaceCommand(enum.Enum):
 
 
 class TerraformCommands:
-    def __init__(self, run_command_fp: AnsibleRunCommandType, project_path: str, binary_path: str, check_mode: bool):
+    def __init__(
+        self,
+        run_command_fp: AnsibleRunCommandType,
+        project_path: str,
+        binary_path: str,
+        check_mode: bool,
+        tracer: Optional[Tracer] = None,
+        lock_retries: int = 0,
+        transient_retries: int = 0,
+        subprocess_run_command_fp: Optional[AnsibleRunCommandType] = None,
+        timeouts: Optional[Dict[str, int]] = None,
+    ):
         self.run_command_fp = run_command_fp
         self.project_path = project_path
         self.binary_path = binary_path
         self.check_mode = check_mode
+        self.tracer = tracer or Tracer(None)
+        self.lock_retries = lock_retries
+        self.transient_retries = transient_retries
+        # safe to call from several threads and accepting a timeout, used instead of run_command_fp
+        # by the commands started from run_concurrently and by the commands with a timeout
+        self.subprocess_run_command_fp = subprocess_run_command_fp
+        # seconds by command name, as returned by get_command_name
+        self.timeouts = timeouts or {}
+        self._local = threading.local()
 
     def _run(self, *args: str, check_rc: bool) -> Tuple[int, str, str]:
-        return self.run_command_fp([self.binary_path] + list(args), cwd=self.project_path, check_rc=check_rc)
+        command = [self.binary_path] + list(args)
+        command_name = get_command_name(command)
+        timeout = self.timeouts.get(command_name)
+        run_command_fp = self.run_command_fp
+        if self.subprocess_run_command_fp is not None and (
+            timeout is not None or getattr(self._local, "concurrent", False)
+        ):
+            run_command_fp = self.subprocess_run_command_fp
+        kwargs = {"timeout": timeout} if timeout is not None else {}
+        with self.tracer.span("terraform {0}".format(command_name), project=self.project_path) as span:
+            if timeout is not None:
+                span.set_attribute("timeout", timeout)
+            rc, stdout, stderr = run_command_fp(command, cwd=self.project_path, check_rc=check_rc, **kwargs)
+            span.set_attribute("rc", rc)
+        return rc, stdout, stderr
+
+    def _run_in_worker(self, parent: Optional[Span], call: Callable[[], Any]) -> Any:
+        self._local.concurrent = True
+        with self.tracer.activate(parent):
+            return call()
+
+    def run_concurrently(self, calls: Dict[str, Callable[[], Any]]) -> Dict[str, "Future[Any]"]:
+        """
+        Runs calls of independent read-only commands at the same time, each in its own thread,
+        and returns their completed futures by name. Without a subprocess_run_command_fp,
+        which has to be safe to call from several threads, they run one after another.
+        """
+        if self.subprocess_run_command_fp is None or len(calls) < 2:
+            futures: Dict[str, "Future[Any]"] = {}
+            for name, call in calls.items():
+                futures[name] = Future()
+                try:
+                    futures[name].set_result(call())
+                except Exception as e:
+                    futures[name].set_exception(e)
+            return futures
+
+        parent = self.tracer.current_span()
+        with ThreadPoolExecutor(max_workers=len(calls)) as pool:
+            return {name: pool.submit(self._run_in_worker, parent, call) for name, call in calls.items()}
+
+    def _run_locking(self, *args: str) -> Tuple[int, str, str]:
+        """
+        Runs a command that takes the state lock, retrying it with backoff while the lock is held elsewhere.
+        """
+        return run_with_retries(lambda: self._run(*args, check_rc=False), self.lock_retries, is_lock_error)
+
+    def _run_transient(self, *args: str) -> Tuple[int, str, str]:
+        """
+        Runs a command that only reads, retrying it with backoff while it fails with network or throttling errors.
+        """
+        return run_with_retries(lambda: self._run(*args, check_rc=False), self.transient_retries, is_transient_error)
 
     def apply_plan(
         self,
@@ -63,7 +153,7 @@ class TerraformCommands:
             stdout = "No stdout when an application is necessary in check mode."
             stderr = "No stderr when an application is necessary in check mode."
         else:
-            rc, stdout, stderr = self._run(*command, check_rc=False)
+            rc, stdout, stderr = self._run_locking(*command)
             if rc != 0:
                 raise TerraformError(
                     stderr.rstrip(),
@@ -96,7 +186,19 @@ class TerraformCommands:
             command.extend(["-upgrade"])
         for plugin_path in plugin_paths:
             command.extend(["-plugin-dir", plugin_path])
-        self._run(*command, check_rc=True)
+        # downloading modules and providers and configuring the backend are retried on network errors,
+        # init only installs what is missing, so running it again is safe
+        rc, stdout, stderr = self._run_transient(*command)
+        if rc != 0:
+            raise TerraformError(
+                stderr.rstrip(),
+                rc=rc,
+                stdout=stdout,
+                stdout_lines=stdout.splitlines(),
+                stderr=stderr,
+                stderr_lines=stderr.splitlines(),
+                cmd=" ".join(command),
+            )
 
     def plan(
         self,
@@ -105,10 +207,15 @@ class TerraformCommands:
         destroy: bool,
         state_args: List[str],
         variables_args: List[str],
+        refresh: bool = True,
+        refresh_only: bool = False,
+        parallelism: Optional[int] = None,
+        lock: bool = True,
+        lock_timeout: Optional[int] = None,
     ) -> Tuple[bool, bool, str, str]:
         command = [
             "plan",
-            "-lock=true",
+            "-lock={0}".format("true" if lock else "false"),
             "-input=false",
             "-no-color",
             "-detailed-exitcode",
@@ -119,10 +226,18 @@ class TerraformCommands:
             command.extend(["-target", t])
         if destroy:
             command.append("-destroy")
+        if refresh_only:
+            command.append("-refresh-only")
+        elif not refresh:
+            command.append("-refresh=false")
+        if parallelism is not None:
+            command.append("-parallelism={0}".format(parallelism))
+        if lock_timeout is not None:
+            command.append("-lock-timeout={0}s".format(lock_timeout))
         command.extend(state_args)
         command.extend(variables_args)
 
-        rc, stdout, stderr = self._run(*command, check_rc=False)
+        rc, stdout, stderr = self._run_locking(*command)
 
         if rc == 0:
             # no changes
@@ -157,6 +272,46 @@ class TerraformCommands:
 
         return changed, any_destroyed, stdout, stderr
 
+    def refresh(
+        self,
+        targets: List[str],
+        state_args: List[str],
+        variables_args: List[str],
+        parallelism: Optional[int] = None,
+        lock: bool = True,
+        lock_timeout: Optional[int] = None,
+    ) -> Tuple[str, str]:
+        """
+        Updates the state of the targets to match the remote objects, without changing any of them.
+        """
+        command = [
+            "apply",
+            "-refresh-only",
+            "-auto-approve",
+            "-lock={0}".format("true" if lock else "false"),
+            "-input=false",
+            "-no-color",
+        ]
+        if parallelism is not None:
+            command.append("-parallelism={0}".format(parallelism))
+        if lock_timeout is not None:
+            command.append("-lock-timeout={0}s".format(lock_timeout))
+        for t in targets:
+            command.extend(["-target", t])
+        command.extend(state_args)
+        command.extend(variables_args)
+
+        rc, stdout, stderr = self._run_locking(*command)
+        if rc != 0:
+            raise TerraformError(
+                "Terraform refresh failed\nSTDOUT: {out}\nSTDERR: {err}\nCOMMAND: {cmd}".format(
+                    out=stdout,
+                    err=stderr,
+                    cmd=" ".join(command),
+                )
+            )
+        return stdout, stderr
+
     # requires init to function
     def providers_schema(self) -> TerraformProviderSchemaCollection:
         # in the command we have "providers schema", in the schema we have "provider_schemas"
@@ -174,7 +329,7 @@ class TerraformCommands:
 
     def show(self, state_or_plan_file_path: str) -> Optional[TerraformShow]:
         command = ["show", "-json", state_or_plan_file_path]
-        rc, stdout, stderr = self._run(*command, check_rc=False)
+        rc, stdout, stderr = self._run_transient(*command)
         if rc == 1:
             raise TerraformWarning(
                 "Could not get Terraform show from file: {0}. "
@@ -213,15 +368,99 @@ class TerraformCommands:
 
         return TerraformShow.from_json(result)
 
+    def state_pull(self, state_file: Optional[str]) -> Optional[TJsonObject]:
+        """
+        Returns the raw state of the current workspace, or None when there is no state yet.
+        """
+        if state_file is not None:
+            try:
+                with open(state_file, "r") as f:
+                    state_json = json.load(f)
+            except (OSError, ValueError):
+                return None
+        else:
+            rc, stdout, stderr = self._run("state", "pull", check_rc=False)
+            # state pull prints nothing when there is no state yet
+            if rc != 0 or not stdout.strip():
+                return None
+            try:
+                state_json = json.loads(stdout)
+            except ValueError:
+                return None
+        if not isinstance(state_json, dict):
+            return None
+        return cast(TJsonObject, state_json)
+
+    def state_serial(self, state_file: Optional[str]) -> Optional[TerraformStateSerial]:
+        """
+        Returns the serial and lineage of the state of the current workspace, or None when there is no state yet.
+        """
+        state_json = self.state_pull(state_file)
+        if state_json is None:
+            return None
+        return TerraformStateSerial.from_json(state_json)
+
+    def _validate_cache_path(self) -> Optional[str]:
+        binary_fingerprint = get_binary_fingerprint(self.binary_path)
+        configuration_fingerprint = get_configuration_fingerprint(self.project_path)
+        if binary_fingerprint is None or configuration_fingerprint is None:
+            return None
+        try:
+            cache_dir = get_cache_dir("validate")
+        except OSError:
+            return None
+        key = get_cache_key(json.dumps(binary_fingerprint, sort_keys=True), configuration_fingerprint)
+        return os.path.join(cache_dir, key + ".json")
+
     def validate(self, version: LooseVersion, variables_args: List[str]) -> None:
         command = ["validate"]
         if version < LooseVersion("0.15.0"):
+            # older versions validate the variables too, so their result can not be cached by configuration
             command += variables_args
+            self._run(*command, check_rc=True)
+            return
+
+        # only passing results are cached, keyed by the binary and the contents of the configuration,
+        # so any change to a configuration file, module or provider selection always validates again
+        cache_path = self._validate_cache_path()
+        if cache_path is not None and read_json_file(cache_path) is not None:
+            return
+
         self._run(*command, check_rc=True)
 
+        if cache_path is not None:
+            try:
+                write_json_file(cache_path, {"valid": True})
+            except OSError:
+                pass
+
+    def _version_cache_path(self) -> Optional[str]:
+        fingerprint = get_binary_fingerprint(self.binary_path)
+        if fingerprint is None:
+            return None
+        try:
+            cache_dir = get_cache_dir("versions")
+        except OSError:
+            return None
+        return os.path.join(cache_dir, get_cache_key(json.dumps(fingerprint, sort_keys=True)) + ".json")
+
     def version(self) -> LooseVersion:
+        # the cache entry is keyed by the resolved path, inode and mtime of the binary,
+        # so replacing or upgrading it always results in a fresh "terraform version"
+        cache_path = self._version_cache_path()
+        if cache_path is not None:
+            cached = read_json_file(cache_path)
+            if cached is not None and isinstance(cached.get("terraform_version"), str):
+                return LooseVersion(cached["terraform_version"])
+
         rc, extract_version, stderr = self._run("version", "-json", check_rc=True)
         terraform_version = cast(str, (json.loads(extract_version))["terraform_version"])
+
+        if cache_path is not None:
+            try:
+                write_json_file(cache_path, {"terraform_version": terraform_version})
+            except OSError:
+                pass
         return LooseVersion(terraform_version)
 
     def workspace(self, command: WorkspaceCommand, workspace: str) -> None:
@@ -0,0 +1,87 @@
+import dataclasses
+import time
+from dataclasses import dataclass
+from typing import Any, List, Sequence, Tuple
+
+from ansible_collections.cloud.terraform.plugins.module_utils.errors import TerraformError
+from ansible_collections.cloud.terraform.plugins.module_utils.types import AnsibleRunCommandType, TJsonObject
+
+# subcommands that are only meaningful together with their first argument
+COMPOUND_COMMANDS = ("providers", "state", "workspace")
+
+
+@dataclass
+class TerraformCommandTiming:
+    command: str
+    # wall clock timestamp, in seconds since the epoch
+    start: float
+    duration: float
+    rc: int
+    stdout_bytes: int
+    stderr_bytes: int
+
+
+def get_command_name(args: Sequence[str]) -> str:
+    words = [arg for arg in args[1:3] if not arg.startswith("-")]
+    if not words:
+        return ""
+    if words[0] in COMPOUND_COMMANDS:
+        return " ".join(words)
+    return words[0]
+
+
+class TimedRunCommand:
+    """
+    Wraps a run_command function and records how long each Terraform command took
+    and how much output it produced.
+    """
+
+    def __init__(self, run_command_fp: AnsibleRunCommandType):
+        self.run_command_fp = run_command_fp
+        self.timings: List[TerraformCommandTiming] = []
+
+    def __call__(self, args: List[str], **kwargs: Any) -> Tuple[int, str, str]:
+        start = time.time()
+        started = time.monotonic()
+        rc, stdout, stderr = -1, "", ""
+        try:
+            rc, stdout, stderr = self.run_command_fp(args, **kwargs)
+        except TerraformError as e:
+            # the command that failed or hung is the one most worth knowing about
+            rc = e.kwargs.get("rc") or -1
+            stdout = e.kwargs.get("stdout") or ""
+            stderr = e.kwargs.get("stderr") or ""
+            raise
+        finally:
+            self.record(
+                args, start, time.monotonic() - started, rc, len(stdout.encode("utf-8")), len(stderr.encode("utf-8"))
+            )
+        return rc, stdout, stderr
+
+    def sharing(self, run_command_fp: AnsibleRunCommandType) -> "TimedRunCommand":
+        """
+        Wraps another run_command function, recording its commands together with the ones of this one.
+        """
+        timed = TimedRunCommand(run_command_fp)
+        timed.timings = self.timings
+        return timed
+
+    def record(
+        self, args: List[str], start: float, duration: float, rc: int, stdout_bytes: int, stderr_bytes: int
+    ) -> None:
+        """
+        Records a command that was not run through run_command_fp, for example one streaming its output to a file.
+        """
+        self.timings.append(
+            TerraformCommandTiming(
+                command=get_command_name(args),
+                start=start,
+                duration=duration,
+                rc=rc,
+                stdout_bytes=stdout_bytes,
+                stderr_bytes=stderr_bytes,
+            )
+        )
+
+    def to_list(self) -> List[TJsonObject]:
+        return [dataclasses.asdict(timing) for timing in self.timings]
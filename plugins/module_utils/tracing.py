@@ -0,0 +1,150 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Union
+
+from ansible_collections.cloud.terraform.plugins.module_utils.types import TJsonList, TJsonObject
+
+TSpanAttributeValue = Union[str, int, float, bool]
+
+INSTRUMENTATION_SCOPE = "cloud.terraform"
+
+# OpenTelemetry status codes
+STATUS_CODE_OK = 1
+STATUS_CODE_ERROR = 2
+
+
+def _format_attribute_value(value: TSpanAttributeValue) -> TJsonObject:
+    # bool has to be checked before int, since it is a subclass of it
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    elif isinstance(value, int):
+        # OTLP/JSON encodes 64 bit integers as strings
+        return {"intValue": str(value)}
+    elif isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _format_attributes(attributes: Dict[str, TSpanAttributeValue]) -> TJsonList:
+    return [{"key": key, "value": _format_attribute_value(value)} for key, value in attributes.items()]
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_span_id: Optional[str]
+    start_time_ns: int
+    end_time_ns: Optional[int] = None
+    attributes: Dict[str, TSpanAttributeValue] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: TSpanAttributeValue) -> None:
+        self.attributes[key] = value
+
+    def to_json(self) -> TJsonObject:
+        status: TJsonObject = {"code": STATUS_CODE_OK}
+        if self.error is not None:
+            status = {"code": STATUS_CODE_ERROR, "message": self.error}
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_span_id or "",
+            "name": self.name,
+            # SPAN_KIND_INTERNAL
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_time_ns),
+            "endTimeUnixNano": str(self.end_time_ns),
+            "attributes": _format_attributes(self.attributes),
+            "status": status,
+        }
+
+
+class Tracer:
+    """
+    Records nested spans and appends each finished span to trace_file as a line of
+    OTLP/JSON (one ExportTraceServiceRequest per line), the format read by the
+    OpenTelemetry collector's file receiver.
+    A tracer without a trace_file is disabled and only does the bookkeeping
+    needed by callers to set attributes.
+    """
+
+    def __init__(self, trace_file: Optional[str], service_name: str = INSTRUMENTATION_SCOPE):
+        self.trace_file = trace_file
+        self.service_name = service_name
+        self.trace_id = os.urandom(16).hex()
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.trace_file is not None
+
+    def _stack(self) -> List[Span]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        stack: List[Span] = self._local.stack
+        return stack
+
+    def current_span(self) -> Optional[Span]:
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    @contextmanager
+    def activate(self, span: Optional[Span]) -> Iterator[None]:
+        """
+        Makes span the parent of the spans started in this thread, for work handed over to other threads.
+        """
+        if span is None:
+            yield
+            return
+        stack = self._stack()
+        stack.append(span)
+        try:
+            yield
+        finally:
+            stack.pop()
+
+    @contextmanager
+    def span(self, name: str, **attributes: TSpanAttributeValue) -> Iterator[Span]:
+        parent = self.current_span()
+        span = Span(
+            name=name,
+            trace_id=self.trace_id,
+            span_id=os.urandom(8).hex(),
+            parent_span_id=parent.span_id if parent is not None else None,
+            start_time_ns=time.time_ns(),
+            attributes=dict(attributes),
+        )
+        stack = self._stack()
+        stack.append(span)
+        try:
+            yield span
+        except Exception as e:
+            span.error = getattr(e, "message", None) or str(e) or type(e).__name__
+            raise
+        finally:
+            stack.pop()
+            span.end_time_ns = time.time_ns()
+            self._export(span)
+
+    def _export(self, span: Span) -> None:
+        if self.trace_file is None:
+            return
+        request = {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": _format_attributes({"service.name": self.service_name})},
+                    "scopeSpans": [{"scope": {"name": INSTRUMENTATION_SCOPE}, "spans": [span.to_json()]}],
+                }
+            ]
+        }
+        line = json.dumps(request) + "\n"
+        with self._write_lock:
+            with open(self.trace_file, "a") as f:
+                f.write(line)
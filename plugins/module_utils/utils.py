@@ -1,11 +1,17 @@
+import hashlib
 import json
 import os
 import shutil
-from typing import List, Optional, Union, cast
+import subprocess
+import tempfile
+import time
+from typing import BinaryIO, List, Optional, Tuple, Union, cast
 
 from ansible.module_utils.compat.version import LooseVersion
 from ansible_collections.cloud.terraform.plugins.module_utils.errors import TerraformError, TerraformWarning
+from ansible_collections.cloud.terraform.plugins.module_utils.retry import is_transient_error, run_with_retries
 from ansible_collections.cloud.terraform.plugins.module_utils.terraform_commands import TerraformCommands
+from ansible_collections.cloud.terraform.plugins.module_utils.timing import TimedRunCommand
 from ansible_collections.cloud.terraform.plugins.module_utils.types import (
     AnsibleRunCommandType,
     TJsonBareValue,
@@ -21,22 +27,20 @@ def get_state_args(state_file: Optional[str]) -> List[str]:
     return []
 
 
-def get_outputs(
-    run_command_fp: AnsibleRunCommandType,
+OUTPUT_CHUNK_SIZE = 64 * 1024
+
+
+def get_outputs_command(
     terraform_binary: str,
-    project_path: Optional[str],
     state_file: Optional[str],
     output_format: str,
     name: Optional[str] = None,
-    workspace: Optional[str] = None,
-) -> Union[TJsonObject, TJsonBareValue]:
+) -> List[str]:
     outputs_command = [terraform_binary, "output", "-no-color", "-{0}".format(output_format)]
-    outputs_command += get_state_args(state_file) + ([name] if name else [])
-    if workspace:
-        tf_env = {"TF_WORKSPACE": workspace}
-        rc, outputs_text, outputs_err = run_command_fp(outputs_command, cwd=project_path, environ_update=tf_env)
-    else:
-        rc, outputs_text, outputs_err = run_command_fp(outputs_command, cwd=project_path)
+    return outputs_command + get_state_args(state_file) + ([name] if name else [])
+
+
+def raise_for_outputs_rc(rc: int, outputs_command: List[str], outputs_text: str, outputs_err: str) -> None:
     if rc == 1:
         message = (
             "Could not get Terraform outputs. "
@@ -50,12 +54,101 @@ def get_outputs(
             rc, outputs_text, outputs_err
         )
         raise TerraformError(message, command=" ".join(outputs_command))
+
+
+def get_outputs(
+    run_command_fp: AnsibleRunCommandType,
+    terraform_binary: str,
+    project_path: Optional[str],
+    state_file: Optional[str],
+    output_format: str,
+    name: Optional[str] = None,
+    workspace: Optional[str] = None,
+    retries: int = 0,
+) -> Union[TJsonObject, TJsonBareValue]:
+    """
+    Reads the outputs, retrying up to retries times with backoff when reading the state fails with
+    network or throttling errors.
+    """
+    outputs_command = get_outputs_command(terraform_binary, state_file, output_format, name)
+    if workspace:
+        tf_env = {"TF_WORKSPACE": workspace}
+        rc, outputs_text, outputs_err = run_with_retries(
+            lambda: run_command_fp(outputs_command, cwd=project_path, environ_update=tf_env),
+            retries,
+            is_transient_error,
+        )
     else:
-        if output_format == "raw":
-            return cast(TJsonObject, outputs_text)
-        else:
-            outputs = cast(TJsonObject, json.loads(outputs_text))
-            return outputs
+        rc, outputs_text, outputs_err = run_with_retries(
+            lambda: run_command_fp(outputs_command, cwd=project_path), retries, is_transient_error
+        )
+    raise_for_outputs_rc(rc, outputs_command, outputs_text, outputs_err)
+    if output_format == "raw":
+        return cast(TJsonObject, outputs_text)
+    else:
+        outputs = cast(TJsonObject, json.loads(outputs_text))
+        return outputs
+
+
+def write_outputs(
+    run_command_fp: TimedRunCommand,
+    dest: BinaryIO,
+    terraform_binary: str,
+    project_path: Optional[str],
+    state_file: Optional[str],
+    output_format: str,
+    name: Optional[str] = None,
+    workspace: Optional[str] = None,
+    retries: int = 0,
+) -> Tuple[int, str]:
+    """
+    Streams the outputs into dest in chunks instead of reading them into memory.
+    Returns the number of bytes written and their SHA-1 checksum.
+    A retry after a network or throttling error starts over from the beginning of dest.
+    """
+    outputs_command = get_outputs_command(terraform_binary, state_file, output_format, name)
+    env = dict(os.environ)
+    if workspace:
+        env["TF_WORKSPACE"] = workspace
+
+    checksum = hashlib.sha1()
+    size = 0
+
+    def stream() -> Tuple[int, str, str]:
+        nonlocal checksum, size
+        if size:
+            dest.seek(0)
+            dest.truncate()
+        checksum = hashlib.sha1()
+        size = 0
+        start = time.time()
+        started = time.monotonic()
+        # stderr goes to a file, so a chatty stderr can not block the process while stdout is read
+        with tempfile.TemporaryFile() as stderr_file:
+            process = subprocess.Popen(
+                outputs_command, cwd=project_path, env=env, stdout=subprocess.PIPE, stderr=stderr_file
+            )
+            stdout = cast(BinaryIO, process.stdout)
+            with stdout:
+                while True:
+                    chunk = stdout.read(OUTPUT_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    dest.write(chunk)
+                    checksum.update(chunk)
+                    size += len(chunk)
+            rc = process.wait()
+            stderr_file.seek(0)
+            outputs_err = stderr_file.read().decode("utf-8", errors="replace")
+
+        run_command_fp.record(
+            outputs_command, start, time.monotonic() - started, rc, size, len(outputs_err.encode("utf-8"))
+        )
+        return rc, "", outputs_err
+
+    rc, _, outputs_err = run_with_retries(stream, retries, is_transient_error)
+    raise_for_outputs_rc(rc, outputs_command, "", outputs_err)
+    return size, checksum.hexdigest()
 
 
 def validate_project_path(project_path: str) -> None:
@@ -70,6 +163,17 @@ def validate_project_path(project_path: str) -> None:
         )
 
 
+def resolve_config_path(path: Optional[str], config_file: str) -> Optional[str]:
+    """
+    Expands the user directory in a path read from a plugin configuration file,
+    and makes relative paths relative to the directory of the configuration file.
+    """
+    if not path:
+        return path
+    path = os.path.expanduser(path)
+    return os.path.join(os.path.dirname(os.path.abspath(config_file)), path)
+
+
 def validate_bin_path(bin_path: str) -> None:
     if not shutil.which(bin_path):
         raise TerraformError(
@@ -47,6 +47,31 @@ options:
     type: list
     elements: path
     version_added: 1.0.0
+  plugin_cache_dir:
+    description:
+      - Path to a directory shared between runs to cache downloaded provider plugins in.
+      - Set as C(TF_PLUGIN_CACHE_DIR) for all Terraform commands, so C(terraform init) links
+        providers from the cache instead of downloading them again.
+      - A relative path is relative to I(project_path).
+      - The cache can be shared between projects. Concurrent inits using the same cache are serialized
+        with a lock file in the cache directory.
+      - When set, C(CHECKPOINT_DISABLE) is set as well, which turns off the upgrade and security
+        bulletin checks Terraform makes on every invocation.
+    type: path
+    version_added: 3.0.0
+  plugin_cache_max_size:
+    description:
+      - Maximum size of I(plugin_cache_dir) in megabytes.
+      - When the cache grows past this size after init, older provider versions are removed until it fits.
+        The newest version of each provider, the versions used by I(project_path) and the versions any
+        project initialized with this cache used within the last day are always kept, so the cache can stay
+        above this size.
+      - The cache is shared with every other project and run pointing at the same I(plugin_cache_dir),
+        so a project which was not initialized for longer than a day can need I(force_init) to install
+        its evicted provider versions again.
+      - Ignored when I(plugin_cache_dir) is not set.
+    type: int
+    version_added: 3.0.0
   workspace:
     description:
       - The terraform workspace to work with.
@@ -108,6 +133,18 @@ options:
     type: bool
     default: false
     version_added: 1.0.0
+  variables_mode:
+    description:
+      - How I(variables) are passed to C(terraform).
+      - With C(args), every variable is passed as a separate C(-var) argument.
+      - With C(file), all variables are written once as JSON into a temporary C(.tfvars.json) file which is
+        passed with C(-var-file) before any of the I(variables_files), and removed when the module exits.
+        This keeps the command line short for large lists and maps, and the values keep their types,
+        so I(complex_vars) is ignored.
+    type: str
+    choices: [ args, file ]
+    default: args
+    version_added: 3.0.0
   targets:
     description:
       - A list of specific resources to target in this plan/application. The
@@ -123,12 +160,32 @@ options:
     type: bool
     default: true
     version_added: 1.0.0
+  transient_retries:
+    description:
+      - How many times to retry C(terraform init), C(terraform show) and C(terraform output) when they fail with
+        a network error, like a timeout of the provider or module registry, or with API rate limiting or server
+        errors of the backend holding the state, like C(SlowDown) from S3.
+      - Retries are spaced with an exponential backoff with random jitter, starting from up to 2 seconds and
+        growing up to 60 seconds. Other errors fail the task right away.
+    type: int
+    default: 0
+    version_added: 3.0.0
   lock_timeout:
     description:
-      - How long to maintain the lock on the statefile, if you use a service
+      - How long, in seconds, Terraform waits to acquire the lock on the statefile, if you use a service
         that accepts locks (such as S3+DynamoDB).
+      - Applies to the plan as well as to the apply since version 3.0.0.
     type: int
     version_added: 1.0.0
+  lock_retries:
+    description:
+      - How many times to retry the plan or the apply when the lock on the statefile is held by someone else,
+        once waiting for I(lock_timeout) did not suffice.
+      - Retries are spaced with an exponential backoff with random jitter, starting from up to 2 seconds and
+        growing up to 60 seconds, so that runs contending for the same state do not retry in lockstep.
+    type: int
+    default: 0
+    version_added: 3.0.0
   force_init:
     description:
       - To avoid duplicating infra, if a state file can't be found this will
@@ -176,9 +233,120 @@ options:
     version_added: 1.0.0
   parallelism:
     description:
-      - Restrict concurrent operations when Terraform applies the plan.
-    type: int
+      - Restrict concurrent operations when Terraform plans, refreshes and applies.
+      - Either a number of operations, or C(auto) to choose one from the number of resource instances in the state
+        and the number of CPUs, starting at the Terraform default of 10.
+        With C(auto), the value is halved when the previous run of the same project and workspace failed with
+        API rate limiting errors, and grows back on later runs without them. The previous value is kept in the
+        user's cache directory on the target, C($XDG_CACHE_HOME) or C(~/.cache).
+      - The value is an integer or C(auto) since version 3.0.0.
+    type: raw
     version_added: 1.0.0
+  refresh:
+    description:
+      - How the state is refreshed from the remote objects when planning.
+      - With C(full), every resource is refreshed before computing the changes.
+      - With C(none), the plan is computed against the stored state with C(-refresh=false),
+        which is much faster when only the configuration changed, but does not detect changes made outside of Terraform.
+      - With C(only), a refresh-only plan is made and applied, which updates the state to match the remote objects
+        without changing any of them. The module reports a change when the state was updated.
+        Requires Terraform 0.15.4 or newer and can not be used with I(state=absent).
+      - Ignored when an existing I(plan_file) is applied.
+    type: str
+    choices: [ full, none, only ]
+    default: full
+    version_added: 3.0.0
+  coalesce:
+    description:
+      - Whether identical concurrent invocations of the module on the same I(project_path) run Terraform only once.
+      - Coalesced invocations on a project run one at a time. The first one runs, the others wait for it and the
+        ones identical to it return its result, with RV(coalesced) set, instead of running Terraform again.
+        This is useful when a play runs the task for many hosts with C(delegate_to=localhost).
+      - Invocations are identical when all their parameters, check mode and diff mode are the same.
+      - The result is shared through a file in the user's cache directory on the target, C($XDG_CACHE_HOME) or
+        C(~/.cache), readable only by that user. The I(outputs) are not part of it, an invocation reusing the
+        result reads them with C(terraform output). A result too old to be reused is removed by the next
+        coalesced invocation on the project.
+    type: bool
+    default: false
+    version_added: 3.0.0
+  coalesce_window:
+    description:
+      - With I(coalesce), also reuse the result of an identical invocation which finished at most this many
+        seconds before this one started, for example for the next batch of forks of the same task.
+      - By default only invocations which were waiting while the result was produced reuse it.
+    type: int
+    default: 0
+    version_added: 3.0.0
+  timeouts:
+    description:
+      - How long, in seconds, each kind of Terraform command may run before it is stopped.
+        By default, commands are not limited.
+      - A command which does not finish in time is interrupted together with the provider plugins it started,
+        and killed if it does not stop within 30 seconds. The module then fails with C(timed_out) set, so that
+        the task can be retried, for example with C(until).
+      - An interrupted apply still writes the changes made so far to the state, but leaves the other changes
+        of the plan unapplied.
+    type: dict
+    suboptions:
+      init:
+        description: Timeout of C(terraform init).
+        type: int
+      plan:
+        description: Timeout of C(terraform plan).
+        type: int
+      apply:
+        description: Timeout of C(terraform apply), including the refresh of I(refresh_targets).
+        type: int
+      show:
+        description: Timeout of C(terraform show), which reads the state and the plan.
+        type: int
+    version_added: 3.0.0
+  refresh_ttl:
+    description:
+      - Skip the refresh of a plan with I(refresh=full) for this many seconds after the last apply which stored a
+        refreshed state of the same project, workspace and I(state_file), as long as the serial of the state did
+        not change since. Check mode runs and plans without changes do not store the refresh, so they do not count.
+      - The time and state serial of the last refresh are kept in the user's cache directory on the target,
+        C($XDG_CACHE_HOME) or C(~/.cache). The serial is read with C(terraform state pull) before planning.
+      - Changes made outside of Terraform during that time are not detected, only use it for runs
+        following each other closely.
+      - Not used together with I(refresh_targets).
+    type: int
+    version_added: 3.0.0
+  refresh_targets:
+    description:
+      - Refresh only these resources, instead of every resource in the state, before planning with I(refresh=full).
+      - They are refreshed with a refresh-only apply restricted to them, and the plan is then computed
+        with C(-refresh=false). Unlike I(targets), the plan still covers the whole configuration.
+      - In check mode the state can not be updated, so every resource is refreshed by the plan as usual.
+      - The module reports a change when the refresh updated the state, even if the plan has no changes.
+      - Requires Terraform 0.15.4 or newer.
+    type: list
+    elements: str
+    version_added: 3.0.0
+  trace_file:
+    description:
+      - Path to a local file to append trace spans of the module run to.
+      - Every Terraform command, state sanitization and the diff construction is recorded as a span
+        nested under a span for the whole run, with the project path and workspace as attributes.
+      - Spans are written as JSON lines in the OpenTelemetry protocol (OTLP/JSON) format,
+        one C(ExportTraceServiceRequest) per line, as read by the OpenTelemetry collector file receiver.
+      - Tracing is disabled when not set.
+    type: path
+    version_added: 3.0.0
+  result_profile:
+    description:
+      - Which fields the module captures and returns.
+      - C(full) returns the whole C(stdout) and C(stderr), the I(outputs) and a diff of the whole state.
+      - C(summary) returns only the last lines of C(stdout) and C(stderr), which hold the summary of the
+        plan or apply, and the I(outputs). The diff is only built when running with C(--diff).
+      - C(minimal) returns neither the command output, nor the outputs, nor the diff. The state is not read
+        with C(terraform show) and C(terraform output) is not run at all.
+    type: str
+    choices: [ full, summary, minimal ]
+    default: full
+    version_added: 3.0.0
 notes:
    - To just run a C(terraform plan), use check mode.
 requirements: [ "terraform" ]
@@ -240,6 +408,14 @@ EXAMPLES = """
           unit_number: 3
     force_init: true
 
+- name: Share downloaded providers between projects
+  cloud.terraform.terraform:
+    project_path: 'project/'
+    state: "{{ state }}"
+    force_init: true
+    plugin_cache_dir: /var/cache/terraform/plugins
+    plugin_cache_max_size: 2048
+
 ### Example directory structure for plugin_paths example
 # $ tree /path/to/plugins_dir_1
 # /path/to/plugins_dir_1/
@@ -256,10 +432,22 @@ EXAMPLES = """
 
 # language=yaml
 RETURN = """
+timed_out:
+  type: bool
+  description: Whether the module failed because a Terraform command did not finish within its I(timeouts).
+  returned: when a command timed out
+  version_added: 3.0.0
+  sample: true
+coalesced:
+  type: bool
+  description: Whether the result was produced by another identical invocation, see I(coalesce).
+  returned: when I(coalesce) is set and the result was reused
+  version_added: 3.0.0
+  sample: true
 outputs:
   type: complex
   description: A dictionary of all the TF outputs by their assigned name. Use C(.outputs.MyOutputName.value) to access the value.
-  returned: on success
+  returned: on success, unless I(result_profile=minimal)
   sample: '{"bukkit_arn": {"sensitive": false, "type": "string", "value": "arn:aws:s3:::tf-test-bukkit"}'
   contains:
     sensitive:
@@ -276,35 +464,99 @@ outputs:
       description: The value of the output as interpolated by Terraform
 stdout:
   type: str
-  description: Full C(terraform) command stdout, in case you want to display it or examine the event log
-  returned: always
+  description:
+    - Full C(terraform) command stdout, in case you want to display it or examine the event log
+    - Only the last lines with I(result_profile=summary).
+  returned: unless I(result_profile=minimal)
   sample: ''
 command:
   type: str
   description: Full C(terraform) command built by this module, in case you want to re-run the command outside the module or debug a problem.
   returned: always
   sample: terraform apply ...
+timings:
+  type: list
+  elements: dict
+  description: Duration and output size of every C(terraform) command run by the module, in execution order.
+  returned: always
+  version_added: 3.0.0
+  sample: [{"command": "plan", "start": 1697700000.12, "duration": 3.52, "rc": 2, "stdout_bytes": 2048, "stderr_bytes": 0}]
+  contains:
+    command:
+      type: str
+      returned: always
+      description: The Terraform subcommand, for example C(init), C(plan) or C(providers schema).
+    start:
+      type: float
+      returned: always
+      description: When the command was started, in seconds since the epoch.
+    duration:
+      type: float
+      returned: always
+      description: How long the command took, in seconds.
+    rc:
+      type: int
+      returned: always
+      description: The exit code of the command.
+    stdout_bytes:
+      type: int
+      returned: always
+      description: Size of the command stdout in bytes.
+    stderr_bytes:
+      type: int
+      returned: always
+      description: Size of the command stderr in bytes.
 """
 
 import dataclasses
+import functools
+import json
 import os
 import tempfile
-from typing import List
+import time
+from typing import Any, Callable, Dict, List, NoReturn, Optional, Union, cast
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.compat.version import LooseVersion
 from ansible.module_utils.six import integer_types
+from ansible_collections.cloud.terraform.plugins.module_utils.cache import read_json_file, write_json_file
+from ansible_collections.cloud.terraform.plugins.module_utils.coalesce import (
+    RunCoalescer,
+    get_coalesce_lock_path,
+    get_coalesce_path,
+)
 from ansible_collections.cloud.terraform.plugins.module_utils.errors import TerraformError, TerraformWarning
 from ansible_collections.cloud.terraform.plugins.module_utils.models import (
     TerraformModuleResource,
     TerraformProviderSchemaCollection,
     TerraformShow,
+    TerraformStateSerial,
     TerraformWorkspaceContext,
 )
+from ansible_collections.cloud.terraform.plugins.module_utils.parallelism import (
+    compute_auto_parallelism,
+    count_state_instances,
+    get_parallelism_record_path,
+    is_throttled,
+    make_parallelism_record,
+)
+from ansible_collections.cloud.terraform.plugins.module_utils.plugin_cache import (
+    get_plugin_cache_environment,
+    managed_plugin_cache,
+)
+from ansible_collections.cloud.terraform.plugins.module_utils.process import SubprocessRunCommand
+from ansible_collections.cloud.terraform.plugins.module_utils.refresh import (
+    get_refresh_record_path,
+    is_refresh_fresh,
+    make_refresh_record,
+)
 from ansible_collections.cloud.terraform.plugins.module_utils.terraform_commands import (
     TerraformCommands,
     WorkspaceCommand,
 )
-from ansible_collections.cloud.terraform.plugins.module_utils.types import AnyJsonType, TJsonBareValue
+from ansible_collections.cloud.terraform.plugins.module_utils.timing import TimedRunCommand
+from ansible_collections.cloud.terraform.plugins.module_utils.tracing import Tracer
+from ansible_collections.cloud.terraform.plugins.module_utils.types import AnyJsonType, TJsonBareValue, TJsonObject
 from ansible_collections.cloud.terraform.plugins.module_utils.utils import (
     get_outputs,
     get_state_args,
@@ -376,9 +628,15 @@ def filter_outputs(state_contents: TerraformShow) -> TerraformShow:
 def sanitize_state(
     show_state: TerraformShow,
     provider_schemas: TerraformProviderSchemaCollection,
+    tracer: Optional[Tracer] = None,
 ) -> TerraformShow:
-    show_state = filter_resource_attributes(show_state, provider_schemas)
-    show_state = filter_outputs(show_state)
+    with (tracer or Tracer(None)).span(
+        "sanitize_state",
+        resources=len(show_state.values.root_module.resources),
+        outputs=len(show_state.values.outputs),
+    ):
+        show_state = filter_resource_attributes(show_state, provider_schemas)
+        show_state = filter_outputs(show_state)
     return show_state
 
 
@@ -427,31 +685,86 @@ def process_complex_args(terraform_variables: AnyJsonType) -> str:
     return ",".join(ret_out)
 
 
+def exit_coalesced(
+    module: AnsibleModule, record: TJsonObject, outputs: Optional[Union[TJsonObject, TJsonBareValue]] = None
+) -> NoReturn:
+    result = dict(cast(Dict[str, Any], record.get("result") or {}), coalesced=True)
+    if record.get("failed"):
+        module.fail_json(**result)
+    if outputs is not None:
+        result["outputs"] = outputs
+    module.exit_json(**result)
+    # exit_json does not return, hinting to the type checker explicitly
+    raise AssertionError("exit_json should have exited the process")
+
+
+def write_parallelism_record(path: str, parallelism: int, stderr: str) -> None:
+    try:
+        write_json_file(path, make_parallelism_record(parallelism, is_throttled(stderr)))
+    except OSError:
+        pass
+
+
+# number of trailing lines of stdout and stderr kept by the summary result profile,
+# enough for the plan or apply summary and the errors or warnings preceding it
+SUMMARY_LINES = 20
+
+
+def summarize_output(text: Optional[str]) -> Optional[str]:
+    if text is None:
+        return None
+    lines = text.rstrip("\n").split("\n")
+    if len(lines) <= SUMMARY_LINES:
+        return text
+    return "\n".join(["... {0} lines omitted ...".format(len(lines) - SUMMARY_LINES)] + lines[-SUMMARY_LINES:]) + "\n"
+
+
 def main() -> None:
     module = AnsibleModule(
         argument_spec=dict(
             project_path=dict(required=True, type="path"),
             binary_path=dict(type="path"),
             plugin_paths=dict(type="list", elements="path"),
+            plugin_cache_dir=dict(type="path"),
+            plugin_cache_max_size=dict(type="int"),
             workspace=dict(type="str", default="default"),
             purge_workspace=dict(type="bool", default=False),
             state=dict(default="present", choices=["present", "absent", "planned"]),
             variables=dict(type="dict"),
             complex_vars=dict(type="bool", default=False),
+            variables_mode=dict(type="str", choices=["args", "file"], default="args"),
             variables_files=dict(aliases=["variables_file"], type="list", elements="path"),
             plan_file=dict(type="path"),
             state_file=dict(type="path"),
             targets=dict(type="list", elements="str", default=[]),
             lock=dict(type="bool", default=True),
             lock_timeout=dict(type="int"),
+            lock_retries=dict(type="int", default=0),
+            transient_retries=dict(type="int", default=0),
             force_init=dict(type="bool", default=False),
             backend_config=dict(type="dict"),
             backend_config_files=dict(type="list", elements="path"),
             init_reconfigure=dict(type="bool", default=False),
             overwrite_init=dict(type="bool", default=True),
             check_destroy=dict(type="bool", default=False),
-            parallelism=dict(type="int"),
+            parallelism=dict(type="raw"),
             provider_upgrade=dict(type="bool", default=False),
+            trace_file=dict(type="path"),
+            result_profile=dict(type="str", choices=["full", "summary", "minimal"], default="full"),
+            refresh=dict(type="str", choices=["full", "none", "only"], default="full"),
+            refresh_targets=dict(type="list", elements="str"),
+            refresh_ttl=dict(type="int"),
+            coalesce=dict(type="bool", default=False),
+            coalesce_window=dict(type="int", default=0),
+            timeouts=dict(
+                type="dict",
+                options=dict(
+                    init=dict(type="int"),
+                    plan=dict(type="int"),
+                    apply=dict(type="int"),
+                    show=dict(type="int"),
+                ),
+            ),
         ),
         required_if=[("state", "planned", ["plan_file"])],
         supports_check_mode=True,
@@ -460,10 +773,16 @@ def main() -> None:
     project_path = module.params.get("project_path")
     bin_path = module.params.get("binary_path")
     plugin_paths = module.params.get("plugin_paths")
+    plugin_cache_dir = module.params.get("plugin_cache_dir")
+    plugin_cache_max_size = module.params.get("plugin_cache_max_size")
+    if plugin_cache_dir is not None:
+        # Terraform runs in project_path, so the lock and the eviction have to agree with it on a relative path
+        plugin_cache_dir = os.path.abspath(os.path.join(project_path, plugin_cache_dir))
     workspace = module.params.get("workspace")
     purge_workspace = module.params.get("purge_workspace")
     variables = module.params.get("variables") or {}
     complex_vars = module.params.get("complex_vars")
+    variables_mode = module.params.get("variables_mode")
     variables_files = module.params.get("variables_files")
     plan_file = module.params.get("plan_file")
     state_file = module.params.get("state_file")
@@ -475,6 +794,19 @@ def main() -> None:
     check_destroy = module.params.get("check_destroy")
     provider_upgrade = module.params.get("provider_upgrade")
     state = module.params.get("state")
+    result_profile = module.params.get("result_profile")
+    refresh = module.params.get("refresh")
+    refresh_targets = module.params.get("refresh_targets") or []
+    refresh_ttl = module.params.get("refresh_ttl")
+    parallelism = module.params.get("parallelism")
+    if parallelism is not None and parallelism != "auto":
+        try:
+            parallelism = int(parallelism)
+        except (TypeError, ValueError):
+            module.fail_json(msg="parallelism must be an integer or 'auto', got {0}".format(parallelism))
+    # the state is only read for the diff, so it is skipped altogether when the diff is not returned
+    return_diff = result_profile == "full" or (result_profile == "summary" and module._diff)
+    return_outputs = result_profile != "minimal"
 
     if state == "planned":
         computed_check_mode = True
@@ -493,167 +825,338 @@ def main() -> None:
     else:
         terraform_binary = module.get_bin_path("terraform", required=True)
 
-    terraform = TerraformCommands(module.run_command, project_path, terraform_binary, computed_check_mode)
+    module.run_command_environ_update.update(get_plugin_cache_environment(plugin_cache_dir))
+    run_command = TimedRunCommand(module.run_command)
+    tracer = Tracer(module.params.get("trace_file"))
+    terraform = TerraformCommands(
+        run_command,
+        project_path,
+        terraform_binary,
+        computed_check_mode,
+        tracer,
+        lock_retries=module.params.get("lock_retries"),
+        transient_retries=module.params.get("transient_retries"),
+        subprocess_run_command_fp=run_command.sharing(SubprocessRunCommand(module.run_command_environ_update)),
+        timeouts={command: timeout for command, timeout in (module.params.get("timeouts") or {}).items() if timeout},
+    )
+
+    if refresh_targets and refresh != "full":
+        module.fail_json(msg="refresh_targets can only be used with refresh=full")
+    if refresh == "only" and state == "absent":
+        module.fail_json(msg="refresh=only can not be used with state=absent")
+
+    coalesce_path = None
+    coalesce_lock_path = None
+    if module.params.get("coalesce"):
+        coalesce_path = get_coalesce_path(
+            project_path, dict(module.params, check_mode=module.check_mode, diff=module._diff)
+        )
+        coalesce_lock_path = get_coalesce_lock_path(project_path)
+    coalescer = RunCoalescer(coalesce_path, coalesce_lock_path, module.params.get("coalesce_window"))
 
-    checked_version = terraform.version()
+    with coalescer, tracer.span("terraform", project=project_path, workspace=workspace, state=computed_state) as span:
+        if coalescer.result is not None:
+            span.set_attribute("coalesced", True)
+            coalesced_outputs = None
+            # the outputs are not shared through the cache directory, so they are read again
+            if return_outputs and not coalescer.result.get("failed"):
+                try:
+                    coalesced_outputs = get_outputs(
+                        run_command_fp=run_command,
+                        terraform_binary=terraform_binary,
+                        project_path=project_path,
+                        state_file=state_file,
+                        output_format="json",
+                        workspace=workspace,
+                        retries=module.params.get("transient_retries"),
+                    )
+                except TerraformError as e:
+                    e.fail_json(module)
+            exit_coalesced(module, coalescer.result, coalesced_outputs)
 
-    if force_init:
-        if overwrite_init or not os.path.isfile(os.path.join(project_path, ".terraform", "terraform.tfstate")):
-            terraform.init(
-                backend_config or {},
-                backend_config_files or [],
-                init_reconfigure,
-                provider_upgrade,
-                plugin_paths or [],
+        checked_version = terraform.version()
+        if refresh == "only" and checked_version < LooseVersion("0.15.4"):
+            module.fail_json(msg="refresh=only requires Terraform 0.15.4 or newer, found {0}".format(checked_version))
+        # the targets are refreshed with apply -refresh-only, which older versions do not have
+        if refresh_targets and checked_version < LooseVersion("0.15.4"):
+            module.fail_json(
+                msg="refresh_targets requires Terraform 0.15.4 or newer, found {0}".format(checked_version)
             )
 
-    out = None
-    err = None
-    try:
-        provider_schemas = terraform.providers_schema()
+        out = None
+        err = None
+        parallelism_record_path = None
         try:
-            initial_state = terraform.show(state_file)
-            if initial_state is not None:
-                initial_state = sanitize_state(initial_state, provider_schemas)
-        except TerraformWarning as e:
-            module.warn(e.message)
+            if force_init:
+                if overwrite_init or not os.path.isfile(os.path.join(project_path, ".terraform", "terraform.tfstate")):
+                    with managed_plugin_cache(plugin_cache_dir, plugin_cache_max_size, project_path) as evicted:
+                        terraform.init(
+                            backend_config or {},
+                            backend_config_files or [],
+                            init_reconfigure,
+                            provider_upgrade,
+                            plugin_paths or [],
+                        )
+                    for path in evicted:
+                        module.debug("Evicted {0} from the plugin cache".format(path))
+
+            # none of these depend on each other, so they run at the same time
+            probes: Dict[str, Callable[[], Any]] = {"workspaces": terraform.workspace_list}
+            if return_diff:
+                probes["schemas"] = terraform.providers_schema
+                probes["state"] = functools.partial(terraform.show, state_file)
+            probe_results = terraform.run_concurrently(probes)
+
+            provider_schemas = probe_results["schemas"].result() if return_diff else None
             initial_state = None
+            if provider_schemas is not None:
+                try:
+                    initial_state = probe_results["state"].result()
+                    if initial_state is not None:
+                        initial_state = sanitize_state(initial_state, provider_schemas, tracer)
+                except TerraformWarning as e:
+                    module.warn(e.message)
 
-        try:
-            workspace_ctx = terraform.workspace_list()
-        except TerraformWarning as e:
-            module.warn(e.message)
-            workspace_ctx = TerraformWorkspaceContext(current="default", all=[])
-
-        if workspace_ctx.current != workspace:
-            if workspace not in workspace_ctx.all:
-                terraform.workspace(WorkspaceCommand.NEW, workspace)
+            try:
+                workspace_ctx = probe_results["workspaces"].result()
+            except TerraformWarning as e:
+                module.warn(e.message)
+                workspace_ctx = TerraformWorkspaceContext(current="default", all=[])
+
+            if workspace_ctx.current != workspace:
+                if workspace not in workspace_ctx.all:
+                    terraform.workspace(WorkspaceCommand.NEW, workspace)
+                else:
+                    terraform.workspace(WorkspaceCommand.SELECT, workspace)
+
+            refresh_record_path = None
+            refresh_record = None
+            refresh_serial = None
+            refresh_changed_state = False
+
+            variables_args = []
+            if variables_mode == "file":
+                if variables:
+                    fd, new_variables_file = tempfile.mkstemp(suffix=".tfvars.json")
+                    module.add_cleanup_file(new_variables_file)
+                    with os.fdopen(fd, "w") as variables_file:
+                        json.dump(variables, variables_file)
+                    variables_args.extend(["-var-file", new_variables_file])
+            elif complex_vars:
+                for k, v in variables.items():
+                    if isinstance(v, dict):
+                        variables_args.extend(["-var", "{0}={{{1}}}".format(k, process_complex_args(v))])
+                    elif isinstance(v, list):
+                        variables_args.extend(["-var", "{0}={1}".format(k, process_complex_args(v))])
+                    # on the top-level we need to pass just the python string with necessary
+                    # terraform string escape sequences
+                    elif isinstance(v, str):
+                        variables_args.extend(["-var", "{0}={1}".format(k, v)])
+                    else:
+                        variables_args.extend(["-var", "{0}={1}".format(k, format_args(v))])
             else:
-                terraform.workspace(WorkspaceCommand.SELECT, workspace)
-
-        variables_args = []
-        if complex_vars:
-            for k, v in variables.items():
-                if isinstance(v, dict):
-                    variables_args.extend(["-var", "{0}={{{1}}}".format(k, process_complex_args(v))])
-                elif isinstance(v, list):
-                    variables_args.extend(["-var", "{0}={1}".format(k, process_complex_args(v))])
-                # on the top-level we need to pass just the python string with necessary
-                # terraform string escape sequences
-                elif isinstance(v, str):
+                for k, v in variables.items():
                     variables_args.extend(["-var", "{0}={1}".format(k, v)])
-                else:
-                    variables_args.extend(["-var", "{0}={1}".format(k, format_args(v))])
-        else:
-            for k, v in variables.items():
-                variables_args.extend(["-var", "{0}={1}".format(k, v)])
 
-        if variables_files:
-            for f in variables_files:
-                variables_args.extend(["-var-file", f])
+            if variables_files:
+                for f in variables_files:
+                    variables_args.extend(["-var-file", f])
+
+            pulled_state = None
+            if parallelism == "auto":
+                parallelism_record_path = get_parallelism_record_path(project_path, workspace, state_file)
+                pulled_state = terraform.state_pull(state_file)
+                parallelism = compute_auto_parallelism(
+                    count_state_instances(pulled_state),
+                    os.cpu_count() or 1,
+                    read_json_file(parallelism_record_path) if parallelism_record_path is not None else None,
+                )
+                span.set_attribute("parallelism", parallelism)
 
-        # only use an existing plan file if we're not in the deprecated "planned" mode
-        # or if check_mode is set to False
-        if plan_file and not computed_check_mode:
-            if not any([os.path.isfile(project_path + "/" + plan_file), os.path.isfile(plan_file)]):
-                raise TerraformError('Could not find plan_file "{0}", check the path and try again.'.format(plan_file))
+            # only use an existing plan file if we're not in the deprecated "planned" mode
+            # or if check_mode is set to False
+            if plan_file and not computed_check_mode:
+                if not any([os.path.isfile(project_path + "/" + plan_file), os.path.isfile(plan_file)]):
+                    raise TerraformError(
+                        'Could not find plan_file "{0}", check the path and try again.'.format(plan_file)
+                    )
 
-            plan_file_needs_application = True
-            plan_file_to_apply = plan_file
-        else:
-            plan_file_to_apply = plan_file
-            if not plan_file:
-                f, new_plan_file = tempfile.mkstemp(suffix=".tfplan")
-                module.add_cleanup_file(new_plan_file)
-                plan_file_to_apply = new_plan_file
-
-            plan_result_changed, plan_result_any_destroyed, plan_stdout, plan_stderr = terraform.plan(
-                target_plan_file_path=plan_file_to_apply,
-                targets=module.params.get("targets"),
-                destroy=state == "absent",
-                state_args=get_state_args(state_file),
-                variables_args=variables_args,
-            )
+                plan_file_needs_application = True
+                plan_file_to_apply = plan_file
+            else:
+                plan_file_to_apply = plan_file
+                if not plan_file:
+                    f, new_plan_file = tempfile.mkstemp(suffix=".tfplan")
+                    module.add_cleanup_file(new_plan_file)
+                    plan_file_to_apply = new_plan_file
 
-            if computed_state == "present" and plan_result_any_destroyed and check_destroy:
-                raise TerraformError(
-                    "Aborting command because it would destroy some resources. "
-                    "Consider switching the 'check_destroy' to false to suppress this error"
+                plan_refresh = refresh != "none"
+                if refresh_targets and not computed_check_mode:
+                    # refresh the selected resources up front, so the plan does not have to refresh anything;
+                    # the refresh writes the state when the resources changed, which increments its serial
+                    if pulled_state is not None:
+                        serial_before_refresh = TerraformStateSerial.from_json(pulled_state)
+                    else:
+                        serial_before_refresh = terraform.state_serial(state_file)
+                    terraform.refresh(
+                        refresh_targets,
+                        get_state_args(state_file),
+                        variables_args,
+                        parallelism,
+                        lock=module.params.get("lock", False),
+                        lock_timeout=module.params.get("lock_timeout"),
+                    )
+                    refresh_changed_state = terraform.state_serial(state_file) != serial_before_refresh
+                    plan_refresh = False
+                elif refresh_ttl is not None and refresh == "full":
+                    refresh_record_path = get_refresh_record_path(project_path, workspace, state_file)
+                    if refresh_record_path is not None:
+                        if pulled_state is not None:
+                            refresh_serial = TerraformStateSerial.from_json(pulled_state)
+                        else:
+                            refresh_serial = terraform.state_serial(state_file)
+                        refresh_record = read_json_file(refresh_record_path)
+                        if is_refresh_fresh(refresh_record, refresh_serial, refresh_ttl, time.time()):
+                            plan_refresh = False
+                            span.set_attribute("refresh_skipped", True)
+                        else:
+                            refresh_record = None
+
+                refresh_started = time.time()
+                plan_result_changed, plan_result_any_destroyed, plan_stdout, plan_stderr = terraform.plan(
+                    target_plan_file_path=plan_file_to_apply,
+                    targets=module.params.get("targets"),
+                    destroy=state == "absent",
+                    state_args=get_state_args(state_file),
+                    variables_args=variables_args,
+                    refresh=plan_refresh,
+                    refresh_only=refresh == "only",
+                    parallelism=parallelism,
+                    lock=module.params.get("lock", False),
+                    lock_timeout=module.params.get("lock_timeout"),
                 )
 
-            plan_file_needs_application = plan_result_changed
-            out = plan_stdout
-            err = plan_stderr
+                if computed_state == "present" and plan_result_any_destroyed and check_destroy:
+                    raise TerraformError(
+                        "Aborting command because it would destroy some resources. "
+                        "Consider switching the 'check_destroy' to false to suppress this error"
+                    )
 
-        preflight_validation(terraform, terraform_binary, project_path, checked_version, variables_args)
+                plan_file_needs_application = plan_result_changed
+                out = plan_stdout
+                err = plan_stderr
+
+            preflight_validation(terraform, terraform_binary, project_path, checked_version, variables_args)
 
-        try:
-            planned_state = terraform.show(plan_file_to_apply)
-            if planned_state is not None:
-                planned_state = sanitize_state(planned_state, provider_schemas)
-        except TerraformWarning as e:
-            module.warn(e.message)
             planned_state = None
+            if provider_schemas is not None:
+                try:
+                    planned_state = terraform.show(plan_file_to_apply)
+                    if planned_state is not None:
+                        planned_state = sanitize_state(planned_state, provider_schemas, tracer)
+                except TerraformWarning as e:
+                    module.warn(e.message)
+
+            try:
+                # obeys check mode
+                final_apply_command, apply_stdout, apply_stderr = terraform.apply_plan(
+                    plan_file_path=plan_file_to_apply,
+                    version=checked_version,
+                    parallelism=parallelism,
+                    lock=module.params.get("lock", False),
+                    lock_timeout=module.params.get("lock_timeout"),
+                    targets=module.params.get("targets") or [],
+                    needs_application=plan_file_needs_application,
+                )
+            except TerraformError as e:
+                if not computed_check_mode:
+                    if workspace_ctx.current != workspace:
+                        terraform.workspace(WorkspaceCommand.SELECT, workspace_ctx.current)
+                raise e
+
+            if parallelism_record_path is not None:
+                # rate limiting is retried by the providers, so a successful run can still report it as a warning
+                write_parallelism_record(parallelism_record_path, parallelism, (err or "") + apply_stderr)
+
+            # the refresh of a plan is only stored in the state by applying it, so the record is only written
+            # then; after a check mode run or a plan without changes the next run has to refresh again
+            if refresh_record_path is not None and plan_file_needs_application and not computed_check_mode:
+                # the apply wrote to the state, so the serial to compare the next run with is the new one
+                refresh_serial = terraform.state_serial(state_file)
+                if refresh_serial is not None:
+                    # a skipped refresh keeps the time of the refresh it relied on
+                    refreshed_at = refresh_record["refreshed_at"] if refresh_record is not None else refresh_started
+                    try:
+                        write_json_file(
+                            refresh_record_path, make_refresh_record(cast(float, refreshed_at), refresh_serial)
+                        )
+                    except OSError:
+                        pass
 
-        try:
-            # obeys check mode
-            final_apply_command, apply_stdout, apply_stderr = terraform.apply_plan(
-                plan_file_path=plan_file_to_apply,
-                version=checked_version,
-                parallelism=module.params.get("parallelism"),
-                lock=module.params.get("lock", False),
-                lock_timeout=module.params.get("lock_timeout"),
-                targets=module.params.get("targets") or [],
-                needs_application=plan_file_needs_application,
-            )
-        except TerraformError as e:
             if not computed_check_mode:
-                if workspace_ctx.current != workspace:
-                    terraform.workspace(WorkspaceCommand.SELECT, workspace_ctx.current)
-            raise e
-
-        if not computed_check_mode:
-            applied_state = terraform.show(state_file)
-            if applied_state is not None:
-                applied_state = sanitize_state(applied_state, provider_schemas)
-            final_state = applied_state
-            out = apply_stdout
-            err = apply_stderr
-        else:
-            final_state = planned_state
-
-        outputs = get_outputs(
-            run_command_fp=module.run_command,
-            terraform_binary=terraform_binary,
-            project_path=project_path,
-            state_file=state_file,
-            output_format="json",
-            workspace=workspace,
-        )
+                applied_state = None
+                if provider_schemas is not None:
+                    applied_state = terraform.show(state_file)
+                    if applied_state is not None:
+                        applied_state = sanitize_state(applied_state, provider_schemas, tracer)
+                final_state = applied_state
+                out = apply_stdout
+                err = apply_stderr
+            else:
+                final_state = planned_state
 
-        # Restore the Terraform workspace found when running the module
-        if workspace_ctx.current != workspace:
-            terraform.workspace(WorkspaceCommand.SELECT, workspace_ctx.current)
-        if computed_state == "absent" and workspace != "default" and purge_workspace is True:
-            terraform.workspace(WorkspaceCommand.DELETE, workspace)
+            if return_outputs:
+                with tracer.span("terraform output", project=project_path, workspace=workspace):
+                    outputs = get_outputs(
+                        run_command_fp=run_command,
+                        terraform_binary=terraform_binary,
+                        project_path=project_path,
+                        state_file=state_file,
+                        output_format="json",
+                        workspace=workspace,
+                        retries=module.params.get("transient_retries"),
+                    )
 
-        diff = dict(
-            before=dataclasses.asdict(initial_state) if initial_state is not None else {},
-            after=dataclasses.asdict(final_state) if final_state is not None else {},
-        )
+            # Restore the Terraform workspace found when running the module
+            if workspace_ctx.current != workspace:
+                terraform.workspace(WorkspaceCommand.SELECT, workspace_ctx.current)
+            if computed_state == "absent" and workspace != "default" and purge_workspace is True:
+                terraform.workspace(WorkspaceCommand.DELETE, workspace)
 
-        module.exit_json(
-            changed=plan_file_needs_application,
-            diff=diff,
-            state=computed_state,
-            workspace=workspace,
-            outputs=outputs,
-            stdout=out,
-            stderr=err,
-            command=final_apply_command,
-        )
-    except TerraformError as e:
-        e.fail_json(module)
+            result = dict(
+                changed=plan_file_needs_application or refresh_changed_state,
+                state=computed_state,
+                workspace=workspace,
+                command=final_apply_command,
+                timings=run_command.to_list(),
+            )
+            if return_diff:
+                with tracer.span("diff"):
+                    result["diff"] = dict(
+                        before=dataclasses.asdict(initial_state) if initial_state is not None else {},
+                        after=dataclasses.asdict(final_state) if final_state is not None else {},
+                    )
+            if return_outputs:
+                result["outputs"] = outputs
+                if result_profile == "summary":
+                    result["stdout"] = summarize_output(out)
+                    result["stderr"] = summarize_output(err)
+                else:
+                    result["stdout"] = out
+                    result["stderr"] = err
+
+            span.set_attribute("changed", result["changed"])
+            if final_state is not None:
+                span.set_attribute("resources", len(final_state.values.root_module.resources))
+            coalescer.record({key: value for key, value in result.items() if key != "outputs"})
+            module.exit_json(**result)
+        except TerraformError as e:
+            if parallelism_record_path is not None:
+                write_parallelism_record(parallelism_record_path, parallelism, e.message)
+            span.error = e.message
+            e.kwargs.setdefault("timings", run_command.to_list())
+            coalescer.record(dict(e.kwargs, msg=e.message), failed=True)
+            e.fail_json(module)
 
 
 if __name__ == "__main__":
@@ -51,6 +51,25 @@ options:
       - The terraform workspace to work with.
     type: str
     version_added: 1.2.0
+  transient_retries:
+    description:
+      - How many times to retry reading the outputs when it fails with a network error, or with API rate
+        limiting or server errors of the backend holding the state.
+      - Retries are spaced with an exponential backoff with random jitter, starting from up to 2 seconds and
+        growing up to 60 seconds.
+    type: int
+    default: 0
+    version_added: 3.0.0
+  dest:
+    description:
+      - Path of a file on the target to write the outputs to, in the format selected by I(format).
+      - The outputs are streamed into the file without being loaded into memory, and only the path,
+        size and checksum of the file are returned instead of I(outputs) or I(value).
+      - The file is only replaced when its content changes.
+    type: path
+    version_added: 3.0.0
+extends_documentation_fragment:
+  - ansible.builtin.files
 requirements: [ "terraform" ]
 author: "Polona Mihalič (@PolonaM)"
 """
@@ -85,6 +104,14 @@ EXAMPLES = """
   cloud.terraform.terraform_output:
     project_path: project_dir
     workspace: dev
+
+- name: Write a large output to a file instead of returning it
+  cloud.terraform.terraform_output:
+    project_path: project_dir
+    name: kubeconfig
+    format: raw
+    dest: /home/user/.kube/config
+    mode: "0600"
 """
 
 # language=yaml
@@ -112,14 +139,91 @@ value:
   description: A single value requested by the module using the "name" parameter
   sample: "myvalue"
   returned: when name is specified
+dest:
+  type: str
+  description: Path of the file the outputs were written to.
+  returned: when dest is specified
+  version_added: 3.0.0
+  sample: /home/user/.kube/config
+size:
+  type: int
+  description: Size of the written outputs in bytes.
+  returned: when dest is specified and outputs are defined
+  version_added: 3.0.0
+  sample: 5312
+checksum:
+  type: str
+  description: SHA-1 checksum of the written outputs.
+  returned: when dest is specified and outputs are defined
+  version_added: 3.0.0
+  sample: 2a9f4a4a2f8d4e9e0b8c4b7cbb8e0d3c1b6e4d33
+timings:
+  type: list
+  elements: dict
+  description:
+    - Duration and output size of the C(terraform output) command.
+    - Each item has the C(command), C(start), C(duration), C(rc), C(stdout_bytes) and C(stderr_bytes) keys,
+      see the C(timings) return value of M(cloud.terraform.terraform).
+  returned: always
+  version_added: 3.0.0
+  sample: [{"command": "output", "start": 1697700000.12, "duration": 0.82, "rc": 0, "stdout_bytes": 512, "stderr_bytes": 0}]
 """
 
 
+import os
+import tempfile
 from typing import Optional
 
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.cloud.terraform.plugins.module_utils.errors import TerraformError, TerraformWarning
-from ansible_collections.cloud.terraform.plugins.module_utils.utils import get_outputs, validate_bin_path
+from ansible_collections.cloud.terraform.plugins.module_utils.timing import TimedRunCommand
+from ansible_collections.cloud.terraform.plugins.module_utils.utils import (
+    get_outputs,
+    validate_bin_path,
+    write_outputs,
+)
+
+
+def write_outputs_to_dest(
+    module: AnsibleModule,
+    run_command: TimedRunCommand,
+    dest: str,
+    terraform_binary: str,
+    project_path: Optional[str],
+    state_file: Optional[str],
+    name: Optional[str],
+    output_format: str,
+    workspace: Optional[str],
+    retries: int,
+) -> None:
+    dest_dir = os.path.dirname(os.path.abspath(dest))
+    if not os.path.isdir(dest_dir):
+        module.fail_json(msg="Destination directory {0} does not exist".format(dest_dir))
+    # write next to dest, so the file can be moved into place atomically
+    fd, tmp_path = tempfile.mkstemp(dir=dest_dir, prefix=".ansible_tf_output")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            size, checksum = write_outputs(
+                run_command,
+                f,
+                terraform_binary=terraform_binary,
+                project_path=project_path,
+                state_file=state_file,
+                name=name,
+                output_format=output_format,
+                workspace=workspace,
+                retries=retries,
+            )
+        changed = not os.path.exists(dest) or module.sha1(dest) != checksum
+        if changed:
+            module.atomic_move(tmp_path, dest)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+    file_args = module.load_file_common_arguments(module.params, path=dest)
+    changed = module.set_fs_attributes_if_different(file_args, changed)
+    module.exit_json(changed=changed, dest=dest, size=size, checksum=checksum, timings=run_command.to_list())
 
 
 def main() -> None:
@@ -131,8 +235,11 @@ def main() -> None:
             binary_path=dict(type="path"),
             state_file=dict(type="path"),
             workspace=dict(type="str"),
+            dest=dict(type="path"),
+            transient_retries=dict(type="int", default=0),
         ),
         required_if=[("format", "raw", ("name",))],
+        add_file_common_args=True,
     )
 
     project_path: Optional[str] = module.params.get("project_path")
@@ -141,6 +248,8 @@ def main() -> None:
     name: Optional[str] = module.params.get("name")
     output_format: str = module.params.get("format")
     workspace: Optional[str] = module.params.get("workspace")
+    dest: Optional[str] = module.params.get("dest")
+    transient_retries: int = module.params.get("transient_retries")
 
     if bin_path is not None:
         terraform_binary = bin_path
@@ -148,26 +257,44 @@ def main() -> None:
         terraform_binary = module.get_bin_path("terraform", required=True)
     validate_bin_path(terraform_binary)
 
+    run_command = TimedRunCommand(module.run_command)
     try:
+        if dest is not None:
+            write_outputs_to_dest(
+                module,
+                run_command,
+                dest,
+                terraform_binary,
+                project_path,
+                state_file,
+                name,
+                output_format,
+                workspace,
+                transient_retries,
+            )
         outputs = get_outputs(
-            module.run_command,
+            run_command,
             terraform_binary=terraform_binary,
             project_path=project_path,
             state_file=state_file,
             name=name,
             output_format=output_format,
             workspace=workspace,
+            retries=transient_retries,
         )
     except TerraformWarning as e:
         module.warn(e.message)
+        if dest is not None:
+            module.exit_json(changed=False, dest=dest, timings=run_command.to_list())
         outputs = None
     except TerraformError as e:
+        e.kwargs.setdefault("timings", run_command.to_list())
         e.fail_json(module)
 
     if name:
-        module.exit_json(value=outputs)
+        module.exit_json(value=outputs, timings=run_command.to_list())
     else:
-        module.exit_json(outputs=outputs)
+        module.exit_json(outputs=outputs, timings=run_command.to_list())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+Benchmarks for parsing models, state sanitization and inventory building on synthetic states.
+
+Run from the collection root with the collection on the python path, for example:
+    python -m ansible_collections.cloud.terraform.tests.benchmarks.bench_models --resources 100 1000 --output out.json
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+
+from ansible.inventory.data import InventoryData
+from ansible.template import Templar
+from ansible_collections.cloud.terraform.plugins.inventory.terraform_provider import InventoryModule
+from ansible_collections.cloud.terraform.plugins.module_utils.models import (
+    TerraformProviderSchemaCollection,
+    TerraformShow,
+)
+from ansible_collections.cloud.terraform.plugins.modules.terraform import sanitize_state
+from ansible_collections.cloud.terraform.tests.benchmarks.synthetic import generate_provider_schemas, generate_show
+
+
+def measure(func, setup, repeat):
+    """
+    Calls func(setup()) repeat times and returns the durations in seconds.
+    The setup is excluded from the measurement, so benchmarks of functions that mutate their input get fresh data.
+    """
+    durations = []
+    for _ in range(repeat):
+        argument = setup()
+        started = time.perf_counter()
+        func(argument)
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+def create_inventory(state):
+    plugin = InventoryModule()
+    plugin.inventory = InventoryData()
+    plugin.templar = Templar(loader=None)
+    plugin.create_inventory(plugin.inventory, [state], True)
+
+
+def run_benchmarks(resources, depth, attributes, repeat):
+    show_json = generate_show(resources, depth=depth, attributes=attributes)
+    schema_json = generate_provider_schemas(attributes=attributes)
+    provider_schemas = TerraformProviderSchemaCollection.from_json(schema_json)
+    state = TerraformShow.from_json(show_json)
+
+    benchmarks = {
+        "TerraformShow.from_json": (TerraformShow.from_json, lambda: show_json),
+        "TerraformProviderSchemaCollection.from_json": (
+            TerraformProviderSchemaCollection.from_json,
+            lambda: schema_json,
+        ),
+        "sanitize_state": (
+            lambda s: sanitize_state(s, provider_schemas),
+            lambda: TerraformShow.from_json(show_json),
+        ),
+        "flatten_resources": (lambda s: s.values.root_module.flatten_resources(), lambda: state),
+        "terraform_provider.create_inventory": (create_inventory, lambda: state),
+    }
+
+    results = []
+    for name, (func, setup) in benchmarks.items():
+        durations = measure(func, setup, repeat)
+        results.append(
+            dict(
+                name=name,
+                resources=resources,
+                depth=depth,
+                attributes=attributes,
+                repeat=repeat,
+                min=min(durations),
+                median=statistics.median(durations),
+                mean=statistics.mean(durations),
+                max=max(durations),
+            )
+        )
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resources", type=int, nargs="+", default=[100, 1000], help="numbers of resources")
+    parser.add_argument("--depth", type=int, nargs="+", default=[0, 3], help="child module nesting depths")
+    parser.add_argument("--attributes", type=int, nargs="+", default=[10], help="attributes per resource")
+    parser.add_argument("--repeat", type=int, default=5, help="measurements per benchmark")
+    parser.add_argument("--output", help="file to write the JSON results to, defaults to stdout")
+    args = parser.parse_args(argv)
+
+    results = []
+    for resources in args.resources:
+        for depth in args.depth:
+            for attributes in args.attributes:
+                results.extend(run_benchmarks(resources, depth, attributes, args.repeat))
+
+    report = dict(
+        python=platform.python_version(),
+        platform=platform.platform(),
+        unit="seconds",
+        benchmarks=results,
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+End-to-end latency benchmark of the terraform and terraform_output modules against fake_terraform.py.
+
+Every run executes the module the same way Ansible does, as a separate python process, and counts
+the Terraform invocations it makes. Run from the collection root, for example:
+    python -m ansible_collections.cloud.terraform.tests.benchmarks.bench_module --resources 1000 --latency 0.2
+"""
+
+import argparse
+import collections
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+COLLECTION_DIR = os.path.dirname(os.path.dirname(BENCHMARKS_DIR))
+# the directory that contains ansible_collections/cloud/terraform
+COLLECTIONS_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(COLLECTION_DIR)))
+FAKE_TERRAFORM = os.path.join(BENCHMARKS_DIR, "fake_terraform.py")
+
+MODULES = {
+    "terraform": os.path.join(COLLECTION_DIR, "plugins", "modules", "terraform.py"),
+    "terraform_output": os.path.join(COLLECTION_DIR, "plugins", "modules", "terraform_output.py"),
+}
+
+
+def get_module_args(module, project_path, check_mode, extra_args):
+    args = dict(project_path=project_path, binary_path=FAKE_TERRAFORM)
+    if module == "terraform":
+        args.update(force_init=True)
+    args.update(extra_args)
+    args.update(_ansible_check_mode=check_mode, _ansible_remote_tmp=project_path, _ansible_keep_remote_files=False)
+    return args
+
+
+def run_module(module, args, env, workdir):
+    args_file = os.path.join(workdir, "args.json")
+    with open(args_file, "w") as f:
+        json.dump({"ANSIBLE_MODULE_ARGS": args}, f)
+
+    started = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, MODULES[module], args_file],
+        capture_output=True,
+        env=env,
+        cwd=workdir,
+    )
+    duration = time.perf_counter() - started
+
+    result = json.loads(process.stdout)
+    if result.get("failed"):
+        raise RuntimeError("Module {0} failed: {1}".format(module, result.get("msg")))
+    return duration
+
+
+def read_invocations(log_file):
+    invocations = []
+    if os.path.exists(log_file):
+        with open(log_file) as f:
+            for line in f:
+                args = json.loads(line)["args"]
+                words = [arg for arg in args[:2] if not arg.startswith("-")]
+                if words and words[0] in ("providers", "state", "workspace"):
+                    invocations.append(" ".join(words[:2]))
+                else:
+                    invocations.append(" ".join(words[:1]))
+    return invocations
+
+
+def run_benchmark(module, options):
+    durations = []
+    invocations = collections.Counter()
+    with tempfile.TemporaryDirectory() as workdir:
+        project_path = os.path.join(workdir, "project")
+        os.makedirs(project_path)
+        log_file = os.path.join(workdir, "invocations.jsonl")
+        env = dict(
+            os.environ,
+            PYTHONPATH=os.pathsep.join(filter(None, [COLLECTIONS_ROOT, os.environ.get("PYTHONPATH")])),
+            FAKE_TERRAFORM_RESOURCES=str(options.resources),
+            FAKE_TERRAFORM_DEPTH=str(options.depth),
+            FAKE_TERRAFORM_ATTRIBUTES=str(options.attributes),
+            FAKE_TERRAFORM_LATENCY=str(options.latency),
+            FAKE_TERRAFORM_LOG=log_file,
+            # start every benchmark without results cached by earlier runs
+            XDG_CACHE_HOME=os.path.join(workdir, "cache"),
+        )
+        args = get_module_args(module, project_path, options.check, json.loads(options.module_args or "{}"))
+        for _ in range(options.repeat):
+            durations.append(run_module(module, args, env, workdir))
+        commands = read_invocations(log_file)
+        invocations.update(commands)
+
+    return dict(
+        name=module,
+        resources=options.resources,
+        depth=options.depth,
+        attributes=options.attributes,
+        latency=options.latency,
+        check_mode=options.check,
+        repeat=options.repeat,
+        min=min(durations),
+        median=statistics.median(durations),
+        mean=statistics.mean(durations),
+        max=max(durations),
+        invocations_per_run=sum(invocations.values()) / options.repeat,
+        invocations={command: count / options.repeat for command, count in sorted(invocations.items())},
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", choices=sorted(MODULES), nargs="+", default=sorted(MODULES))
+    parser.add_argument("--resources", type=int, default=100, help="number of resources in the fake state")
+    parser.add_argument("--depth", type=int, default=0, help="child module nesting depth of the fake state")
+    parser.add_argument("--attributes", type=int, default=10, help="attributes per resource")
+    parser.add_argument("--latency", type=float, default=0.0, help="artificial latency of every command in seconds")
+    parser.add_argument("--check", action="store_true", help="run the modules in check mode")
+    parser.add_argument(
+        "--module-args", help="additional module arguments as a JSON object, needs a single --module to apply them to"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="module runs per benchmark")
+    parser.add_argument("--output", help="file to write the JSON results to, defaults to stdout")
+    options = parser.parse_args(argv)
+    # the modules take different arguments, so they can only be given for one of them
+    if options.module_args and len(options.module) != 1:
+        parser.error("--module-args can only be used with a single --module")
+
+    report = dict(
+        python=platform.python_version(),
+        platform=platform.platform(),
+        unit="seconds",
+        benchmarks=[run_benchmark(module, options) for module in options.module],
+    )
+    if options.output:
+        with open(options.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+A stand-in for the terraform executable that answers the commands used by the collection with
+deterministic synthetic documents, without providers or cloud access.
+
+It is configured through environment variables:
+    FAKE_TERRAFORM_RESOURCES    number of resources in the state (default 10)
+    FAKE_TERRAFORM_DEPTH        child module nesting depth (default 0)
+    FAKE_TERRAFORM_ATTRIBUTES   attributes per resource (default 10)
+    FAKE_TERRAFORM_CHANGES      "1" if plans should report changes (default "1")
+    FAKE_TERRAFORM_LATENCY      artificial latency of every command in seconds (default 0)
+    FAKE_TERRAFORM_LATENCY_<C>  latency of command <C>, for example FAKE_TERRAFORM_LATENCY_PLAN
+    FAKE_TERRAFORM_LOG          file to append a JSON line with the arguments of every invocation to
+"""
+
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import generate_provider_schemas, generate_show, generate_state  # noqa: E402
+
+VERSION = "1.5.7"
+PLAN_FILE_MARKER = "fake-terraform-plan"
+
+
+def env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def get_show():
+    return generate_show(
+        env_int("FAKE_TERRAFORM_RESOURCES", 10),
+        depth=env_int("FAKE_TERRAFORM_DEPTH", 0),
+        attributes=env_int("FAKE_TERRAFORM_ATTRIBUTES", 10),
+    )
+
+
+def get_command(args):
+    words = [arg for arg in args[:2] if not arg.startswith("-")]
+    if words and words[0] in ("providers", "state", "workspace"):
+        return words[:2]
+    return words[:1]
+
+
+def get_positional(args):
+    positional = []
+    skip = False
+    for arg in args:
+        if skip:
+            skip = False
+        elif arg in ("-out", "-target", "-var", "-var-file", "-backend-config", "-plugin-dir", "-state"):
+            skip = True
+        elif not arg.startswith("-"):
+            positional.append(arg)
+    return positional
+
+
+def get_option(args, name):
+    for i, arg in enumerate(args):
+        if arg == name and i + 1 < len(args):
+            return args[i + 1]
+    return None
+
+
+def sleep_latency(command):
+    latency = os.environ.get("FAKE_TERRAFORM_LATENCY_" + "_".join(command).upper())
+    if latency is None:
+        latency = os.environ.get("FAKE_TERRAFORM_LATENCY", "0")
+    time.sleep(float(latency))
+
+
+def log_invocation(args):
+    log_file = os.environ.get("FAKE_TERRAFORM_LOG")
+    if log_file:
+        with open(log_file, "a") as f:
+            f.write(json.dumps({"args": args, "time": time.time()}) + "\n")
+
+
+def cmd_version(args):
+    print(json.dumps({"terraform_version": VERSION, "platform": "linux_amd64", "provider_selections": {}}))
+    return 0
+
+
+def cmd_init(args):
+    os.makedirs(".terraform", exist_ok=True)
+    print("Terraform has been successfully initialized!")
+    return 0
+
+
+def cmd_providers_schema(args):
+    print(json.dumps(generate_provider_schemas(attributes=env_int("FAKE_TERRAFORM_ATTRIBUTES", 10))))
+    return 0
+
+
+def cmd_show(args):
+    positional = get_positional(args[1:])
+    show = get_show()
+    if positional and os.path.isfile(positional[0]):
+        with open(positional[0]) as f:
+            if f.read() == PLAN_FILE_MARKER:
+                show["planned_values"] = show.pop("values")
+    print(json.dumps(show))
+    return 0
+
+
+def cmd_state_pull(args):
+    print(
+        json.dumps(
+            generate_state(
+                env_int("FAKE_TERRAFORM_RESOURCES", 10),
+                depth=env_int("FAKE_TERRAFORM_DEPTH", 0),
+                attributes=env_int("FAKE_TERRAFORM_ATTRIBUTES", 10),
+            )
+        )
+    )
+    return 0
+
+
+def cmd_plan(args):
+    plan_file = get_option(args, "-out")
+    if plan_file:
+        with open(plan_file, "w") as f:
+            f.write(PLAN_FILE_MARKER)
+    resources = env_int("FAKE_TERRAFORM_RESOURCES", 10)
+    if os.environ.get("FAKE_TERRAFORM_CHANGES", "1") == "1":
+        print("Plan: {0} to add, 0 to change, 0 to destroy.".format(resources))
+        return 2 if "-detailed-exitcode" in args else 0
+    print("No changes. Your infrastructure matches the configuration.")
+    return 0
+
+
+def cmd_apply(args):
+    print(
+        "Apply complete! Resources: {0} added, 0 changed, 0 destroyed.".format(env_int("FAKE_TERRAFORM_RESOURCES", 10))
+    )
+    return 0
+
+
+def cmd_output(args):
+    outputs = get_show()["values"]["outputs"]
+    positional = get_positional(args[1:])
+    if positional:
+        if positional[0] not in outputs:
+            sys.stderr.write('Error: Output "{0}" not found\n'.format(positional[0]))
+            return 1
+        value = outputs[positional[0]]["value"]
+        print(value if "-raw" in args else json.dumps(value))
+    else:
+        print(json.dumps(outputs))
+    return 0
+
+
+def cmd_validate(args):
+    print("Success! The configuration is valid.")
+    return 0
+
+
+def cmd_workspace_list(args):
+    print("* default\n")
+    return 0
+
+
+def cmd_workspace_change(args):
+    return 0
+
+
+COMMANDS = {
+    ("version",): cmd_version,
+    ("init",): cmd_init,
+    ("providers", "schema"): cmd_providers_schema,
+    ("show",): cmd_show,
+    ("state", "pull"): cmd_state_pull,
+    ("plan",): cmd_plan,
+    ("apply",): cmd_apply,
+    ("output",): cmd_output,
+    ("validate",): cmd_validate,
+    ("workspace", "list"): cmd_workspace_list,
+    ("workspace", "select"): cmd_workspace_change,
+    ("workspace", "new"): cmd_workspace_change,
+    ("workspace", "delete"): cmd_workspace_change,
+}
+
+
+def main(args):
+    log_invocation(args)
+    command = tuple(get_command(args))
+    if command not in COMMANDS:
+        sys.stderr.write("fake terraform: unsupported command {0}\n".format(args))
+        return 1
+    sleep_latency(command)
+    return COMMANDS[command](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+Generators for synthetic `terraform show -json`, `terraform state pull` and `terraform providers schema -json` documents.
+"""
+
+PROVIDER_NAME = "registry.terraform.io/hashicorp/synthetic"
+ANSIBLE_PROVIDER_NAME = "registry.terraform.io/ansible/ansible"
+RESOURCE_TYPES = ["synthetic_instance", "synthetic_volume", "synthetic_network"]
+
+# every n-th resource is an ansible_host or ansible_group, the rest are provider resources
+ANSIBLE_HOST_EVERY = 4
+ANSIBLE_GROUP_EVERY = 50
+
+
+def attribute_name(index):
+    return "attribute_{0}".format(index)
+
+
+def generate_values(index, attributes):
+    values = {"id": "id-{0}".format(index)}
+    for a in range(attributes):
+        # mix scalar attributes with nested blocks and maps, as real providers do
+        if a % 5 == 3:
+            values[attribute_name(a)] = [{"nested_{0}".format(n): "value-{0}-{1}".format(index, n) for n in range(3)}]
+        elif a % 5 == 4:
+            values[attribute_name(a)] = {"key_{0}".format(n): "value-{0}".format(n) for n in range(3)}
+        else:
+            values[attribute_name(a)] = "value-{0}-{1}".format(index, a)
+    values["tags_all"] = {"Name": "resource-{0}".format(index), "Index": str(index)}
+    return values
+
+
+def generate_sensitive_values(attributes):
+    sensitive_values = {}
+    for a in range(attributes):
+        if a % 7 == 6:
+            sensitive_values[attribute_name(a)] = True
+        elif a % 5 == 3:
+            sensitive_values[attribute_name(a)] = [{}]
+    return sensitive_values
+
+
+def generate_resource(index, module_address, attributes):
+    if index % ANSIBLE_GROUP_EVERY == 0:
+        resource_type = "ansible_group"
+        provider_name = ANSIBLE_PROVIDER_NAME
+        values = {
+            "name": "group_{0}".format(index // ANSIBLE_GROUP_EVERY),
+            "children": ["child_{0}".format(index // ANSIBLE_GROUP_EVERY)],
+            "variables": {"group_index": str(index)},
+        }
+        sensitive_values = {}
+    elif index % ANSIBLE_HOST_EVERY == 0:
+        resource_type = "ansible_host"
+        provider_name = ANSIBLE_PROVIDER_NAME
+        values = {
+            "name": "host-{0}".format(index),
+            "groups": ["group_{0}".format(index // ANSIBLE_GROUP_EVERY)],
+            "variables": {attribute_name(a): "value-{0}-{1}".format(index, a) for a in range(attributes)},
+        }
+        sensitive_values = {}
+    else:
+        resource_type = RESOURCE_TYPES[index % len(RESOURCE_TYPES)]
+        provider_name = PROVIDER_NAME
+        values = generate_values(index, attributes)
+        sensitive_values = generate_sensitive_values(attributes)
+
+    name = "r{0}".format(index)
+    address = "{0}.{1}".format(resource_type, name)
+    if module_address:
+        address = "{0}.{1}".format(module_address, address)
+    return {
+        "address": address,
+        "mode": "managed",
+        "type": resource_type,
+        "name": name,
+        "provider_name": provider_name,
+        "schema_version": 0,
+        "values": values,
+        "sensitive_values": sensitive_values,
+    }
+
+
+def generate_show(resources, depth=0, attributes=10):
+    """
+    Returns a `terraform show -json` document with the given number of resources, spread evenly
+    across the root module and a chain of child modules nested depth levels deep.
+    """
+    levels = depth + 1
+    per_level = [resources // levels + (1 if level < resources % levels else 0) for level in range(levels)]
+
+    index = 0
+    modules = []
+    module_address = ""
+    for level in range(levels):
+        if level > 0:
+            module_address = "{0}module.m{1}".format(module_address + "." if module_address else "", level)
+        module_resources = []
+        for i in range(per_level[level]):
+            module_resources.append(generate_resource(index, module_address, attributes))
+            index += 1
+        modules.append({"address": module_address, "resources": module_resources})
+
+    # link the chain from the innermost module up
+    for level in range(levels - 1, 0, -1):
+        modules[level - 1]["child_modules"] = [modules[level]]
+    root_module = modules[0]
+    root_module.pop("address")
+
+    return {
+        "format_version": "1.0",
+        "terraform_version": "1.5.0",
+        "values": {
+            "outputs": {
+                "public_output": {"sensitive": False, "value": "public", "type": "string"},
+                "sensitive_output": {"sensitive": True, "value": "secret", "type": "string"},
+            },
+            "root_module": root_module,
+        },
+    }
+
+
+def generate_state(resources, depth=0, attributes=10, serial=1):
+    """
+    Returns the raw version 4 state, as printed by `terraform state pull`, of the resources of generate_show.
+    """
+    state_resources = []
+    modules = [generate_show(resources, depth=depth, attributes=attributes)["values"]["root_module"]]
+    while modules:
+        module = modules.pop(0)
+        for resource in module.get("resources", []):
+            state_resource = {
+                "mode": resource["mode"],
+                "type": resource["type"],
+                "name": resource["name"],
+                "provider": 'provider["{0}"]'.format(resource["provider_name"]),
+                "instances": [{"schema_version": 0, "attributes": resource["values"]}],
+            }
+            if module.get("address"):
+                state_resource["module"] = module["address"]
+            state_resources.append(state_resource)
+        modules.extend(module.get("child_modules", []))
+
+    return {
+        "version": 4,
+        "terraform_version": "1.5.0",
+        "serial": serial,
+        "lineage": "00000000-0000-0000-0000-000000000000",
+        "outputs": {
+            "public_output": {"value": "public", "type": "string"},
+            "sensitive_output": {"value": "secret", "type": "string", "sensitive": True},
+        },
+        "resources": state_resources,
+    }
+
+
+def generate_provider_schemas(attributes=10, resource_types=None):
+    """
+    Returns a `terraform providers schema -json` document describing the resources of generate_show.
+    """
+    resource_types = resource_types or RESOURCE_TYPES
+    resource_schemas = {}
+    for resource_type in resource_types:
+        block_attributes = {
+            "id": {"type": "string", "description_kind": "plain", "computed": True},
+            "tags_all": {"type": ["map", "string"], "description_kind": "plain", "optional": True},
+        }
+        block_types = {}
+        for a in range(attributes):
+            if a % 5 == 3:
+                block_types[attribute_name(a)] = {
+                    "nesting_mode": "list",
+                    "block": {
+                        "attributes": {
+                            "nested_{0}".format(n): {"type": "string", "description_kind": "plain", "optional": True}
+                            for n in range(3)
+                        }
+                    },
+                }
+            else:
+                block_attributes[attribute_name(a)] = {
+                    "type": "string" if a % 5 != 4 else ["map", "string"],
+                    "description_kind": "plain",
+                    "optional": True,
+                    "sensitive": a % 11 == 10,
+                }
+        resource_schemas[resource_type] = {
+            "version": 0,
+            "block": {"attributes": block_attributes, "block_types": block_types, "description_kind": "plain"},
+        }
+
+    return {
+        "format_version": "1.0",
+        "provider_schemas": {PROVIDER_NAME: {"resource_schemas": resource_schemas}},
+    }
@@ -6,8 +6,9 @@
 from subprocess import CompletedProcess
 
 import pytest
-from ansible.errors import AnsibleParserError
+from ansible.errors import AnsibleError, AnsibleParserError
 from ansible.inventory.data import InventoryData
+from ansible.plugins.inventory import Constructable
 from ansible.template import Templar
 from ansible_collections.cloud.terraform.plugins.inventory.terraform_provider import InventoryModule, module_run_command
 from ansible_collections.cloud.terraform.plugins.module_utils.models import (
@@ -436,3 +437,99 @@ class TestCreateInventory:
             except TerraformWarning as e:
                 assert "already exists elsewhere" in str(e.value)
                 raise
+
+
+class TestConstructed:
+    @pytest.fixture
+    def state_content(self):
+        def host(name, region):
+            return TerraformRootModuleResource(
+                address="ansible_host.{0}".format(name),
+                mode="managed",
+                type="ansible_host",
+                name=name,
+                provider_name="terraform-ansible.com/ansibleprovider/ansible",
+                schema_version=0,
+                values={
+                    "groups": ["servers"],
+                    "name": name,
+                    "id": name,
+                    "variables": {"region": region, "size": "2"},
+                },
+                sensitive_values={},
+                depends_on=[],
+            )
+
+        return [
+            TerraformShow(
+                format_version="1.0",
+                terraform_version="1.3.6",
+                values=TerraformShowValues(
+                    outputs={},
+                    root_module=TerraformRootModule(
+                        resources=[host("db1", "eu-west-1"), host("web1", "eu-west-1"), host("web2", "us-east-1")],
+                        child_modules=[],
+                    ),
+                ),
+            )
+        ]
+
+    def test_compose_groups_keyed_groups(self, inventory_plugin, state_content):
+        inventory_plugin.set_constructed_options(
+            dict(
+                compose={
+                    "ansible_user": "'admin' if 'db' in inventory_hostname else 'user'",
+                    "disk": "size | int * 10",
+                },
+                groups={"databases": "'db' in inventory_hostname", "big": "disk | int > 10"},
+                keyed_groups=[{"key": "region", "prefix": "region"}],
+            )
+        )
+
+        inventory_plugin.create_inventory(inventory_plugin.inventory, state_content, False)
+
+        inventory = inventory_plugin.inventory
+        assert inventory.get_host("db1").vars["ansible_user"] == "admin"
+        assert inventory.get_host("web1").vars["ansible_user"] == "user"
+        assert inventory.get_host("web1").vars["disk"] == "20"
+        assert [h.name for h in inventory.groups["databases"].get_hosts()] == ["db1"]
+        assert [h.name for h in inventory.groups["big"].get_hosts()] == ["db1", "web1", "web2"]
+        assert [h.name for h in inventory.groups["region_eu_west_1"].get_hosts()] == ["db1", "web1"]
+        assert [h.name for h in inventory.groups["region_us_east_1"].get_hosts()] == ["web2"]
+        # the group bookkeeping is built once for all hosts
+        assert sorted(inventory_plugin._composed_groups) == ["big", "databases"]
+
+    def test_templar_renders_expressions(self, inventory_plugin, state_content, mocker):
+        template = mocker.spy(inventory_plugin.templar, "template")
+        inventory_plugin.set_constructed_options(
+            dict(compose={"disk": "size | int * 10"}, groups={"big": "disk | int > 10"})
+        )
+
+        inventory_plugin.create_inventory(inventory_plugin.inventory, state_content, False)
+
+        assert InventoryModule._compose is Constructable._compose
+        assert template.called
+        assert [h.name for h in inventory_plugin.inventory.groups["big"].get_hosts()] == ["db1", "web1", "web2"]
+
+    def test_undefined_variable(self, inventory_plugin, state_content):
+        inventory_plugin.set_constructed_options(dict(compose={"owner": "missing_variable"}))
+
+        inventory_plugin.create_inventory(inventory_plugin.inventory, state_content, False)
+
+        assert "owner" not in inventory_plugin.inventory.get_host("db1").vars
+
+    def test_undefined_variable_strict(self, inventory_plugin, state_content):
+        inventory_plugin.set_constructed_options(dict(compose={"owner": "missing_variable"}, strict=True))
+
+        with pytest.raises(AnsibleError):
+            inventory_plugin.create_inventory(inventory_plugin.inventory, state_content, False)
+
+    def test_lookups_disabled(self, inventory_plugin, state_content):
+        inventory_plugin.set_constructed_options(
+            dict(compose={"secret": "lookup('env', 'HOME')"}, groups={"looked_up": "lookup('env', 'HOME')"})
+        )
+
+        inventory_plugin.create_inventory(inventory_plugin.inventory, state_content, False)
+
+        assert "secret" not in inventory_plugin.inventory.get_host("db1").vars
+        assert "looked_up" not in inventory_plugin.inventory.groups
@@ -0,0 +1,454 @@
+import json
+import os
+
+import pytest
+from ansible.inventory.data import InventoryData
+from ansible_collections.cloud.terraform.plugins.inventory.terraform_state_provider import (
+    InventoryModule,
+    TerraformInventoryError,
+    _clean,
+    filter_function,
+    flatten_json,
+    iter_module_resources,
+    iter_pulled_resources,
+    load_show_json,
+    project_values,
+)
+from ansible_collections.cloud.terraform.plugins.module_utils.utils import resolve_config_path
+
+
+def make_resource(address, type, tags=None):
+    return {
+        "address": address,
+        "mode": "managed",
+        "type": type,
+        "name": address.split(".")[-1],
+        "values": {"tags_all": tags or {}},
+    }
+
+
+VALUES = {
+    "id": "i-123",
+    "ebs_block_device": [],
+    "root_block_device": [{"volume_size": 8, "tags": {"Name": "root"}}],
+    "tags_all": {"Name": "web"},
+}
+
+
+class TestFlattenJson:
+    def test_unbounded(self):
+        assert flatten_json(VALUES) == {
+            "id": "i-123",
+            "root_block_device_0_volume_size": 8,
+            "root_block_device_0_tags_Name": "root",
+            "tags_all_Name": "web",
+        }
+
+    def test_keeps_attribute_order(self):
+        assert list(flatten_json(VALUES)) == [
+            "id",
+            "root_block_device_0_volume_size",
+            "root_block_device_0_tags_Name",
+            "tags_all_Name",
+        ]
+
+    def test_max_depth(self):
+        assert flatten_json(VALUES, max_depth=2) == {
+            "id": "i-123",
+            "root_block_device_0": {"volume_size": 8, "tags": {"Name": "root"}},
+            "tags_all_Name": "web",
+        }
+
+    def test_max_depth_top_level(self):
+        assert flatten_json(VALUES, max_depth=1) == VALUES
+
+
+class TestProjectValues:
+    def test_without_globs(self):
+        assert project_values(VALUES, [], []) is VALUES
+
+    def test_include(self):
+        assert project_values(VALUES, ["id", "*_block_device"], []) == {
+            "id": "i-123",
+            "ebs_block_device": [],
+            "root_block_device": [{"volume_size": 8, "tags": {"Name": "root"}}],
+        }
+
+    def test_include_and_exclude(self):
+        assert project_values(VALUES, ["id", "*_block_device"], ["ebs_*"]) == {
+            "id": "i-123",
+            "root_block_device": [{"volume_size": 8, "tags": {"Name": "root"}}],
+        }
+
+
+class TestFilterFunction:
+    def test_no_filters(self):
+        my_filter = filter_function([], [], [])
+        assert my_filter(make_resource("aws_instance.a", "aws_instance"))
+
+    def test_type_list(self):
+        my_filter = filter_function(["aws_instance"], [], [])
+        assert my_filter(make_resource("aws_instance.a", "aws_instance"))
+        assert not my_filter(make_resource("aws_vpc.a", "aws_vpc"))
+
+    def test_address_list(self):
+        my_filter = filter_function([], [], ["^aws_instance\\.web", "db$"])
+        assert my_filter(make_resource("aws_instance.web1", "aws_instance"))
+        assert my_filter(make_resource("aws_instance.db", "aws_instance"))
+        assert not my_filter(make_resource("aws_instance.cache", "aws_instance"))
+
+    def test_address_list_inline_flags(self):
+        my_filter = filter_function([], [], ["(?i)web", "db"])
+        assert my_filter(make_resource("aws_instance.WEB", "aws_instance"))
+        assert my_filter(make_resource("aws_instance.db", "aws_instance"))
+        assert not my_filter(make_resource("aws_instance.DB", "aws_instance"))
+
+    def test_tag_list(self):
+        my_filter = filter_function([], [{"env": "^prod"}, {"role": "web"}], [])
+        assert my_filter(make_resource("aws_instance.a", "aws_instance", {"env": "production"}))
+        assert my_filter(make_resource("aws_instance.b", "aws_instance", {"role": "webserver"}))
+        assert not my_filter(make_resource("aws_instance.c", "aws_instance", {"env": "staging"}))
+        assert not my_filter(make_resource("aws_instance.d", "aws_instance"))
+
+
+class TestLoadShowJson:
+    def test_rejected_resources_are_dropped(self):
+        show = {
+            "format_version": "1.0",
+            "values": {
+                "root_module": {
+                    "resources": [
+                        make_resource("aws_instance.a", "aws_instance"),
+                        make_resource("aws_vpc.a", "aws_vpc"),
+                    ],
+                    "child_modules": [
+                        {
+                            "address": "module.m",
+                            "resources": [make_resource("module.m.aws_vpc.b", "aws_vpc")],
+                        }
+                    ],
+                }
+            },
+        }
+
+        json_data = load_show_json(json.dumps(show), filter_function(["aws_instance"], [], []))
+
+        root_module = json_data["values"]["root_module"]
+        assert [r["address"] for r in root_module["resources"]] == ["aws_instance.a"]
+        assert root_module["child_modules"][0]["resources"] == []
+
+    def test_without_resources(self):
+        json_data = load_show_json(json.dumps({"format_version": "1.0"}), filter_function([], [], []))
+        assert json_data == {"format_version": "1.0"}
+
+
+class TestIterModuleResources:
+    root_module = {
+        "resources": [make_resource("aws_instance.a", "aws_instance")],
+        "child_modules": [
+            {
+                "address": "module.m",
+                "resources": [make_resource("module.m.aws_instance.b", "aws_instance")],
+                "child_modules": [
+                    {
+                        "address": "module.m.module.n",
+                        "resources": [make_resource("module.m.module.n.aws_instance.c", "aws_instance")],
+                    }
+                ],
+            },
+            {
+                "address": "module.o",
+                "resources": [make_resource("module.o.aws_instance.d", "aws_instance")],
+            },
+        ],
+    }
+
+    def test_root_module_only(self):
+        assert [r["address"] for r in iter_module_resources(self.root_module)] == ["aws_instance.a"]
+
+    def test_child_modules(self):
+        assert [r["address"] for r in iter_module_resources(self.root_module, True)] == [
+            "aws_instance.a",
+            "module.m.aws_instance.b",
+            "module.m.module.n.aws_instance.c",
+            "module.o.aws_instance.d",
+        ]
+
+    def test_empty_module(self):
+        assert list(iter_module_resources({}, True)) == []
+
+
+class TestIterPulledResources:
+    state = {
+        "version": 4,
+        "resources": [
+            {
+                "mode": "managed",
+                "type": "aws_instance",
+                "name": "web",
+                "provider": 'provider["registry.terraform.io/hashicorp/aws"]',
+                "instances": [
+                    {"index_key": 0, "attributes": {"id": "i-0"}},
+                    {"index_key": 1, "attributes": {"id": "i-1"}},
+                    {"index_key": 1, "deposed": "00000001", "attributes": {"id": "i-old"}},
+                ],
+            },
+            {
+                "mode": "data",
+                "type": "aws_ami",
+                "name": "image",
+                "instances": [{"attributes": {"id": "ami-1"}}],
+            },
+            {
+                "module": "module.m",
+                "mode": "managed",
+                "type": "aws_instance",
+                "name": "db",
+                "instances": [{"index_key": "a", "attributes": {"id": "i-a"}}],
+            },
+        ],
+    }
+
+    def test_root_module_only(self):
+        resources = list(iter_pulled_resources(self.state))
+
+        assert [r["address"] for r in resources] == ["aws_instance.web[0]", "aws_instance.web[1]", "data.aws_ami.image"]
+        assert resources[0] == {
+            "address": "aws_instance.web[0]",
+            "mode": "managed",
+            "type": "aws_instance",
+            "name": "web",
+            "index": 0,
+            "provider_name": 'provider["registry.terraform.io/hashicorp/aws"]',
+            "values": {"id": "i-0"},
+        }
+
+    def test_child_modules(self):
+        addresses = [r["address"] for r in iter_pulled_resources(self.state, True)]
+        assert addresses[-1] == 'module.m.aws_instance.db["a"]'
+
+    def test_empty_state(self):
+        assert list(iter_pulled_resources({"version": 4})) == []
+
+
+class TestPrepareBackendWorkdir:
+    item = {"path": "/project", "remote_state": {"type": "s3", "bucket": "bucket", "key": "state"}}
+
+    def make_inventory_module(self, mocker):
+        inventory_module = InventoryModule()
+        inventory_module.terraform_binary = "terraform"
+        inventory_module.run_subprocess = mocker.MagicMock(return_value=(0, "", ""))
+        return inventory_module
+
+    def test_initializes_once(self, mocker, monkeypatch, tmp_path):
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+        inventory_module = self.make_inventory_module(mocker)
+
+        workdir, env_update = inventory_module._prepare_backend_workdir(self.item)
+        assert inventory_module._prepare_backend_workdir(self.item) == (workdir, env_update)
+
+        assert workdir.startswith(str(tmp_path))
+        assert env_update == {"TF_DATA_DIR": os.path.join(workdir, ".terraform")}
+        assert os.path.isfile(os.path.join(workdir, "backend_s3_override.tf"))
+        inventory_module.run_subprocess.assert_called_once_with(
+            ["terraform", "init", "-backend-config", "bucket=bucket", "-backend-config", "key=state"],
+            workdir,
+            env_update=env_update,
+        )
+
+    def test_one_workdir_per_remote_state(self, mocker, monkeypatch, tmp_path):
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+        inventory_module = self.make_inventory_module(mocker)
+        other_item = {"path": "/project", "remote_state": {"type": "s3", "bucket": "bucket", "key": "other"}}
+
+        workdir, dummy = inventory_module._prepare_backend_workdir(self.item)
+        other_workdir, dummy = inventory_module._prepare_backend_workdir(other_item)
+
+        assert workdir != other_workdir
+        assert inventory_module.run_subprocess.call_count == 2
+
+    def test_failed_init_is_retried(self, mocker, monkeypatch, tmp_path):
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+        inventory_module = self.make_inventory_module(mocker)
+        inventory_module.run_subprocess.side_effect = [Exception("init failed"), (0, "", "")]
+
+        with pytest.raises(Exception, match="init failed"):
+            inventory_module._prepare_backend_workdir(self.item)
+        inventory_module._prepare_backend_workdir(self.item)
+
+        assert inventory_module.run_subprocess.call_count == 2
+
+    def test_failed_show_initializes_again(self, mocker, monkeypatch, tmp_path):
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+        inventory_module = self.make_inventory_module(mocker)
+        workdir, env_update = inventory_module._prepare_backend_workdir(self.item)
+        show_output = json.dumps({"values": {"root_module": {"resources": []}}})
+        inventory_module.run_subprocess.side_effect = [
+            TerraformInventoryError("provider registry.terraform.io/hashicorp/aws: required by this configuration"),
+            (0, "", ""),
+            (0, show_output, ""),
+        ]
+
+        resources = inventory_module._show_resources(workdir, self.item, lambda r: True, env_update)
+
+        assert list(resources) == []
+        init_cmd = ["terraform", "init", "-backend-config", "bucket=bucket", "-backend-config", "key=state"]
+        assert [call.args[0] for call in inventory_module.run_subprocess.call_args_list] == [
+            init_cmd,
+            ["terraform", "show", "-json"],
+            init_cmd,
+            ["terraform", "show", "-json"],
+        ]
+
+    def test_failed_show_is_not_retried_twice(self, mocker, monkeypatch, tmp_path):
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+        inventory_module = self.make_inventory_module(mocker)
+        workdir, env_update = inventory_module._prepare_backend_workdir(self.item)
+        inventory_module.run_subprocess.side_effect = [
+            TerraformInventoryError('Missing required provider. Please run "terraform init".'),
+            (0, "", ""),
+            TerraformInventoryError('Missing required provider. Please run "terraform init".'),
+        ]
+
+        with pytest.raises(TerraformInventoryError, match="Missing required provider"):
+            inventory_module._show_resources(workdir, self.item, lambda r: True, env_update)
+        assert inventory_module.run_subprocess.call_count == 4
+
+    def test_other_show_errors_are_not_retried(self, mocker, monkeypatch, tmp_path):
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+        inventory_module = self.make_inventory_module(mocker)
+        workdir, env_update = inventory_module._prepare_backend_workdir(self.item)
+        inventory_module.run_subprocess.side_effect = [TerraformInventoryError("AccessDenied: Access Denied")]
+
+        with pytest.raises(TerraformInventoryError, match="AccessDenied"):
+            inventory_module._show_resources(workdir, self.item, lambda r: True, env_update)
+        assert inventory_module.run_subprocess.call_count == 2
+
+    def test_seeded_with_project_configuration(self, mocker, monkeypatch, tmp_path):
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+        project = tmp_path / "project"
+        (project / "modules" / "web").mkdir(parents=True)
+        (project / ".terraform").mkdir()
+        (project / "main.tf").write_text('module "web" { source = "./modules/web" }')
+        (project / "modules" / "web" / "main.tf").write_text("")
+        (project / ".terraform.lock.hcl").write_text('provider "registry.terraform.io/hashicorp/aws" {}')
+        (project / "terraform.tfstate").write_text("{}")
+        item = dict(self.item, path=str(project))
+        inventory_module = self.make_inventory_module(mocker)
+
+        workdir, dummy = inventory_module._prepare_backend_workdir(item)
+
+        assert sorted(os.listdir(workdir)) == [
+            ".ansible-cloud-terraform-initialized",
+            ".ansible-cloud-terraform.lock",
+            ".terraform.lock.hcl",
+            "backend_s3_override.tf",
+            "main.tf",
+            "modules",
+        ]
+        assert os.path.isfile(os.path.join(workdir, "modules", "web", "main.tf"))
+
+        # a project pinning other provider versions gets a working directory of its own
+        (project / ".terraform.lock.hcl").write_text(
+            'provider "registry.terraform.io/hashicorp/aws" { version = "5.0.0" }'
+        )
+        other_workdir, dummy = inventory_module._prepare_backend_workdir(item)
+        assert other_workdir != workdir
+        assert inventory_module.run_subprocess.call_count == 2
+
+
+class TestIncrementalRefresh:
+    item = {"path": "/project"}
+
+    def make_inventory_module(self, mocker, state):
+        inventory_module = InventoryModule()
+        inventory_module.terraform_binary = "terraform"
+        inventory_module.ip_param = ["id"]
+        inventory_module.state_source = "pull"
+        inventory_module.use_cache = True
+        inventory_module.run_subprocess = mocker.MagicMock(return_value=(0, json.dumps(state), ""))
+        return inventory_module
+
+    def make_state(self, serial, web_id="i-1"):
+        return {
+            "version": 4,
+            "serial": serial,
+            "lineage": "lineage",
+            "resources": [
+                {
+                    "mode": "managed",
+                    "type": "aws_instance",
+                    "name": name,
+                    "instances": [{"attributes": {"id": instance_id, "tags_all": {"Name": name}}}],
+                }
+                for name, instance_id in (("web", web_id), ("db", "i-2"))
+            ],
+        }
+
+    def test_unchanged_serial_uses_cached_hosts(self, mocker):
+        inventory_module = self.make_inventory_module(mocker, self.make_state(1))
+        cached_project = inventory_module._parse_project(InventoryData(), self.item, filter_function([], [], []))
+        inventory_module.inventory_from_show = mocker.MagicMock()
+
+        inventory = InventoryData()
+        assert (
+            inventory_module._parse_project(inventory, self.item, filter_function([], [], []), cached_project)
+            is cached_project
+        )
+
+        inventory_module.inventory_from_show.assert_not_called()
+        assert inventory.get_host("aws_instance.web").vars["ansible_host"] == "i-1"
+        assert inventory.get_host("aws_instance.db") in inventory.groups["tag_Name_db"].get_hosts()
+
+    def test_unchanged_serial_skips_init_of_initialized_project(self, mocker, tmp_path):
+        (tmp_path / ".terraform").mkdir()
+        item = {"path": str(tmp_path)}
+        inventory_module = self.make_inventory_module(mocker, self.make_state(1))
+        cached_project = inventory_module._parse_project(InventoryData(), item, filter_function([], [], []))
+        inventory_module.run_subprocess.reset_mock()
+
+        project = inventory_module._parse_project(InventoryData(), item, filter_function([], [], []), cached_project)
+
+        assert project is cached_project
+        assert [call.args[0][1:] for call in inventory_module.run_subprocess.call_args_list] == [["state", "pull"]]
+
+    def test_changed_serial_initializes_project(self, mocker, tmp_path):
+        (tmp_path / ".terraform").mkdir()
+        item = {"path": str(tmp_path)}
+        inventory_module = self.make_inventory_module(mocker, self.make_state(1))
+        cached_project = inventory_module._parse_project(InventoryData(), item, filter_function([], [], []))
+        inventory_module.run_subprocess.reset_mock()
+        inventory_module.run_subprocess.return_value = (0, json.dumps(self.make_state(2)), "")
+
+        project = inventory_module._parse_project(InventoryData(), item, filter_function([], [], []), cached_project)
+
+        assert project["serial"] == 2
+        assert [call.args[0][1] for call in inventory_module.run_subprocess.call_args_list] == ["state", "init"]
+
+    def test_rebuilds_changed_resources_only(self, mocker):
+        inventory_module = self.make_inventory_module(mocker, self.make_state(1))
+        cached_project = inventory_module._parse_project(InventoryData(), self.item, filter_function([], [], []))
+        inventory_module.run_subprocess.return_value = (0, json.dumps(self.make_state(2, web_id="i-3")), "")
+        inventory_module._build_host = mocker.MagicMock(wraps=inventory_module._build_host)
+
+        inventory = InventoryData()
+        project = inventory_module._parse_project(inventory, self.item, filter_function([], [], []), cached_project)
+
+        assert project["serial"] == 2
+        assert [call.args[0]["address"] for call in inventory_module._build_host.call_args_list] == ["aws_instance.web"]
+        assert project["hosts"][1] is cached_project["hosts"][1]
+        assert inventory.get_host("aws_instance.web").vars["ansible_host"] == "i-3"
+        assert inventory.get_host("aws_instance.db").vars["ansible_host"] == "i-2"
+
+
+def test_clean():
+    assert _clean("my-tag value") == "my_tag_value"
+    assert _clean("1st") == "_1st"
+
+
+def test_resolve_config_path(monkeypatch):
+    monkeypatch.setenv("HOME", "/home/user")
+    assert resolve_config_path(None, "/etc/ansible/inventory.tf.yml") is None
+    assert resolve_config_path("~/plugins", "/etc/ansible/inventory.tf.yml") == "/home/user/plugins"
+    assert resolve_config_path("plugins", "/etc/ansible/inventory.tf.yml") == "/etc/ansible/plugins"
+    assert resolve_config_path("/var/plugins", "/etc/ansible/inventory.tf.yml") == "/var/plugins"
@@ -0,0 +1,75 @@
+import os
+
+from ansible_collections.cloud.terraform.plugins.module_utils.coalesce import (
+    RunCoalescer,
+    get_coalesce_lock_path,
+    get_coalesce_path,
+)
+
+
+class TestGetCoalescePath:
+    def test_per_project_and_invocation(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+
+        path = get_coalesce_path("/project", {"state": "present", "targets": []})
+
+        assert os.path.dirname(path) == str(tmp_path / "ansible-cloud-terraform" / "coalesce")
+        assert path == get_coalesce_path("/project", {"targets": [], "state": "present"})
+        assert path != get_coalesce_path("/project", {"state": "absent", "targets": []})
+        assert path != get_coalesce_path("/other", {"state": "present", "targets": []})
+
+    def test_lock_per_project(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+
+        path = get_coalesce_lock_path("/project")
+
+        assert os.path.dirname(path) == str(tmp_path / "ansible-cloud-terraform" / "coalesce")
+        assert path == get_coalesce_lock_path("/project/")
+        assert path != get_coalesce_lock_path("/other")
+
+
+class TestRunCoalescer:
+    def test_without_path(self):
+        with RunCoalescer(None, None) as coalescer:
+            coalescer.record({"changed": True})
+        assert coalescer.result is None
+
+    def test_first_invocation_runs(self, tmp_path):
+        with RunCoalescer(str(tmp_path / "result.json"), str(tmp_path / "project.lock")) as coalescer:
+            assert coalescer.result is None
+
+    def test_reuses_result_finished_while_waiting(self, tmp_path):
+        path = str(tmp_path / "result.json")
+        lock_path = str(tmp_path / "project.lock")
+        waiting = RunCoalescer(path, lock_path)
+        with RunCoalescer(path, lock_path) as first:
+            first.record({"changed": True})
+
+        with waiting:
+            assert waiting.result["result"] == {"changed": True}
+            assert not waiting.result["failed"]
+
+    def test_ignores_result_finished_before_start(self, mocker, tmp_path):
+        path = str(tmp_path / "result.json")
+        lock_path = str(tmp_path / "project.lock")
+        mocker.patch("time.time", return_value=1000.0)
+        with RunCoalescer(path, lock_path) as first:
+            first.record({"changed": True})
+
+        mocker.patch("time.time", return_value=1010.0)
+        with RunCoalescer(path, lock_path, window=30) as within_window:
+            assert within_window.result["result"] == {"changed": True}
+        with RunCoalescer(path, lock_path) as later:
+            assert later.result is None
+        assert not os.path.exists(path)
+
+    def test_shares_failures(self, tmp_path):
+        path = str(tmp_path / "result.json")
+        lock_path = str(tmp_path / "project.lock")
+        waiting = RunCoalescer(path, lock_path)
+        with RunCoalescer(path, lock_path) as first:
+            first.record({"msg": "plan failed"}, failed=True)
+
+        with waiting:
+            assert waiting.result["failed"]
+            assert waiting.result["result"] == {"msg": "plan failed"}
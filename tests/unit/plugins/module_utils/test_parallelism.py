@@ -0,0 +1,70 @@
+import os
+
+from ansible_collections.cloud.terraform.plugins.module_utils.parallelism import (
+    compute_auto_parallelism,
+    count_state_instances,
+    get_parallelism_record_path,
+    is_throttled,
+    make_parallelism_record,
+)
+
+
+def test_get_parallelism_record_path(monkeypatch, tmp_path):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+
+    path = get_parallelism_record_path("/project", "default", None)
+
+    assert os.path.dirname(path) == str(tmp_path / "ansible-cloud-terraform" / "parallelism")
+    assert path != get_parallelism_record_path("/project", "dev", None)
+
+
+class TestCountStateInstances:
+    def test_without_state(self):
+        assert count_state_instances(None) == 0
+
+    def test_counts_managed_instances(self):
+        state = {
+            "resources": [
+                {"mode": "managed", "instances": [{}, {}, {}]},
+                {"mode": "data", "instances": [{}]},
+                {"mode": "managed", "instances": [{}]},
+            ]
+        }
+        assert count_state_instances(state) == 4
+
+
+class TestIsThrottled:
+    def test_throttled(self):
+        assert is_throttled("Error: ThrottlingException: Rate exceeded")
+        assert is_throttled("googleapi: Error 429: Too Many Requests")
+        assert is_throttled("Error: unexpected response, StatusCode: 429")
+
+    def test_not_throttled(self):
+        assert not is_throttled("Error: Invalid resource type")
+        assert not is_throttled("aws_instance.web: Creation complete after 12s [id=429]")
+        assert not is_throttled("module.db: listening on port 429, 429 resources refreshed")
+
+
+class TestComputeAutoParallelism:
+    def test_small_state_uses_default(self):
+        assert compute_auto_parallelism(5, 4, None) == 10
+
+    def test_scales_with_resources(self):
+        assert compute_auto_parallelism(1000, 8, None) == 50
+
+    def test_bounded_by_cpus(self):
+        assert compute_auto_parallelism(1000, 2, None) == 16
+
+    def test_bounded_by_maximum(self):
+        assert compute_auto_parallelism(100000, 64, None) == 256
+
+    def test_halves_after_throttling(self):
+        assert compute_auto_parallelism(1000, 8, make_parallelism_record(40, True)) == 20
+        assert compute_auto_parallelism(1000, 8, make_parallelism_record(1, True)) == 1
+
+    def test_grows_back_after_throttling(self):
+        assert compute_auto_parallelism(1000, 8, make_parallelism_record(20, False)) == 40
+        assert compute_auto_parallelism(1000, 8, make_parallelism_record(40, False)) == 50
+
+    def test_ignores_invalid_record(self):
+        assert compute_auto_parallelism(1000, 8, {"parallelism": "x"}) == 50
@@ -0,0 +1,100 @@
+import os
+
+from ansible_collections.cloud.terraform.plugins.module_utils.plugin_cache import (
+    RECENTLY_USED_SECONDS,
+    evict_plugin_cache,
+    get_plugin_cache_environment,
+    get_used_provider_versions,
+    managed_plugin_cache,
+)
+
+PROVIDER = "registry.terraform.io/hashicorp/aws"
+
+
+def make_version(cache_dir, provider, version, size, mtime):
+    version_dir = cache_dir / provider / version / "linux_amd64"
+    version_dir.mkdir(parents=True)
+    (version_dir / "terraform-provider_v{0}".format(version)).write_bytes(b"x" * size)
+    os.utime(cache_dir / provider / version, (mtime, mtime))
+
+
+class TestGetPluginCacheEnvironment:
+    def test_without_cache_dir(self):
+        assert get_plugin_cache_environment(None) == {}
+
+    def test_with_cache_dir(self):
+        assert get_plugin_cache_environment("/cache") == {
+            "TF_PLUGIN_CACHE_DIR": "/cache",
+            "CHECKPOINT_DISABLE": "1",
+        }
+
+
+class TestEvictPluginCache:
+    def test_under_limit(self, tmp_path):
+        make_version(tmp_path, PROVIDER, "5.0.0", 10, 1000)
+        make_version(tmp_path, PROVIDER, "5.1.0", 10, 2000)
+
+        assert evict_plugin_cache(str(tmp_path), 100) == []
+
+    def test_evicts_oldest_first(self, tmp_path):
+        make_version(tmp_path, PROVIDER, "4.0.0", 10, 1000)
+        make_version(tmp_path, PROVIDER, "5.0.0", 10, 3000)
+        make_version(tmp_path, PROVIDER, "5.1.0", 10, 2000)
+
+        removed = evict_plugin_cache(str(tmp_path), 20)
+
+        assert removed == [str(tmp_path / PROVIDER / "4.0.0")]
+        assert sorted(os.listdir(tmp_path / PROVIDER)) == ["5.0.0", "5.1.0"]
+
+    def test_keeps_newest_and_used_versions(self, tmp_path):
+        make_version(tmp_path, PROVIDER, "4.0.0", 10, 1000)
+        make_version(tmp_path, PROVIDER, "5.0.0", 10, 2000)
+        make_version(tmp_path, PROVIDER, "5.1.0", 10, 3000)
+
+        removed = evict_plugin_cache(str(tmp_path), 0, keep={(PROVIDER, "4.0.0")})
+
+        assert removed == [str(tmp_path / PROVIDER / "5.0.0")]
+        assert sorted(os.listdir(tmp_path / PROVIDER)) == ["4.0.0", "5.1.0"]
+
+    def test_keeps_recently_used_versions(self, tmp_path):
+        make_version(tmp_path, PROVIDER, "4.0.0", 10, 1000)
+        make_version(tmp_path, PROVIDER, "5.0.0", 10, 1000 + RECENTLY_USED_SECONDS)
+        make_version(tmp_path, PROVIDER, "5.1.0", 10, 3000)
+
+        removed = evict_plugin_cache(str(tmp_path), 0, now=2000 + RECENTLY_USED_SECONDS)
+
+        assert removed == [str(tmp_path / PROVIDER / "4.0.0")]
+        assert sorted(os.listdir(tmp_path / PROVIDER)) == ["5.0.0", "5.1.0"]
+
+
+class TestManagedPluginCache:
+    def test_without_cache_dir(self, tmp_path):
+        with managed_plugin_cache(None, 0, str(tmp_path)) as evicted:
+            pass
+        assert evicted == []
+
+    def test_evicts_unused_versions(self, tmp_path):
+        cache_dir = tmp_path / "cache"
+        project_dir = tmp_path / "project"
+        make_version(cache_dir, PROVIDER, "5.0.0", 1024 * 1024, 1000)
+        make_version(cache_dir, PROVIDER, "5.1.0", 1024 * 1024, 2000)
+        make_version(project_dir / ".terraform" / "providers", PROVIDER, "5.1.0", 1, 2000)
+
+        with managed_plugin_cache(str(cache_dir), 1, str(project_dir)) as evicted:
+            assert get_used_provider_versions(str(project_dir / ".terraform")) == {(PROVIDER, "5.1.0")}
+
+        assert evicted == [str(cache_dir / PROVIDER / "5.0.0")]
+
+    def test_marks_used_versions(self, tmp_path):
+        cache_dir = tmp_path / "cache"
+        project_dir = tmp_path / "project"
+        make_version(cache_dir, PROVIDER, "5.0.0", 1024 * 1024, 1000)
+        make_version(cache_dir, PROVIDER, "5.1.0", 1024 * 1024, 2000)
+        make_version(project_dir / ".terraform" / "providers", PROVIDER, "5.0.0", 1, 1000)
+
+        with managed_plugin_cache(str(cache_dir), None, str(project_dir)) as evicted:
+            pass
+
+        assert evicted == []
+        assert os.path.getmtime(cache_dir / PROVIDER / "5.0.0") > 2000
+        assert os.path.getmtime(cache_dir / PROVIDER / "5.1.0") == 2000
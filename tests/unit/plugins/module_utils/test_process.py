@@ -0,0 +1,66 @@
+import os
+import time
+
+import pytest
+from ansible_collections.cloud.terraform.plugins.module_utils.errors import TerraformError, TerraformTimeoutError
+from ansible_collections.cloud.terraform.plugins.module_utils.process import SubprocessRunCommand, run_process
+
+
+def is_running(pid):
+    try:
+        with open("/proc/{0}/stat".format(pid)) as f:
+            # a killed process whose new parent did not reap it yet is a zombie
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+class TestRunProcess:
+    def test_run(self):
+        assert run_process(["sh", "-c", "echo out; echo err >&2; exit 2"], timeout=10) == (2, b"out\n", b"err\n")
+
+    @pytest.mark.skipif(not os.path.isdir("/proc"), reason="requires /proc")
+    def test_timeout_stops_process_group(self, tmp_path):
+        pid_file = tmp_path / "child.pid"
+        started = time.monotonic()
+
+        with pytest.raises(TerraformTimeoutError, match="timed out after 0.5 seconds") as e:
+            run_process(["sh", "-c", "sleep 30 & echo $! > {0}; wait".format(pid_file)], timeout=0.5)
+
+        assert time.monotonic() - started < 10
+        assert e.value.kwargs["timed_out"]
+        assert e.value.kwargs["timeout"] == 0.5
+        # the children of the command are stopped with it
+        time.sleep(0.1)
+        assert not is_running(int(pid_file.read_text()))
+
+    def test_timeout_kills_after_grace_period(self):
+        started = time.monotonic()
+
+        with pytest.raises(TerraformTimeoutError):
+            run_process(["sh", "-c", "trap '' INT; sleep 30"], timeout=0.5, grace_period=0.5)
+
+        assert time.monotonic() - started < 10
+
+
+class TestSubprocessRunCommand:
+    def test_run(self, tmp_path):
+        run_command = SubprocessRunCommand({"TF_WORKSPACE": "dev"})
+
+        rc, stdout, stderr = run_command(["sh", "-c", 'pwd; echo "$TF_WORKSPACE" >&2', None], cwd=str(tmp_path))
+
+        assert rc == 0
+        assert stdout == str(tmp_path) + "\n"
+        assert stderr == "dev\n"
+
+    def test_check_rc(self):
+        run_command = SubprocessRunCommand()
+
+        assert run_command(["sh", "-c", "exit 3"])[0] == 3
+        with pytest.raises(TerraformError, match="failed") as e:
+            run_command(["sh", "-c", "echo failed >&2; exit 3"], check_rc=True)
+        assert e.value.kwargs["rc"] == 3
+
+    def test_timeout(self):
+        with pytest.raises(TerraformTimeoutError):
+            SubprocessRunCommand()(["sleep", "30"], timeout=0.2)
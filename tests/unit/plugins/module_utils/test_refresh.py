@@ -0,0 +1,46 @@
+import os
+
+from ansible_collections.cloud.terraform.plugins.module_utils.models import TerraformStateSerial
+from ansible_collections.cloud.terraform.plugins.module_utils.refresh import (
+    get_refresh_record_path,
+    is_refresh_fresh,
+    make_refresh_record,
+)
+
+SERIAL = TerraformStateSerial(serial=3, lineage="lineage")
+
+
+class TestGetRefreshRecordPath:
+    def test_per_project_and_workspace(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+
+        path = get_refresh_record_path("/project", "default", None)
+
+        assert os.path.dirname(path) == str(tmp_path / "ansible-cloud-terraform" / "refresh")
+        assert path == get_refresh_record_path("/project", "default", None)
+        assert path != get_refresh_record_path("/project", "dev", None)
+        assert path != get_refresh_record_path("/other", "default", None)
+        assert path != get_refresh_record_path("/project", "default", "/project/other.tfstate")
+
+
+class TestIsRefreshFresh:
+    def test_fresh(self):
+        assert is_refresh_fresh(make_refresh_record(1000.0, SERIAL), SERIAL, 300, 1200.0)
+
+    def test_expired(self):
+        assert not is_refresh_fresh(make_refresh_record(1000.0, SERIAL), SERIAL, 300, 1300.0)
+
+    def test_in_the_future(self):
+        assert not is_refresh_fresh(make_refresh_record(1000.0, SERIAL), SERIAL, 300, 900.0)
+
+    def test_serial_changed(self):
+        serial = TerraformStateSerial(serial=4, lineage="lineage")
+        assert not is_refresh_fresh(make_refresh_record(1000.0, SERIAL), serial, 300, 1200.0)
+
+    def test_lineage_changed(self):
+        serial = TerraformStateSerial(serial=3, lineage="other")
+        assert not is_refresh_fresh(make_refresh_record(1000.0, SERIAL), serial, 300, 1200.0)
+
+    def test_without_record_or_state(self):
+        assert not is_refresh_fresh(None, SERIAL, 300, 1200.0)
+        assert not is_refresh_fresh(make_refresh_record(1000.0, SERIAL), None, 300, 1200.0)
@@ -0,0 +1,75 @@
+from unittest.mock import MagicMock
+
+import pytest
+from ansible_collections.cloud.terraform.plugins.module_utils.retry import (
+    backoff_delays,
+    is_lock_error,
+    is_transient_error,
+    run_with_retries,
+)
+
+
+class TestIsLockError:
+    def test_lock_error(self):
+        assert is_lock_error("Error: Error acquiring the state lock\n\nError message: ConditionalCheckFailedException")
+
+    def test_other_error(self):
+        assert not is_lock_error("Error: Invalid reference")
+
+
+class TestIsTransientError:
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "Error: Failed to query available provider packages: could not connect to registry.terraform.io: "
+            'failed to request discovery document: Get "https://registry.terraform.io/.well-known/terraform.json": '
+            "net/http: request canceled (Client.Timeout exceeded while awaiting headers)",
+            "Error: error loading state: SlowDown: Please reduce your request rate. status code: 503",
+            "Error: Failed to get existing workspaces: RequestError: send request failed: read: connection reset by peer",
+            'Error: Failed to install provider: Get "https://releases.hashicorp.com/": net/http: TLS handshake timeout',
+            "Error: Error refreshing state: AccessDenied: StatusCode=503, RequestId=abc",
+            "Error: Failed to query available provider packages: 429 Too Many Requests",
+        ],
+    )
+    def test_transient(self, text):
+        assert is_transient_error(text)
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "Error: Unsupported block type",
+            'Error: Failed to query available provider packages: provider registry registry.terraform.io does not have a provider named "hashicorp/nope"',
+            'Error: Unsupported block type\n\nBlocks of type "timeouts" are not expected here.',
+            'Error: Unsupported argument\n\nAn argument named "lock_timeout" is not expected here.',
+            "Error: Invalid value for variable\n\nThe instance count must be between 1 and 500.",
+        ],
+    )
+    def test_not_transient(self, text):
+        assert not is_transient_error(text)
+
+
+class TestRunWithRetries:
+    def test_retries_until_success(self, mocker):
+        sleep = mocker.patch("time.sleep")
+        run = MagicMock(side_effect=[(1, "", "503 Service Unavailable"), (0, "ok", "")])
+
+        assert run_with_retries(run, 3, is_transient_error) == (0, "ok", "")
+        assert sleep.call_count == 1
+
+    def test_gives_up(self, mocker):
+        mocker.patch("time.sleep")
+        run = MagicMock(return_value=(1, "", "503 Service Unavailable"))
+
+        assert run_with_retries(run, 2, is_transient_error) == (1, "", "503 Service Unavailable")
+        assert run.call_count == 3
+
+
+class TestBackoffDelays:
+    def test_exponential_up_to_maximum(self):
+        assert list(backoff_delays(5, base_delay=2.0, max_delay=10.0, rand=lambda: 1.0)) == [2.0, 4.0, 8.0, 10.0, 10.0]
+
+    def test_jitter(self):
+        assert list(backoff_delays(3, base_delay=2.0, max_delay=10.0, rand=lambda: 0.5)) == [1.0, 2.0, 4.0]
+
+    def test_no_retries(self):
+        assert list(backoff_delays(0)) == []
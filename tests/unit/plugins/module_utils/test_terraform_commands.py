@@ -1,7 +1,10 @@
+import os
+import threading
 from unittest.mock import MagicMock
 
 import pytest
 from ansible.module_utils.compat.version import LooseVersion
+from ansible_collections.cloud.terraform.plugins.module_utils.errors import TerraformError, TerraformWarning
 from ansible_collections.cloud.terraform.plugins.module_utils.terraform_commands import (
     TerraformCommands,
     WorkspaceCommand,
@@ -15,6 +18,7 @@ class TestTerraformCommands:
         self.rc, self.stdout, self.stderr = 0, "", ""
 
     def test_run(self):
+        self.mock.return_value = (self.rc, self.stdout, self.stderr)
         args = ["apply", "-no-color", "-input=false"]
         self.tf._run(*args, check_rc=False)
 
@@ -54,6 +58,7 @@ class TestTerraformCommands:
 
     # Test init method; NOT __init__
     def test_init(self):
+        self.mock.return_value = (self.rc, self.stdout, self.stderr)
         self.tf._run = self.mock
         self.tf.init(
             backend_config={"test_val": "test"},
@@ -77,7 +82,41 @@ class TestTerraformCommands:
             "/plugin/path",
         ]
 
-        self.mock.assert_called_with(*expected_cmd, check_rc=True)
+        self.mock.assert_called_with(*expected_cmd, check_rc=False)
+
+    def test_init_failure(self):
+        self.mock.return_value = (1, "", "Error: Unsupported block type")
+        self.tf._run = self.mock
+
+        with pytest.raises(TerraformError, match="Unsupported block type"):
+            self.tf.init({}, [], False, False, [])
+
+    def test_init_retries_transient_errors(self, mocker):
+        sleep = mocker.patch("time.sleep")
+        self.tf.transient_retries = 3
+        self.mock.side_effect = [
+            (1, "", "Error: Failed to query available provider packages: could not connect to registry: i/o timeout"),
+            (1, "", "Error: error configuring S3 Backend: SlowDown: Please reduce your request rate."),
+            (0, "", ""),
+        ]
+        self.tf._run = self.mock
+
+        self.tf.init({}, [], False, False, [])
+
+        assert self.mock.call_count == 3
+        assert sleep.call_count == 2
+
+    def test_init_does_not_retry_other_errors(self, mocker):
+        sleep = mocker.patch("time.sleep")
+        self.tf.transient_retries = 3
+        self.mock.return_value = (1, "", "Error: Unsupported block type")
+        self.tf._run = self.mock
+
+        with pytest.raises(TerraformError):
+            self.tf.init({}, [], False, False, [])
+
+        assert self.mock.call_count == 1
+        sleep.assert_not_called()
 
     def test_plan(self):
         self.mock.return_value = (self.rc, self.stdout, self.stderr)
@@ -107,6 +146,238 @@ class TestTerraformCommands:
 
         self.mock.assert_called_with(*expected_cmd, check_rc=False)
 
+    @pytest.mark.parametrize(
+        "refresh, refresh_only, expected_arg",
+        [(False, False, "-refresh=false"), (True, True, "-refresh-only"), (False, True, "-refresh-only")],
+    )
+    def test_plan_refresh(self, refresh, refresh_only, expected_arg):
+        self.mock.return_value = (self.rc, self.stdout, self.stderr)
+        self.tf._run = self.mock
+        self.tf.plan(
+            target_plan_file_path="/target/plan/file",
+            targets=[],
+            destroy=False,
+            state_args=[],
+            variables_args=[],
+            refresh=refresh,
+            refresh_only=refresh_only,
+        )
+
+        args = self.mock.call_args.args
+        assert args[-1] == expected_arg
+        assert len([arg for arg in args if arg.startswith("-refresh")]) == 1
+
+    def test_plan_parallelism(self):
+        self.mock.return_value = (self.rc, self.stdout, self.stderr)
+        self.tf._run = self.mock
+        self.tf.plan(
+            target_plan_file_path="/target/plan/file",
+            targets=[],
+            destroy=False,
+            state_args=[],
+            variables_args=[],
+            parallelism=4,
+        )
+
+        assert "-parallelism=4" in self.mock.call_args.args
+
+    def test_plan_lock_timeout(self):
+        self.mock.return_value = (self.rc, self.stdout, self.stderr)
+        self.tf._run = self.mock
+        self.tf.plan(
+            target_plan_file_path="/target/plan/file",
+            targets=[],
+            destroy=False,
+            state_args=[],
+            variables_args=[],
+            lock=False,
+            lock_timeout=30,
+        )
+
+        args = self.mock.call_args.args
+        assert "-lock=false" in args
+        assert "-lock-timeout=30s" in args
+
+    def test_plan_retries_held_lock(self, mocker):
+        sleep = mocker.patch("time.sleep")
+        self.tf.lock_retries = 3
+        self.mock.side_effect = [
+            (1, "", "Error: Error acquiring the state lock"),
+            (1, "", "Error: Error acquiring the state lock"),
+            (2, "", ""),
+        ]
+        self.tf._run = self.mock
+
+        changed, any_destroyed, stdout, stderr = self.tf.plan(
+            target_plan_file_path="/target/plan/file",
+            targets=[],
+            destroy=False,
+            state_args=[],
+            variables_args=[],
+        )
+
+        assert changed
+        assert self.mock.call_count == 3
+        assert sleep.call_count == 2
+
+    def test_plan_gives_up_on_held_lock(self, mocker):
+        sleep = mocker.patch("time.sleep")
+        self.tf.lock_retries = 2
+        self.mock.return_value = (1, "", "Error: Error acquiring the state lock")
+        self.tf._run = self.mock
+
+        with pytest.raises(TerraformError, match="acquiring the state lock"):
+            self.tf.plan(
+                target_plan_file_path="/target/plan/file",
+                targets=[],
+                destroy=False,
+                state_args=[],
+                variables_args=[],
+            )
+        assert self.mock.call_count == 3
+        assert sleep.call_count == 2
+
+    def test_apply_plan_does_not_retry_other_errors(self, mocker):
+        sleep = mocker.patch("time.sleep")
+        self.tf.lock_retries = 2
+        self.mock.return_value = (1, "", "Error: Saved plan is stale")
+        self.tf._run = self.mock
+
+        with pytest.raises(TerraformError, match="stale"):
+            self.tf.apply_plan(
+                plan_file_path="/plan/path",
+                version=LooseVersion("1.5.0"),
+                parallelism=None,
+                lock=True,
+                lock_timeout=None,
+                targets=[],
+                needs_application=True,
+            )
+        assert self.mock.call_count == 1
+        sleep.assert_not_called()
+
+    def test_refresh(self):
+        self.mock.return_value = (self.rc, self.stdout, self.stderr)
+        self.tf._run = self.mock
+        self.tf.refresh(targets=["aws_instance.web"], state_args=["state_arg"], variables_args=["var_arg"])
+
+        expected_cmd = [
+            "apply",
+            "-refresh-only",
+            "-auto-approve",
+            "-lock=true",
+            "-input=false",
+            "-no-color",
+            "-target",
+            "aws_instance.web",
+            "state_arg",
+            "var_arg",
+        ]
+
+        self.mock.assert_called_with(*expected_cmd, check_rc=False)
+
+    def test_refresh_lock(self):
+        self.mock.return_value = (self.rc, self.stdout, self.stderr)
+        self.tf._run = self.mock
+        self.tf.refresh(targets=[], state_args=[], variables_args=[], lock=False, lock_timeout=30)
+
+        self.mock.assert_called_with(
+            "apply",
+            "-refresh-only",
+            "-auto-approve",
+            "-lock=false",
+            "-input=false",
+            "-no-color",
+            "-lock-timeout=30s",
+            check_rc=False,
+        )
+
+    def test_refresh_failure(self):
+        self.mock.return_value = (1, "", "Error: failed to refresh")
+        self.tf._run = self.mock
+
+        with pytest.raises(TerraformError, match="failed to refresh"):
+            self.tf.refresh(targets=[], state_args=[], variables_args=[])
+
+    def test_state_serial(self):
+        self.mock.return_value = (0, '{"version": 4, "serial": 7, "lineage": "abc", "resources": []}', "")
+        self.tf._run = self.mock
+
+        serial = self.tf.state_serial(None)
+
+        self.mock.assert_called_with("state", "pull", check_rc=False)
+        assert (serial.serial, serial.lineage) == (7, "abc")
+
+    def test_state_serial_without_state(self):
+        self.mock.return_value = (0, "", "")
+        self.tf._run = self.mock
+
+        assert self.tf.state_serial(None) is None
+
+    def test_state_serial_from_state_file(self, tmp_path):
+        state_file = tmp_path / "terraform.tfstate"
+        state_file.write_text('{"version": 4, "serial": 2, "lineage": "def"}')
+        self.tf._run = self.mock
+
+        serial = self.tf.state_serial(str(state_file))
+
+        self.mock.assert_not_called()
+        assert (serial.serial, serial.lineage) == (2, "def")
+
+    def test_state_pull_invalid_json(self):
+        self.mock.return_value = (0, "not json", "")
+        self.tf._run = self.mock
+
+        assert self.tf.state_pull(None) is None
+
+    def test_run_concurrently(self):
+        concurrent_mock = MagicMock(return_value=(0, "", ""))
+        self.tf.subprocess_run_command_fp = concurrent_mock
+        barrier = threading.Barrier(2, timeout=5)
+
+        def probe(name):
+            # both probes have to be running at the same time to get past the barrier
+            barrier.wait()
+            self.tf._run(name, check_rc=False)
+            return name
+
+        results = self.tf.run_concurrently({"a": lambda: probe("a"), "b": lambda: probe("b")})
+
+        assert {name: future.result() for name, future in results.items()} == {"a": "a", "b": "b"}
+        assert concurrent_mock.call_count == 2
+        self.mock.assert_not_called()
+
+    def test_run_concurrently_errors(self):
+        self.tf.subprocess_run_command_fp = MagicMock(return_value=(1, "", "error"))
+
+        results = self.tf.run_concurrently({"workspaces": self.tf.workspace_list, "version": lambda: "1.5.0"})
+
+        assert results["version"].result() == "1.5.0"
+        with pytest.raises(TerraformWarning):
+            results["workspaces"].result()
+
+    def test_run_concurrently_without_concurrent_runner(self):
+        self.mock.return_value = (0, "* default\n", "")
+
+        results = self.tf.run_concurrently({"workspaces": self.tf.workspace_list})
+
+        assert results["workspaces"].result().current == "default"
+        self.mock.assert_called_once()
+
+    def test_timeouts(self):
+        subprocess_mock = MagicMock(return_value=(0, "", ""))
+        self.tf.subprocess_run_command_fp = subprocess_mock
+        self.tf.timeouts = {"init": 60}
+        self.mock.return_value = (0, "", "")
+
+        self.tf.init({}, [], False, False, [])
+        self.tf.validate(LooseVersion("0.14.0"), [])
+
+        subprocess_mock.assert_called_once_with(
+            ["/binary/path", "init", "-input=false", "-no-color"], cwd="/project/path", check_rc=False, timeout=60
+        )
+        self.mock.assert_called_once_with(["/binary/path", "validate"], cwd="/project/path", check_rc=True)
+
     def test_providers_schema(self):
         self.stdout = '{"format_version":"1.0"}'
         self.mock.return_value = (self.rc, self.stdout, self.stderr)
@@ -166,3 +437,113 @@ class TestTerraformCommands:
         self.tf.workspace_list()
         expected_cmd = ["workspace", "list", "-no-color"]
         self.mock.assert_called_with(*expected_cmd, check_rc=False)
+
+
+class TestTerraformCommandsVersionCache:
+    version_stdout = '{"terraform_version": "1.3.6", "platform": "linux_amd64"}'
+
+    @pytest.fixture
+    def binary(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+        binary = tmp_path / "terraform"
+        binary.write_text("#!/bin/sh\n")
+        binary.chmod(0o755)
+        return binary
+
+    def test_version_is_cached(self, binary):
+        mock = MagicMock(return_value=(0, self.version_stdout, ""))
+        tf = TerraformCommands(mock, "/project/path", str(binary), False)
+
+        assert tf.version() == LooseVersion("1.3.6")
+        assert TerraformCommands(mock, "/other/path", str(binary), False).version() == LooseVersion("1.3.6")
+
+        mock.assert_called_once_with([str(binary), "version", "-json"], cwd="/project/path", check_rc=True)
+
+    def test_changed_binary_invalidates_cache(self, binary):
+        mock = MagicMock(return_value=(0, self.version_stdout, ""))
+        tf = TerraformCommands(mock, "/project/path", str(binary), False)
+        tf.version()
+
+        mock.return_value = (0, '{"terraform_version": "1.5.0"}', "")
+        stat = binary.stat()
+        os.utime(binary, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+
+        assert tf.version() == LooseVersion("1.5.0")
+        assert mock.call_count == 2
+
+
+class TestTerraformCommandsValidateCache:
+    @pytest.fixture
+    def project(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+        monkeypatch.delenv("TF_DATA_DIR", raising=False)
+        binary = tmp_path / "terraform"
+        binary.write_text("#!/bin/sh\n")
+        binary.chmod(0o755)
+        project = tmp_path / "project"
+        (project / "modules" / "network").mkdir(parents=True)
+        (project / "tests").mkdir()
+        (project / ".terraform" / "modules").mkdir(parents=True)
+        (project / ".terraform" / "modules" / "modules.json").write_text(
+            '{"Modules": [{"Key": "", "Dir": "."}, {"Key": "network", "Dir": "modules/network"}]}'
+        )
+        (project / "main.tf").write_text('module "network" { source = "./modules/network" }\n')
+        (project / "modules" / "network" / "main.tf").write_text('resource "null_resource" "a" {}\n')
+        (project / "main.tftest.hcl").write_text('run "plan" { command = plan }\n')
+        (project / "tests" / "network.tftest.hcl").write_text('run "apply" {}\n')
+        (project / ".terraform.lock.hcl").write_text("# lock\n")
+        return binary, project
+
+    def validate(self, mock, binary, project):
+        TerraformCommands(mock, str(project), str(binary), False).validate(LooseVersion("1.5.0"), [])
+
+    def test_passing_result_is_cached(self, project):
+        binary, project = project
+        mock = MagicMock(return_value=(0, "", ""))
+
+        self.validate(mock, binary, project)
+        self.validate(mock, binary, project)
+
+        mock.assert_called_once_with([str(binary), "validate"], cwd=str(project), check_rc=True)
+
+    @pytest.mark.parametrize(
+        "changed_file",
+        [
+            "main.tf",
+            "modules/network/main.tf",
+            "main.tftest.hcl",
+            "tests/network.tftest.hcl",
+            ".terraform.lock.hcl",
+            ".terraform/modules/modules.json",
+        ],
+    )
+    def test_change_validates_again(self, project, changed_file):
+        binary, project = project
+        mock = MagicMock(return_value=(0, "", ""))
+        self.validate(mock, binary, project)
+
+        with open(project / changed_file, "a") as f:
+            f.write("\n")
+        self.validate(mock, binary, project)
+
+        assert mock.call_count == 2
+
+    def test_new_file_validates_again(self, project):
+        binary, project = project
+        mock = MagicMock(return_value=(0, "", ""))
+        self.validate(mock, binary, project)
+
+        (project / "outputs.tf").write_text('output "a" { value = 1 }\n')
+        self.validate(mock, binary, project)
+
+        assert mock.call_count == 2
+
+    def test_failure_is_not_cached(self, project):
+        binary, project = project
+        mock = MagicMock(side_effect=[TerraformError("invalid"), (0, "", "")])
+
+        with pytest.raises(TerraformError):
+            self.validate(mock, binary, project)
+        self.validate(mock, binary, project)
+
+        assert mock.call_count == 2
@@ -0,0 +1,78 @@
+from unittest.mock import MagicMock
+
+import pytest
+from ansible_collections.cloud.terraform.plugins.module_utils.errors import TerraformError, TerraformTimeoutError
+from ansible_collections.cloud.terraform.plugins.module_utils.timing import TimedRunCommand, get_command_name
+
+
+@pytest.mark.parametrize(
+    "args, expected_name",
+    [
+        (["terraform", "plan", "-out", "plan.tfplan"], "plan"),
+        (["terraform", "providers", "schema", "-json"], "providers schema"),
+        (["terraform", "workspace", "select", "dev"], "workspace select"),
+        (["terraform", "-chdir=project", "init"], "init"),
+        (["terraform"], ""),
+    ],
+)
+def test_get_command_name(args, expected_name):
+    assert get_command_name(args) == expected_name
+
+
+class TestTimedRunCommand:
+    def test_records_timing(self):
+        run_command_fp = MagicMock(return_value=(2, "čšž", "err"))
+        run_command = TimedRunCommand(run_command_fp)
+
+        result = run_command(["terraform", "plan", "-no-color"], cwd="/project/path", check_rc=False)
+
+        assert result == (2, "čšž", "err")
+        run_command_fp.assert_called_once_with(["terraform", "plan", "-no-color"], cwd="/project/path", check_rc=False)
+        timings = run_command.to_list()
+        assert len(timings) == 1
+        assert timings[0]["command"] == "plan"
+        assert timings[0]["rc"] == 2
+        assert timings[0]["stdout_bytes"] == 6
+        assert timings[0]["stderr_bytes"] == 3
+        assert timings[0]["duration"] >= 0
+
+    def test_sharing_records_together(self):
+        run_command = TimedRunCommand(MagicMock(return_value=(0, "", "")))
+        shared = run_command.sharing(MagicMock(return_value=(0, "out", "")))
+
+        run_command(["terraform", "version"])
+        shared(["terraform", "show", "-json"])
+
+        assert [timing.command for timing in run_command.timings] == ["version", "show"]
+
+    def test_records_timed_out_command(self):
+        run_command = TimedRunCommand(
+            MagicMock(side_effect=TerraformTimeoutError("timed out", rc=-2, stdout="partial", stderr=""))
+        )
+
+        with pytest.raises(TerraformTimeoutError):
+            run_command(["terraform", "apply"])
+
+        assert [(timing.command, timing.rc, timing.stdout_bytes) for timing in run_command.timings] == [
+            ("apply", -2, 7)
+        ]
+
+    def test_records_failed_command(self):
+        run_command = TimedRunCommand(
+            MagicMock(side_effect=TerraformError("Error: Invalid reference", rc=1, stdout="", stderr="Error: x"))
+        )
+
+        with pytest.raises(TerraformError):
+            run_command(["terraform", "validate"])
+
+        assert [(timing.command, timing.rc, timing.stderr_bytes) for timing in run_command.timings] == [
+            ("validate", 1, 8)
+        ]
+
+    def test_records_command_raising_other_errors(self):
+        run_command = TimedRunCommand(MagicMock(side_effect=OSError("No such file or directory")))
+
+        with pytest.raises(OSError):
+            run_command(["terraform", "init"])
+
+        assert [(timing.command, timing.rc) for timing in run_command.timings] == [("init", -1)]
@@ -0,0 +1,75 @@
+import json
+import threading
+
+import pytest
+from ansible_collections.cloud.terraform.plugins.module_utils.errors import TerraformError
+from ansible_collections.cloud.terraform.plugins.module_utils.tracing import Tracer
+
+
+def read_spans(trace_file):
+    spans = []
+    for line in trace_file.read_text().splitlines():
+        request = json.loads(line)
+        spans.extend(request["resourceSpans"][0]["scopeSpans"][0]["spans"])
+    return spans
+
+
+class TestTracer:
+    def test_disabled(self, tmp_path):
+        tracer = Tracer(None)
+        with tracer.span("terraform", project="/project/path") as span:
+            span.set_attribute("changed", True)
+
+        assert not tracer.enabled
+        assert list(tmp_path.iterdir()) == []
+
+    def test_nested_spans(self, tmp_path):
+        trace_file = tmp_path / "trace.jsonl"
+        tracer = Tracer(str(trace_file))
+        with tracer.span("terraform", project="/project/path") as root:
+            with tracer.span("terraform plan") as child:
+                child.set_attribute("rc", 2)
+            root.set_attribute("changed", True)
+
+        plan, terraform = read_spans(trace_file)
+        assert terraform["name"] == "terraform"
+        assert terraform["parentSpanId"] == ""
+        assert terraform["attributes"] == [
+            {"key": "project", "value": {"stringValue": "/project/path"}},
+            {"key": "changed", "value": {"boolValue": True}},
+        ]
+        assert plan["name"] == "terraform plan"
+        assert plan["parentSpanId"] == terraform["spanId"]
+        assert plan["traceId"] == terraform["traceId"]
+        assert plan["attributes"] == [{"key": "rc", "value": {"intValue": "2"}}]
+        assert plan["status"] == {"code": 1}
+        assert int(terraform["startTimeUnixNano"]) <= int(plan["startTimeUnixNano"])
+        assert int(plan["endTimeUnixNano"]) <= int(terraform["endTimeUnixNano"])
+
+    def test_error_status(self, tmp_path):
+        trace_file = tmp_path / "trace.jsonl"
+        tracer = Tracer(str(trace_file))
+        with pytest.raises(TerraformError):
+            with tracer.span("terraform apply"):
+                raise TerraformError("apply failed")
+
+        (span,) = read_spans(trace_file)
+        assert span["status"] == {"code": 2, "message": "apply failed"}
+        assert tracer.current_span() is None
+
+    def test_activate_in_other_thread(self, tmp_path):
+        trace_file = tmp_path / "trace.jsonl"
+        tracer = Tracer(str(trace_file))
+
+        def work(parent):
+            with tracer.activate(parent):
+                with tracer.span("terraform show"):
+                    pass
+
+        with tracer.span("terraform") as root:
+            thread = threading.Thread(target=work, args=(root,))
+            thread.start()
+            thread.join()
+
+        show, terraform = read_spans(trace_file)
+        assert show["parentSpanId"] == terraform["spanId"]
@@ -2,11 +2,21 @@
 # GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
 # SPDX-License-Identifier: GPL-3.0-or-later
 import json
+import os
 
 import pytest
+from ansible.module_utils.compat.version import LooseVersion
+from ansible_collections.cloud.terraform.plugins.module_utils.errors import TerraformError
+from ansible_collections.cloud.terraform.plugins.module_utils.models import TerraformStateSerial
+from ansible_collections.cloud.terraform.plugins.module_utils.refresh import get_refresh_record_path
+from ansible_collections.cloud.terraform.plugins.module_utils.terraform_commands import TerraformCommands
 from ansible_collections.cloud.terraform.plugins.modules import terraform
 from ansible_collections.cloud.terraform.tests.unit.plugins.modules.utils import set_module_args
 
+FAKE_TERRAFORM = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "..", "..", "benchmarks", "fake_terraform.py"
+)
+
 
 def test_terraform_without_argument(capfd):
     set_module_args({})
@@ -17,3 +27,157 @@ def test_terraform_without_argument(capfd):
     assert not err
     assert json.loads(out)["failed"]
     assert "project_path" in json.loads(out)["msg"]
+
+
+class TestSummarizeOutput:
+    def test_short_output(self):
+        assert terraform.summarize_output("Apply complete!\n") == "Apply complete!\n"
+
+    def test_none(self):
+        assert terraform.summarize_output(None) is None
+
+    def test_keeps_last_lines(self):
+        text = "".join("line {0}\n".format(i) for i in range(100))
+
+        summary = terraform.summarize_output(text)
+
+        assert summary.split("\n")[0] == "... 80 lines omitted ..."
+        assert summary.split("\n")[1] == "line 80"
+        assert summary.endswith("line 99\n")
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("FAKE_TERRAFORM_LOG", str(tmp_path / "invocations.jsonl"))
+    monkeypatch.setenv("FAKE_TERRAFORM_RESOURCES", "2")
+    project = tmp_path / "project"
+    project.mkdir()
+    return project
+
+
+def run_terraform(capfd, project, **params):
+    set_module_args(dict(project_path=str(project), binary_path=FAKE_TERRAFORM, force_init=True, **params))
+    with pytest.raises(SystemExit):
+        terraform.main()
+    out, err = capfd.readouterr()
+    return json.loads(out)
+
+
+def read_commands():
+    with open(os.environ["FAKE_TERRAFORM_LOG"]) as f:
+        invocations = [json.loads(line)["args"] for line in f]
+    return [" ".join(arg for arg in args[:2] if not arg.startswith("-")) for args in invocations]
+
+
+class TestResultProfile:
+    @pytest.mark.parametrize(
+        "result_profile, diff, expected",
+        [
+            ("full", False, {"providers schema", "show", "output"}),
+            ("summary", False, {"output"}),
+            ("summary", True, {"providers schema", "show", "output"}),
+            ("minimal", False, set()),
+            ("minimal", True, set()),
+        ],
+    )
+    def test_commands(self, capfd, project, result_profile, diff, expected):
+        result = run_terraform(capfd, project, result_profile=result_profile, _ansible_diff=diff)
+
+        assert not result.get("failed"), result.get("msg")
+        assert {"providers schema", "show", "output"} & set(read_commands()) == expected
+        assert ("outputs" in result) is ("output" in expected)
+        assert ("diff" in result) is ("show" in expected)
+
+
+class TestVariablesFile:
+    variables = {"name": "web", "count": 2, "tags": {"env": "dev"}, "zones": ["a", "b"]}
+
+    def capture_plan(self, mocker, error=None):
+        captured = {}
+        plan = TerraformCommands.plan
+
+        def side_effect(self, *args, **kwargs):
+            captured["variables_args"] = kwargs["variables_args"]
+            with open(kwargs["variables_args"][1]) as f:
+                captured["variables"] = json.load(f)
+            if error is not None:
+                raise TerraformError(error)
+            return plan(self, *args, **kwargs)
+
+        mocker.patch.object(TerraformCommands, "plan", autospec=True, side_effect=side_effect)
+        return captured
+
+    def test_variables_file(self, capfd, mocker, project):
+        captured = self.capture_plan(mocker)
+
+        result = run_terraform(capfd, project, variables=self.variables, variables_mode="file")
+
+        assert not result.get("failed"), result.get("msg")
+        assert captured["variables"] == self.variables
+        assert captured["variables_args"][0] == "-var-file"
+        assert captured["variables_args"][1].endswith(".tfvars.json")
+        assert not os.path.exists(captured["variables_args"][1])
+
+    def test_variables_file_removed_on_failure(self, capfd, mocker, project):
+        captured = self.capture_plan(mocker, error="plan failed")
+
+        result = run_terraform(capfd, project, variables=self.variables, variables_mode="file")
+
+        assert result["failed"]
+        assert captured["variables"] == self.variables
+        assert not os.path.exists(captured["variables_args"][1])
+
+
+class TestRefreshTargets:
+    def test_requires_refresh_only_apply(self, capfd, mocker, project):
+        mocker.patch.object(TerraformCommands, "version", return_value=LooseVersion("0.15.3"))
+
+        result = run_terraform(capfd, project, refresh_targets=["fake_resource.r0"])
+
+        assert result["failed"]
+        assert result["msg"] == "refresh_targets requires Terraform 0.15.4 or newer, found 0.15.3"
+
+    @pytest.mark.parametrize("serial_after, changed", [(1, False), (2, True)])
+    def test_changed_by_refresh(self, capfd, mocker, monkeypatch, project, serial_after, changed):
+        monkeypatch.setenv("FAKE_TERRAFORM_CHANGES", "0")
+        mocker.patch.object(
+            TerraformCommands,
+            "state_serial",
+            side_effect=[
+                TerraformStateSerial(serial=1, lineage="l"),
+                TerraformStateSerial(serial=serial_after, lineage="l"),
+            ],
+        )
+
+        result = run_terraform(capfd, project, refresh_targets=["fake_resource.r0"])
+
+        assert result["changed"] is changed
+
+
+class TestRefreshTtl:
+    @pytest.mark.parametrize(
+        "changes, check_mode, recorded",
+        [("1", False, True), ("1", True, False), ("0", False, False)],
+    )
+    def test_record_written_after_apply(self, capfd, mocker, monkeypatch, project, changes, check_mode, recorded):
+        monkeypatch.setenv("FAKE_TERRAFORM_CHANGES", changes)
+        mocker.patch.object(TerraformCommands, "state_serial", return_value=TerraformStateSerial(serial=1, lineage="l"))
+
+        result = run_terraform(capfd, project, refresh_ttl=600, _ansible_check_mode=check_mode)
+
+        assert not result.get("failed"), result.get("msg")
+        assert os.path.exists(get_refresh_record_path(str(project), "default", None)) is recorded
+
+
+class TestPluginCache:
+    def test_relative_to_project_path(self, capfd, mocker, project):
+        environment = mocker.spy(terraform, "get_plugin_cache_environment")
+        managed = mocker.spy(terraform, "managed_plugin_cache")
+
+        result = run_terraform(capfd, project, plugin_cache_dir="cache")
+
+        assert not result.get("failed"), result.get("msg")
+        environment.assert_called_once_with(str(project / "cache"))
+        assert managed.call_args[0][0] == str(project / "cache")
+        assert (project / "cache").is_dir()
@@ -38,6 +38,7 @@ class TestTerraformOutputMain:
             terraform_output.main()
 
         assert exc.value.args[0]["value"] == "my_output_value"
+        assert exc.value.args[0]["timings"] == []
 
     def test_return_all_outputs(self, mocker):
         mocker.patch.multiple(basic.AnsibleModule, exit_json=exit_json, fail_json=fail_json)
@@ -120,3 +121,74 @@ class TestTerraformOutputMain:
             terraform_output.main()
 
         assert exc.value.args[0]["msg"] == "Failure when getting Terraform outputs."
+
+
+class TestTerraformOutputDest:
+    def make_binary(self, tmp_path, script):
+        binary = tmp_path / "terraform"
+        binary.write_text("#!/bin/sh\n" + script)
+        binary.chmod(0o755)
+        return str(binary)
+
+    def run_module(self, mocker, binary, dest, **params):
+        mocker.patch.multiple(basic.AnsibleModule, exit_json=exit_json, fail_json=fail_json)
+        set_module_args(dict({"name": "kubeconfig", "format": "raw", "binary_path": binary, "dest": dest}, **params))
+
+        with pytest.raises((AnsibleExitJson, AnsibleFailJson)) as exc:
+            terraform_output.main()
+        return exc.value.args[0]
+
+    def test_writes_outputs_to_dest(self, mocker, tmp_path):
+        binary = self.make_binary(tmp_path, "printf 'apiVersion: v1\\n'\n")
+        dest = str(tmp_path / "kubeconfig")
+
+        result = self.run_module(mocker, binary, dest)
+
+        assert result["changed"] is True
+        assert result["dest"] == dest
+        assert result["size"] == 15
+        assert result["checksum"] == "09bb00a6a1c360c77cbf9bcd91bfb82e11ba96ce"
+        assert "value" not in result
+        assert [t["stdout_bytes"] for t in result["timings"]] == [15]
+        with open(dest) as f:
+            assert f.read() == "apiVersion: v1\n"
+
+        assert self.run_module(mocker, binary, dest)["changed"] is False
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["kubeconfig", "terraform"]
+
+    def test_failure_keeps_dest(self, mocker, tmp_path):
+        binary = self.make_binary(tmp_path, "echo 'boom' >&2\nexit 2\n")
+        dest = tmp_path / "kubeconfig"
+        dest.write_text("old")
+
+        result = self.run_module(mocker, binary, str(dest))
+
+        assert result["failed"] is True
+        assert "boom" in result["msg"]
+        assert dest.read_text() == "old"
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["kubeconfig", "terraform"]
+
+    def test_missing_dest_directory(self, mocker, tmp_path):
+        binary = self.make_binary(tmp_path, "printf 'apiVersion: v1\\n'\n")
+        dest = tmp_path / "missing" / "kubeconfig"
+
+        result = self.run_module(mocker, binary, str(dest))
+
+        assert result["failed"] is True
+        assert result["msg"] == "Destination directory {0} does not exist".format(tmp_path / "missing")
+
+    def test_retries_transient_errors(self, mocker, tmp_path):
+        mocker.patch("time.sleep")
+        # the first attempt writes part of the outputs before failing
+        binary = self.make_binary(
+            tmp_path,
+            "if [ ! -e {0} ]; then touch {0}; printf 'partial'; echo '503 Service Unavailable' >&2; exit 2; fi\n"
+            "printf 'apiVersion: v1\\n'\n".format(tmp_path / "attempted"),
+        )
+        dest = tmp_path / "kubeconfig"
+
+        result = self.run_module(mocker, binary, str(dest), transient_retries=2)
+
+        assert result["size"] == 15
+        assert [t["rc"] for t in result["timings"]] == [2, 0]
+        assert dest.read_text() == "apiVersion: v1\n"